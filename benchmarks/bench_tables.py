@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Benchmark: renderizado de tablas (concatenación anterior vs. TableRenderer)
+
+Genera tablas sintéticas tipo precios/cuotas de AWS, con celdas vacías
+(None), espacios sobrantes y tablas partidas entre páginas que repiten la
+cabecera. Compara el ``table_to_markdown`` anterior (``+=`` y "None") con
+``TableRenderer`` en formato markdown y compacto: tiempo de renderizado,
+tiempo de tokenización y tokens del texto tras ``clean_text`` (lo que se
+emite en chunks y uploads), y cuántas líneas (filas) conserva.
+
+Uso:
+    python benchmarks/bench_tables.py [--tables 2000] [--rows 40] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import tiktoken
+
+from src.tables import TableRenderer
+from src.utils import clean_text
+
+HEADER = ["Region", "Instance type", "vCPU", "Memory (GiB)", "On-Demand  hourly", "Notes"]
+
+def legacy_table_to_markdown(table_data):
+    """Implementación anterior: concatenación repetida y str(None)"""
+    if not table_data or not table_data[0]:
+        return ""
+    headers = table_data[0]
+    markdown = "| " + " | ".join(str(h) for h in headers) + " |\n"
+    markdown += "| " + " | ".join(["---"] * len(headers)) + " |\n"
+    for row in table_data[1:]:
+        if row:
+            markdown += "| " + " | ".join(str(cell) for cell in row) + " |\n"
+    return markdown
+
+def make_tables(count, rows, seed=0):
+    """Tablas de un documento; cada tabla continúa en una segunda página"""
+    rng = random.Random(seed)
+    tables = []
+    for _ in range(count // 2):
+        for _page in range(2):
+            table = [list(HEADER)]
+            for _ in range(rows):
+                table.append([
+                    rng.choice(["us-east-1", "eu-west-1", "ap-south-1"]),
+                    f"m7g.{rng.choice(['large', 'xlarge', '2xlarge'])}",
+                    str(rng.choice([2, 4, 8])),
+                    f" {rng.choice([8, 16, 32])} ",
+                    f"${rng.random():.4f}",
+                    rng.choice([None, None, "", "Savings\nPlans  available"])
+                ])
+            tables.append(table)
+    return tables
+
+def render_legacy(tables):
+    return "\n\n".join(legacy_table_to_markdown(t) for t in tables)
+
+def render_with(table_format):
+    def render(tables):
+        renderer = TableRenderer(table_format)
+        return "\n\n".join(renderer.render(t) for t in tables)
+    return render
+
+def measure(func, tables, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = func(tables)
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tables', type=int, default=2000, help='Número de tablas (mitad partidas entre páginas)')
+    parser.add_argument('--rows', type=int, default=40, help='Filas por tabla')
+    parser.add_argument('--big-rows', type=int, default=50000, help='Filas de la tabla grande única')
+    parser.add_argument('--repeat', type=int, default=3, help='Repeticiones (se toma la mejor)')
+    args = parser.parse_args()
+    
+    tokenizer = tiktoken.get_encoding("cl100k_base")
+    scenarios = (
+        (f"{args.tables} tablas x {args.rows} filas", make_tables(args.tables, args.rows)),
+        (f"1 tabla x {args.big_rows} filas", make_tables(2, args.big_rows)[:1])
+    )
+    renderers = (
+        ('anterior (+=, "None")', render_legacy),
+        ('markdown', render_with('markdown')),
+        ('compact (CSV)', render_with('compact'))
+    )
+    
+    for title, tables in scenarios:
+        print(title)
+        baseline = None
+        for name, func in renderers:
+            elapsed, output = measure(func, tables, args.repeat)
+            cleaned = clean_text(output)
+            start = time.perf_counter()
+            tokens = len(tokenizer.encode(cleaned, disallowed_special=()))
+            encode_time = time.perf_counter() - start
+            baseline = baseline or tokens
+            lines = sum(1 for line in output.splitlines() if line.strip())
+            lines_kept = sum(1 for line in cleaned.splitlines() if line.strip())
+            print(f"  {name:24s} render {elapsed:7.3f} s   encode {encode_time:7.3f} s   "
+                  f"{tokens:>10,d} tokens   ahorro {100 * (1 - tokens / baseline):3.0f}%   "
+                  f"líneas {lines_kept:,d}/{lines:,d}")
+
+if __name__ == "__main__":
+    main()
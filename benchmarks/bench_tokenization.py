@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Benchmark: tokenización por documento en el pipeline real (doble encode vs. encode compartido)
+
+Procesa un documento sintético con ``DocumentPipeline.process`` (extracción,
+limpieza, clasificación y chunking) de dos formas:
+
+- actual: ``DocumentPipeline.encode`` tokeniza una sola vez a un array uint32
+  que comparten la metadata y el chunking;
+- anterior: una subclase cuyo ``encode`` vuelve a tokenizar en cada llamada
+  pasando por una lista de ints, como hacía el flujo anterior.
+
+El tiempo es el mejor de ``--repeat`` ejecuciones; la memoria es el pico de
+asignaciones medido con tracemalloc en una ejecución aparte (tracemalloc
+ralentiza, así que no se mezcla con el tiempo).
+
+Uso:
+    python benchmarks/bench_tokenization.py [--mb 5] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from src.pipeline import DocumentPipeline
+
+SAMPLE = (
+    "Amazon Bedrock is a fully managed service that offers a choice of "
+    "high-performing foundation models through a single API. Use the "
+    "InvokeModel operation to run inference; see the API reference for "
+    "request and response parameters, quotas and error codes.\n"
+)
+
+class DoubleEncodePipeline(DocumentPipeline):
+    """Flujo anterior: cada etapa vuelve a tokenizar a una lista de ints"""
+    
+    def encode(self, text: str):
+        return np.array(self.tokenizer.encode(text, disallowed_special=()), dtype=np.uint32)
+
+def run(pipeline, data: bytes):
+    pipeline.release_encoding()
+    document = pipeline.process_bytes(data, "bedrock_user_guide.md")
+    pipeline.release_encoding()
+    return document
+
+def measure(pipeline, data: bytes, repeat: int):
+    """Mejor tiempo y pico de memoria (MB) de ``DocumentPipeline.process``"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        document = run(pipeline, data)
+        best = min(best, time.perf_counter() - start)
+    
+    tracemalloc.start()
+    run(pipeline, data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / (1024 * 1024), document
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mb', type=float, default=5, help='Tamaño del texto sintético en MB')
+    parser.add_argument('--repeat', type=int, default=3, help='Repeticiones (se toma la mejor)')
+    args = parser.parse_args()
+    
+    data = (SAMPLE * int(args.mb * 1024 * 1024 / len(SAMPLE))).encode('utf-8')
+    print(f"Texto: {len(data) / (1024 * 1024):.1f} MB")
+    
+    results = {}
+    for name, pipeline in (('doble encode (list)', DoubleEncodePipeline()),
+                           ('encode compartido (uint32)', DocumentPipeline())):
+        elapsed, peak, document = measure(pipeline, data, args.repeat)
+        results[name] = (elapsed, peak)
+        print(f"  {name:28s} {elapsed:8.3f} s   pico de memoria {peak:8.1f} MB   "
+              f"{document.metadata['token_count']:,d} tokens, {len(document.chunks):,d} chunks")
+    
+    (old_time, old_peak), (new_time, new_peak) = results.values()
+    print(f"Reducción: tiempo {100 * (1 - new_time / old_time):.0f}%, pico de memoria {100 * (1 - new_peak / old_peak):.0f}%")
+
+if __name__ == "__main__":
+    main()
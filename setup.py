@@ -30,14 +30,21 @@ setup(
         "boto3>=1.34.0",
         "PyPDF2>=3.0.0",
         "pdfplumber>=0.10.0",
+        "pypdfium2>=4.0.0",
         "python-docx>=1.1.0",
         "markdown>=3.5.0",
         "beautifulsoup4>=4.12.0",
         "tqdm>=4.66.0",
         "colorama>=0.4.6",
         "pandas>=2.1.0",
-        "tiktoken>=0.5.0",
+        "tiktoken>=0.6.0",
     ],
+    extras_require={
+        "chunk-store": ["pyarrow>=12.0.0"],
+        "watch": ["watchdog>=3.0.0"],
+        "upload": ["orjson>=3.9.0", "zstandard>=0.22.0"],
+        "encoding": ["charset-normalizer>=3.0.0"],
+    },
     entry_points={
         "console_scripts": [
             "process-docs=src.process_docs:main",
@@ -4,7 +4,19 @@ __version__ = "1.0.0"
 __author__ = "THAÄROS System"
 __email__ = "contact@example.com"
 
-from .process_docs import DocumentProcessor
+import logging
+
+from .pipeline import DocumentPipeline, Chunk, ProcessedDocument
 from .config import Config
 
-__all__ = ['DocumentProcessor', 'Config']
\ No newline at end of file
+# La librería no emite nada salvo que la aplicación configure logging
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
+def __getattr__(name):
+    """Carga ``DocumentProcessor`` bajo demanda: la API en memoria no importa la CLI"""
+    if name == 'DocumentProcessor':
+        from .process_docs import DocumentProcessor
+        return DocumentProcessor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+__all__ = ['DocumentProcessor', 'DocumentPipeline', 'Chunk', 'ProcessedDocument', 'Config']
\ No newline at end of file
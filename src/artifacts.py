@@ -0,0 +1,259 @@
+"""Escritura de artefactos de salida: blobs por hash y documentos de subida comprimidos"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependencia opcional
+    zstandard = None
+
+# Cómo se materializan las vistas (01_processed, 02_structured, 04_chunks) a partir del blob
+BLOB_LINK_MODES = ('hardlink', 'symlink', 'copy')
+
+# Compresión de 05_ready_to_upload -> extensión del archivo
+UPLOAD_COMPRESSIONS = {None: '.json', 'gzip': '.json.gz', 'zstd': '.json.zst'}
+
+_COMPRESSION_LEVELS = {'gzip': 6, 'zstd': 3}
+
+# ============================================
+# ESCRITURA ATÓMICA
+# ============================================
+
+@contextmanager
+def _atomic_path(dest: Path) -> Iterator[Path]:
+    """Ruta temporal junto a ``dest`` que la sustituye al terminar.
+    
+    ``os.replace`` cambia la entrada del directorio: nunca se escribe a través
+    de un enlace existente (lo que modificaría el blob) y los lectores no ven
+    archivos a medio escribir.
+    """
+    fd, tmp = tempfile.mkstemp(prefix=f".{dest.name}.", suffix=".tmp", dir=dest.parent)
+    os.close(fd)
+    os.unlink(tmp)
+    try:
+        yield Path(tmp)
+        os.replace(tmp, dest)
+    finally:
+        # rename() no hace nada si ``dest`` ya es un hardlink del mismo inodo
+        if os.path.lexists(tmp):
+            os.unlink(tmp)
+
+def write_text(dest: Path, text: str) -> Path:
+    """Escribe un texto sustituyendo el archivo de forma atómica"""
+    dest = Path(dest)
+    with _atomic_path(dest) as tmp:
+        tmp.write_bytes(text.encode('utf-8'))
+    return dest
+
+# ============================================
+# BLOB STORE
+# ============================================
+
+class BlobStore:
+    """Almacén de textos direccionado por contenido.
+    
+    Cada texto se guarda una vez en ``root/ab/cdef...`` (sha256 de sus bytes
+    UTF-8) y las carpetas de salida son vistas: hardlinks, symlinks relativos
+    o copias del blob. Con hardlinks borrar ``root`` no afecta a las vistas.
+    Los blobs que ya no tienen vistas se eliminan con ``sweep``.
+    """
+    
+    def __init__(self, root: Path, link_mode: str = 'hardlink'):
+        if link_mode not in BLOB_LINK_MODES:
+            raise ValueError(f"Modo de enlace no soportado: {link_mode}")
+        self.root = Path(root)
+        self.link_mode = link_mode
+    
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+    
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:]
+    
+    def put(self, text: str) -> str:
+        """Guarda el texto si no existe y devuelve su hash"""
+        data = text.encode('utf-8')
+        digest = self.digest(data)
+        blob_path = self.path(digest)
+        if not blob_path.exists():
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+            with _atomic_path(blob_path) as tmp:
+                tmp.write_bytes(data)
+                # Solo lectura: una vista hardlink comparte el inodo con el blob
+                tmp.chmod(0o444)
+        else:
+            # La fecha de modificación marca el último uso: ``sweep`` respeta los recientes
+            try:
+                os.utime(blob_path)
+            except OSError:
+                pass
+        return digest
+    
+    def link(self, digest: str, dest: Path) -> Path:
+        """Materializa el blob en ``dest`` sustituyendo lo que hubiera"""
+        dest = Path(dest)
+        blob_path = self.path(digest)
+        with _atomic_path(dest) as tmp:
+            if self.link_mode == 'symlink':
+                os.symlink(os.path.relpath(blob_path, dest.parent), tmp)
+                return dest
+            if self.link_mode == 'hardlink':
+                try:
+                    os.link(blob_path, tmp)
+                    return dest
+                except OSError:
+                    # Otro sistema de archivos, sin soporte de enlaces o límite de enlaces
+                    pass
+            shutil.copyfile(blob_path, tmp)
+        return dest
+    
+    def write(self, dest: Path, text: str) -> str:
+        """Guarda el texto y lo materializa en ``dest``; devuelve su hash"""
+        digest = self.put(text)
+        self.link(digest, dest)
+        return digest
+    
+    def _symlinked(self, view_dirs: Iterable[Path]) -> set:
+        """Blobs a los que apunta algún symlink de las vistas"""
+        referenced = set()
+        for directory in view_dirs:
+            for root, _, names in os.walk(directory):
+                for name in names:
+                    path = os.path.join(root, name)
+                    if os.path.islink(path):
+                        referenced.add(os.path.realpath(path))
+        return referenced
+    
+    def sweep(self, view_dirs: Iterable[Path] = (), min_age_seconds: float = 0.0) -> Dict[str, int]:
+        """Elimina los blobs sin vistas; devuelve blobs eliminados y bytes liberados.
+        
+        Con hardlinks un blob sin vistas tiene un solo enlace; con symlinks
+        se buscan los enlaces en ``view_dirs``; con copias ninguna vista lo
+        usa. No se tocan los blobs usados hace menos de ``min_age_seconds``:
+        otro proceso puede estar enlazándolos.
+        """
+        referenced = self._symlinked(view_dirs) if self.link_mode == 'symlink' else None
+        cutoff = time.time() - min_age_seconds
+        removed = freed = 0
+        for blob_path in self.root.glob("*/*"):
+            if blob_path.name.startswith('.'):
+                continue  # Blob a medio escribir
+            try:
+                stat = blob_path.stat()
+            except OSError:
+                continue
+            if stat.st_mtime > cutoff:
+                continue
+            if self.link_mode == 'hardlink' and stat.st_nlink > 1:
+                continue
+            if referenced is not None and os.path.realpath(blob_path) in referenced:
+                continue
+            try:
+                blob_path.unlink()
+            except OSError:
+                continue
+            removed += 1
+            freed += stat.st_size
+        return {'blobs_removed': removed, 'bytes_freed': freed}
+
+# ============================================
+# DOCUMENTOS DE SUBIDA
+# ============================================
+
+def dumps(obj) -> bytes:
+    """JSON compacto en UTF-8 (orjson si está instalado)"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+@contextmanager
+def open_compressed(path: Path, compression: Optional[str] = None,
+                    size_hint: int = 0) -> Iterator[BinaryIO]:
+    """Abre ``path`` para escritura binaria con compresión en streaming.
+    
+    Con zstd la ventana cubre ``size_hint`` bytes (hasta 128 MB) para que el
+    compresor encuentre texto repetido lejano, como el contenido y sus chunks.
+    """
+    if compression not in UPLOAD_COMPRESSIONS:
+        raise ValueError(f"Compresión no soportada: {compression}")
+    
+    with open(path, 'wb') as raw:
+        if compression is None:
+            yield raw
+        elif compression == 'gzip':
+            # mtime=0: mismo contenido, mismos bytes (sync no vuelve a subirlo)
+            with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=_COMPRESSION_LEVELS['gzip'],
+                               mtime=0) as out:
+                yield out
+        else:
+            if zstandard is None:
+                raise ImportError("zstandard no está instalado (pip install zstandard)")
+            params = zstandard.ZstdCompressionParameters.from_level(
+                _COMPRESSION_LEVELS['zstd'],
+                window_log=min(27, max(20, size_hint.bit_length())),
+                enable_ldm=size_hint > 1 << 22
+            )
+            compressor = zstandard.ZstdCompressor(compression_params=params)
+            with compressor.stream_writer(raw, closefd=False) as out:
+                yield out
+
+def upload_path(directory: Path, name: str, compression: Optional[str] = None) -> Path:
+    return Path(directory) / f"{name}{UPLOAD_COMPRESSIONS[compression]}"
+
+def write_upload_document(directory: Path, name: str, text: str, metadata: Dict, chunks: List[Dict],
+                          compression: Optional[str] = None) -> Path:
+    """Escribe el documento consolidado de ``05_ready_to_upload``.
+    
+    El objeto (``content``, ``metadata``, ``chunks``) se serializa pieza a
+    pieza, sin indentación y opcionalmente comprimido. Se borran las variantes
+    con otra compresión que dejara una ejecución anterior.
+    """
+    path = upload_path(directory, name, compression)
+    content = dumps(text)
+    
+    with _atomic_path(path) as tmp:
+        with open_compressed(tmp, compression, size_hint=2 * len(content)) as out:
+            out.write(b'{"content":')
+            out.write(content)
+            out.write(b',"metadata":')
+            out.write(dumps(metadata))
+            out.write(b',"chunks":[')
+            for i, chunk in enumerate(chunks):
+                if i:
+                    out.write(b',')
+                out.write(dumps({'index': chunk['chunk_index'], 'text': chunk['text']}))
+            out.write(b']}')
+    
+    for other in UPLOAD_COMPRESSIONS:
+        if other != compression:
+            stale = upload_path(directory, name, other)
+            if stale.exists():
+                stale.unlink()
+    return path
+
+def read_upload_document(path: Path) -> Dict:
+    """Lee un documento de ``05_ready_to_upload`` con o sin compresión"""
+    path = Path(path)
+    data = path.read_bytes()
+    if path.suffix == '.gz':
+        data = gzip.decompress(data)
+    elif path.suffix == '.zst':
+        if zstandard is None:
+            raise ImportError("zstandard no está instalado (pip install zstandard)")
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return json.loads(data)
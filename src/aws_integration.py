@@ -5,6 +5,8 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, List
 
+from .config import Config
+
 class S3UploadGenerator:
     """Generador de scripts para subir a S3"""
     
@@ -83,8 +85,8 @@ class BedrockMetadataGenerator:
                 }
             },
             'bedrock_config': {
-                'embedding_model': 'amazon.titan-embed-text-v2',
-                'vector_dimensions': 1024,
-                'recommended_search_k': min(len(chunks), 5)
+                'embedding_model': Config.EMBEDDING_MODEL,
+                'vector_dimensions': Config.EMBEDDING_DIMENSIONS,
+                'recommended_search_k': min(len(chunks), doc_metadata.get('search_k', 5))
             }
         }
\ No newline at end of file
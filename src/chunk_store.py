@@ -0,0 +1,187 @@
+"""Almacén columnar de chunks (Parquet / Arrow IPC) para consumidores downstream"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - dependencia opcional
+    pa = None
+
+CHUNK_STORE_FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+# Cada worker escribe su parte (chunks-<pid>); el proceso principal las une al final
+CHUNK_STORE_PART_PREFIX = "chunks-"
+
+logger = logging.getLogger(__name__)
+
+def chunk_store_schema():
+    """Esquema de una fila por chunk"""
+    return pa.schema([
+        ('document_id', pa.string()),
+        ('aws_service', pa.string()),
+        ('doc_type', pa.string()),
+        ('chunk_index', pa.int32()),
+        ('token_start', pa.int64()),
+        ('token_end', pa.int64()),
+        ('char_start', pa.int64()),
+        ('char_end', pa.int64()),
+        ('token_count', pa.int32()),
+        ('text', pa.string()),
+    ])
+
+class ChunkStoreWriter:
+    """Escribe chunks de forma incremental en row groups.
+    
+    Las filas se acumulan en memoria y se vuelcan como un row group (Parquet)
+    o record batch (Arrow IPC) cada ``row_group_size`` chunks. El formato
+    ``arrow`` puede abrirse con ``pyarrow.memory_map`` sin copiar datos.
+    """
+    
+    def __init__(self, path: Path, format: str = 'parquet', row_group_size: int = 10000):
+        if pa is None:
+            raise ImportError("pyarrow no está instalado (pip install pyarrow)")
+        if format not in CHUNK_STORE_FORMATS:
+            raise ValueError(f"Formato de chunk store no soportado: {format}")
+        
+        self.path = Path(path)
+        self.format = format
+        self.row_group_size = row_group_size
+        self.schema = chunk_store_schema()
+        self.rows_written = 0
+        self._columns = {name: [] for name in self.schema.names}
+        self._buffered = 0
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if format == 'parquet':
+            self._writer = pq.ParquetWriter(str(self.path), self.schema, compression='zstd')
+        else:
+            self._sink = pa.OSFile(str(self.path), 'wb')
+            self._writer = pa.ipc.new_file(self._sink, self.schema)
+    
+    def add_document(self, document_id: str, metadata: Dict, chunks: List[Dict]):
+        """Añade todos los chunks de un documento"""
+        columns = self._columns
+        service = metadata.get('aws_service', 'general')
+        doc_type = metadata.get('doc_type', 'general')
+        
+        for chunk in chunks:
+            columns['document_id'].append(document_id)
+            columns['aws_service'].append(service)
+            columns['doc_type'].append(doc_type)
+            columns['chunk_index'].append(chunk['chunk_index'])
+            columns['token_start'].append(chunk.get('start_position'))
+            columns['token_end'].append(chunk.get('end_position'))
+            columns['char_start'].append(chunk.get('char_start'))
+            columns['char_end'].append(chunk.get('char_end'))
+            columns['token_count'].append(chunk.get('token_count'))
+            columns['text'].append(chunk['text'])
+        
+        self._buffered += len(chunks)
+        if self._buffered >= self.row_group_size:
+            self.flush()
+    
+    def add_batch(self, batch):
+        """Añade un record batch con el esquema del store (sin pasar por listas)"""
+        self.flush()
+        if self.format == 'parquet':
+            self._writer.write_batch(batch, row_group_size=self.row_group_size)
+        else:
+            self._writer.write_batch(batch)
+        self.rows_written += batch.num_rows
+    
+    def flush(self):
+        """Vuelca las filas acumuladas como un row group"""
+        if not self._buffered:
+            return
+        
+        batch = pa.record_batch(
+            [pa.array(self._columns[name], type=field.type)
+             for name, field in zip(self.schema.names, self.schema)],
+            schema=self.schema
+        )
+        if self.format == 'parquet':
+            self._writer.write_batch(batch, row_group_size=self.row_group_size)
+        else:
+            self._writer.write_batch(batch)
+        
+        self.rows_written += self._buffered
+        self._columns = {name: [] for name in self.schema.names}
+        self._buffered = 0
+    
+    def close(self):
+        """Vuelca lo pendiente y cierra el archivo"""
+        if self._writer is None:
+            return
+        self.flush()
+        self._writer.close()
+        if self.format == 'arrow':
+            self._sink.close()
+        self._writer = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def chunk_store_parts(directory: Path, format: str) -> List[Path]:
+    """Partes de los workers (``chunks-<pid>``) que hay en un directorio"""
+    return sorted(Path(directory).glob(f"{CHUNK_STORE_PART_PREFIX}*{CHUNK_STORE_FORMATS[format]}"))
+
+def _iter_batches(path: Path, format: str, batch_size: int):
+    if format == 'parquet':
+        yield from pq.ParquetFile(str(path)).iter_batches(batch_size=batch_size)
+        return
+    with pa.memory_map(str(path), 'r') as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+def merge_chunk_store(parts: Iterable[Path], path: Path, format: str = 'parquet',
+                      row_group_size: int = 10000) -> int:
+    """Une las partes de los workers en un único chunk store y las borra.
+    
+    El resultado se escribe en un temporal y sustituye a ``path`` de forma
+    atómica. Una parte ilegible (worker muerto antes de cerrarla) se omite
+    con un aviso. Devuelve las filas escritas.
+    """
+    path = Path(path)
+    parts = list(parts)
+    tmp = path.with_name(f".{path.name}.tmp")
+    with ChunkStoreWriter(tmp, format=format, row_group_size=row_group_size) as store:
+        for part in parts:
+            try:
+                for batch in _iter_batches(part, format, row_group_size):
+                    store.add_batch(batch)
+            except (OSError, pa.ArrowException) as e:
+                logger.warning("⚠️  Parte del chunk store omitida %s: %s", part.name, e)
+    os.replace(tmp, path)
+    for part in parts:
+        part.unlink(missing_ok=True)
+    return store.rows_written
+
+def read_chunk_store(path: Path, filters: Optional[Dict] = None):
+    """Lee el chunk store como ``pyarrow.Table``.
+    
+    Los archivos Arrow se abren con memory map. ``filters`` es un dict
+    columna -> valor, p. ej. ``{'aws_service': 'lambda'}``.
+    """
+    if pa is None:
+        raise ImportError("pyarrow no está instalado (pip install pyarrow)")
+    
+    path = Path(path)
+    if path.suffix == CHUNK_STORE_FORMATS['arrow']:
+        # Los buffers de la tabla apuntan al mapa; no se copia el archivo
+        table = pa.ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+    else:
+        pq_filters = [(column, '==', value) for column, value in (filters or {}).items()]
+        return pq.read_table(str(path), filters=pq_filters or None)
+    
+    for column, value in (filters or {}).items():
+        table = table.filter(pc.equal(table[column], value))
+    return table
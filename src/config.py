@@ -18,6 +18,9 @@ class Config:
         "logs": "Logs de procesamiento"
     }
     
+    # Extensiones de documentos soportadas
+    SUPPORTED_EXTENSIONS = ['.pdf', '.docx', '.txt', '.md', '.html', '.xlsx', '.csv']
+    
     # Configuración de chunking
     CHUNK_SIZES = {
         "api_reference": 512,
@@ -28,8 +31,81 @@ class Config:
     }
     
     CHUNK_OVERLAP = 100
+    CHUNK_OVERLAPS = {}            # Overlap por tipo de documento (si falta, CHUNK_OVERLAP)
+    
+    # Chunks a recuperar por consulta (recommended_search_k) por tipo de documento
+    SEARCH_K = {
+        "default": 5
+    }
+    
+    # Perfil de chunking generado con --profile (JSON); sustituye los valores anteriores
+    CHUNK_PROFILE = None
+    PROFILE_SAMPLE_SIZE = 200      # Documentos muestreados por --profile
+    RETRIEVAL_TOKEN_BUDGET = 4000  # Tokens de contexto por consulta para calcular search_k
+    
+    # Embeddings de Bedrock
+    EMBEDDING_MODEL = "amazon.titan-embed-text-v2"
+    EMBEDDING_DIMENSIONS = 1024
+    EMBEDDING_PRICE_PER_1K_TOKENS = 0.00002  # USD, para la proyección de coste del reporte
     MAX_FILE_SIZE_MB = 100
     
+    # Extracción de PDF: cadena de backends. Cada página se intenta con el
+    # primer backend y, si falla o excede el timeout, se reintenta con el
+    # siguiente.
+    PDF_BACKENDS = ["pypdfium2", "pdfplumber", "pypdf2"]
+    PDF_PAGE_TIMEOUT = 30          # Segundos por página y backend (0 = sin límite); se vigila desde un hilo y un worker que abandona pdfium se recicla
+    PDF_TABLE_EXTRACTION = True    # Extraer tablas con pdfplumber en páginas candidatas
+    PDF_TABLE_MIN_RULES = 6        # Trazos mínimos en la página para sospechar una tabla
+    
+    # Formato de las tablas extraídas: 'markdown' o 'compact' (CSV, menos tokens)
+    TABLE_FORMAT = "markdown"
+    
+    # Procesamiento en paralelo y límites de memoria
+    MAX_WORKERS = 1                # Procesos worker (1 = secuencial en el proceso actual)
+    LARGE_FILE_WORKERS = 1         # Workers del carril de archivos > MAX_FILE_SIZE_MB
+    MAX_IN_FLIGHT_MB = 512         # Bytes de entrada procesándose a la vez como máximo
+    MAX_WORKERS_RSS_MB = 4096      # RSS total de los workers a partir del cual se pausa la admisión
+    WORKER_MAX_DOCUMENTS = 200     # Reciclar un worker tras N documentos...
+    WORKER_MAX_MB = 1024           # ...o tras M MB procesados
+    
+    # Modo coordinado: ledger compartido entre nodos
+    LEDGER_LEASE_SECONDS = 600     # Un lease vencido se reasigna a otro nodo
+    LEDGER_MAX_ATTEMPTS = 3        # Intentos máximos por documento
+    
+    # Coste relativo por formato para ordenar el trabajo (bytes × factor)
+    COST_FACTORS = {
+        ".pdf": 4.0,
+        ".docx": 2.0,
+        ".xlsx": 3.0,
+        ".csv": 1.5,
+        ".html": 1.5,
+        ".md": 1.0,
+        ".txt": 1.0
+    }
+    
+    # Chunk store columnar (None = desactivado, 'parquet' o 'arrow')
+    CHUNK_STORE_FORMAT = None
+    CHUNK_STORE_ROW_GROUP_SIZE = 10000
+    
+    # Almacén de contenido: 01_processed, 02_structured y 04_chunks enlazan a OUTPUT_BASE/blobs
+    BLOB_STORE = True
+    BLOB_LINK_MODE = "hardlink"    # 'hardlink', 'symlink' o 'copy' (hardlink recurre a copia si falla)
+    BLOB_SWEEP_GRACE_SECONDS = 600  # Los blobs usados hace menos no se eliminan (otro nodo o worker puede enlazarlos)
+    BLOB_SWEEP_INTERVAL = 600       # Segundos entre limpiezas de blobs en --watch (además de al terminar)
+    
+    # Documentos de 05_ready_to_upload: None (.json), 'gzip' (.json.gz) o 'zstd' (.json.zst)
+    UPLOAD_COMPRESSION = None
+    
+    # Modo watch (daemon de ingesta continua)
+    WATCH_DEBOUNCE_SECONDS = 0.25  # Silencio tras la última escritura antes de procesar
+    WATCH_POLL_INTERVAL = 0.5      # Intervalo del watcher por sondeo (sin inotify)
+    WATCH_METRICS_PORT = 9464      # Endpoint HTTP local de estado/métricas (0 = desactivado)
+    
+    # Logging (ver src/log.py)
+    LOG_LEVEL = "INFO"             # DEBUG muestra el detalle por documento
+    LOG_FORMAT = "console"         # 'console' o 'json' (una línea por evento)
+    SHOW_PROGRESS = True           # Barra de progreso (solo en terminal y modo consola)
+    
     # Servicios AWS conocidos
     AWS_SERVICES = [
         'bedrock', 'lambda', 'apigateway', 'dynamodb', 's3', 
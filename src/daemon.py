@@ -0,0 +1,185 @@
+"""Daemon de ingesta continua: watcher + pool de workers calientes + endpoint de métricas"""
+
+import json
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .config import Config
+from .scheduler import WorkerPool
+from .watcher import DirectoryWatcher
+
+# Límites (segundos) del histograma de latencia archivo → salida lista
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class IngestMetrics:
+    """Contadores del daemon en formato JSON y Prometheus"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.counters = {
+            'documents_received': 0,
+            'documents_processed': 0,
+            'documents_failed': 0,
+            'chunks': 0,
+            'tokens': 0
+        }
+        self.latency_buckets = [0] * len(LATENCY_BUCKETS)
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self.last_latency = None
+        self.queue_depth = 0
+        self.in_flight = 0
+    
+    def received(self):
+        with self._lock:
+            self.counters['documents_received'] += 1
+    
+    def completed(self, ok: bool, delta: Dict, latency: Optional[float]):
+        with self._lock:
+            self.counters['documents_processed' if ok else 'documents_failed'] += 1
+            self.counters['chunks'] += delta.get('total_chunks', 0)
+            self.counters['tokens'] += delta.get('total_tokens', 0)
+            if latency is not None:
+                self.last_latency = latency
+                self.latency_sum += latency
+                self.latency_count += 1
+                for i, bound in enumerate(LATENCY_BUCKETS):
+                    if latency <= bound:
+                        self.latency_buckets[i] += 1
+    
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                **self.counters,
+                'uptime_seconds': time.time() - self.started,
+                'queue_depth': self.queue_depth,
+                'in_flight': self.in_flight,
+                'last_latency_seconds': self.last_latency,
+                'avg_latency_seconds': self.latency_sum / self.latency_count if self.latency_count else None
+            }
+    
+    def to_prometheus(self) -> str:
+        prefix = 'kb_processor'
+        with self._lock:
+            lines = []
+            for name, value in self.counters.items():
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                lines.append(f"{prefix}_{name}_total {value}")
+            for name, value in (('queue_depth', self.queue_depth), ('in_flight', self.in_flight)):
+                lines.append(f"# TYPE {prefix}_{name} gauge")
+                lines.append(f"{prefix}_{name} {value}")
+            lines.append(f"# TYPE {prefix}_latency_seconds histogram")
+            for bound, count in zip(LATENCY_BUCKETS, self.latency_buckets):
+                lines.append(f'{prefix}_latency_seconds_bucket{{le="{bound}"}} {count}')
+            lines.append(f'{prefix}_latency_seconds_bucket{{le="+Inf"}} {self.latency_count}')
+            lines.append(f"{prefix}_latency_seconds_sum {self.latency_sum}")
+            lines.append(f"{prefix}_latency_seconds_count {self.latency_count}")
+        return "\n".join(lines) + "\n"
+
+def _make_handler(daemon: 'IngestDaemon'):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/healthz':
+                body, content_type = b'ok\n', 'text/plain'
+            elif self.path == '/metrics':
+                body, content_type = daemon.metrics.to_prometheus().encode(), 'text/plain; version=0.0.4'
+            elif self.path == '/status':
+                status = {**daemon.metrics.to_dict(), 'watching': [str(d) for d in daemon.directories],
+                          'watcher_backend': daemon.watcher.backend}
+                body, content_type = json.dumps(status).encode(), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    return MetricsHandler
+
+class IngestDaemon:
+    """Procesa continuamente los documentos que aparecen en los directorios vigilados.
+    
+    Los workers se arrancan al inicio (tokenizer cargado) y cada documento
+    listo tras el debounce pasa por ``process_document`` en un worker.
+    ``on_result(path, ok, stats_delta, latency)`` se llama por documento.
+    ``input_root`` es el directorio de entrada de las claves del manifiesto y
+    ``encodings`` la caché de encodings que reciben los workers.
+    """
+    
+    def __init__(self, directories: Iterable[Path], workers: Optional[int] = None,
+                 metrics_port: Optional[int] = None, include_existing: bool = False,
+                 on_result: Optional[Callable[[str, bool, Dict, Optional[float]], None]] = None,
+                 use_inotify: bool = True, input_root: Optional[Path] = None,
+                 encodings: Optional[Dict[str, str]] = None):
+        self.directories = [Path(d) for d in directories]
+        self.pool = WorkerPool(workers or Config.MAX_WORKERS, input_root=input_root, encodings=encodings)
+        self.watcher = DirectoryWatcher(self.directories, use_inotify=use_inotify)
+        self.metrics = IngestMetrics()
+        self.metrics_port = Config.WATCH_METRICS_PORT if metrics_port is None else metrics_port
+        self.include_existing = include_existing
+        self.on_result = on_result
+        self.server = None
+        self._first_seen: Dict[str, List[float]] = {}
+        self._stop = threading.Event()
+    
+    def start(self):
+        """Arranca workers, watcher y endpoint HTTP"""
+        self.pool.warm()
+        self.watcher.start(include_existing=self.include_existing)
+        if self.metrics_port:
+            self.server = ThreadingHTTPServer(('127.0.0.1', self.metrics_port), _make_handler(self))
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+    
+    def step(self, timeout: float = 0.05):
+        """Una iteración: encola archivos listos y recoge resultados"""
+        for path, first_seen in self.watcher.ready():
+            # Un cambio fusionado con un envío pendiente no produce otro resultado
+            if self.pool.submit(path):
+                self._first_seen.setdefault(str(path), []).append(first_seen)
+            self.metrics.received()
+        
+        for file_path, ok, delta in self.pool.poll(timeout=timeout):
+            seen = self._first_seen.get(file_path)
+            latency = time.monotonic() - seen.pop(0) if seen else None
+            if seen == []:
+                del self._first_seen[file_path]
+            self.metrics.completed(ok, delta, latency)
+            if self.on_result is not None:
+                self.on_result(file_path, ok, delta, latency)
+        
+        self.metrics.queue_depth = sum(len(files) for files in self.pool.pending.values())
+        self.metrics.in_flight = sum(1 for w in self.pool.workers.values() if w.current)
+    
+    def run_forever(self):
+        """Bucle principal hasta ``stop()``, SIGTERM o KeyboardInterrupt"""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+        self.start()
+        try:
+            while not self._stop.is_set():
+                self.step()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def shutdown(self):
+        """Detiene watcher, workers y servidor HTTP"""
+        self.watcher.stop()
+        self.pool.shutdown()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
@@ -0,0 +1,353 @@
+"""Procesamiento distribuido: sharding por hash de ruta y ledger de trabajo compartido"""
+
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .config import Config
+from .run_stats import RunAggregate, diff_manifest, embedding_cost, source_exists
+
+# ============================================
+# SHARDING
+# ============================================
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Convierte 'i/N' en (i, N) con 0 <= i < N"""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError(f"Shard inválido '{value}', se espera i/N (p. ej. 0/4)")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Shard fuera de rango: {value}")
+    return index, count
+
+def document_key(file_path: Path, root: Path) -> str:
+    """Clave estable de un documento: ruta relativa al directorio de entrada.
+    
+    Es independiente del punto de montaje, así todos los nodos coinciden.
+    """
+    return file_path.relative_to(root).as_posix()
+
+def shard_of(key: str, count: int) -> int:
+    """Shard asignado a una clave de documento"""
+    digest = hashlib.sha1(key.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count
+
+def select_shard(files: Iterable[Path], root: Path, index: int, count: int) -> List[Path]:
+    """Filtra los archivos que pertenecen al shard ``index`` de ``count``"""
+    return [f for f in files if shard_of(document_key(f, root), count) == index]
+
+def default_node_id() -> str:
+    """Identificador del nodo: host y pid"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+# ============================================
+# LEDGER DE TRABAJO
+# ============================================
+
+class WorkLedger:
+    """Ledger de documentos en SQLite sobre almacenamiento compartido.
+    
+    Los nodos registran los documentos (idempotente) y toman arrendamientos
+    (leases) de uno en uno. Un lease vencido, p. ej. porque el nodo murió,
+    vuelve a estar disponible para otro nodo hasta ``max_attempts`` intentos.
+    ``run_id`` identifica la ejecución y es el mismo para todos los nodos.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS documents (
+            key TEXT PRIMARY KEY,
+            status TEXT NOT NULL DEFAULT 'pending',
+            worker TEXT,
+            lease_expires REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            updated REAL
+        )
+    """
+    
+    META_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    """
+    
+    def __init__(self, db_path: Path, lease_seconds: float = 600, max_attempts: int = 3):
+        self.db_path = Path(db_path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=60, isolation_level=None,
+                                    check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self.conn.execute(self.SCHEMA)
+            self.conn.execute(self.META_SCHEMA)
+            # El primer nodo fija el id de la ejecución; el resto lo lee
+            self.conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('run_id', ?)",
+                              (f"{time.strftime('%Y%m%d_%H%M%S')}-{uuid.uuid4().hex[:8]}",))
+            self.run_id = self.conn.execute("SELECT value FROM meta WHERE key = 'run_id'").fetchone()[0]
+    
+    def register(self, keys: Iterable[str]) -> int:
+        """Registra documentos pendientes; devuelve cuántos eran nuevos"""
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO documents (key, updated) VALUES (?, ?)",
+                ((key, now) for key in keys)
+            )
+            added = self.conn.total_changes - before
+            self.conn.execute("COMMIT")
+        return added
+    
+    def lease(self, worker: str) -> Optional[str]:
+        """Toma el siguiente documento disponible (pendiente o con lease vencido)"""
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    """SELECT key FROM documents
+                       WHERE attempts < ?
+                         AND (status = 'pending' OR (status = 'leased' AND lease_expires < ?))
+                       ORDER BY attempts, key LIMIT 1""",
+                    (self.max_attempts, now)
+                ).fetchone()
+                if row is None:
+                    self.conn.execute("COMMIT")
+                    return None
+                self.conn.execute(
+                    """UPDATE documents
+                       SET status = 'leased', worker = ?, lease_expires = ?,
+                           attempts = attempts + 1, updated = ?
+                       WHERE key = ?""",
+                    (worker, now + self.lease_seconds, now, row[0])
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return row[0]
+    
+    def renew(self, key: str, worker: str) -> bool:
+        """Extiende el lease; False si otro nodo lo ha tomado"""
+        now = time.time()
+        with self._lock:
+            cursor = self.conn.execute(
+                """UPDATE documents SET lease_expires = ?, updated = ?
+                   WHERE key = ? AND worker = ? AND status = 'leased'""",
+                (now + self.lease_seconds, now, key, worker)
+            )
+        return cursor.rowcount == 1
+    
+    def complete(self, key: str, worker: str, success: bool = True):
+        """Marca el documento como terminado (o fallido)"""
+        with self._lock:
+            self.conn.execute(
+                """UPDATE documents SET status = ?, lease_expires = NULL, updated = ?
+                   WHERE key = ? AND worker = ?""",
+                ('done' if success else 'failed', time.time(), key, worker)
+            )
+    
+    def counts(self) -> Dict[str, int]:
+        """Documentos por estado"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT status, COUNT(*) FROM documents GROUP BY status"
+            ).fetchall()
+        return dict(rows)
+    
+    def heartbeat(self, key: str, worker: str) -> 'LeaseHeartbeat':
+        """Renueva el lease en segundo plano mientras se procesa el documento"""
+        return LeaseHeartbeat(self, key, worker)
+    
+    def close(self):
+        self.conn.close()
+
+class LeaseHeartbeat:
+    """Hilo que renueva un lease cada tercio de su duración"""
+    
+    def __init__(self, ledger: WorkLedger, key: str, worker: str):
+        self.ledger = ledger
+        self.key = key
+        self.worker = worker
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+    
+    def _run(self):
+        interval = max(1.0, self.ledger.lease_seconds / 3)
+        while not self._stop.wait(interval):
+            if not self.ledger.renew(self.key, self.worker):
+                break
+    
+    def __enter__(self):
+        self._thread.start()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+
+# ============================================
+# MANIFIESTO COMPARTIDO
+# ============================================
+
+class SharedManifest:
+    """Manifiesto de chunks compartido por los nodos del modo coordinado (SQLite).
+    
+    En modo ledger un documento puede procesarlo un nodo distinto en cada
+    ejecución, así que no hay manifiesto por nodo: cada nodo compara y
+    actualiza solo los documentos que procesó, en una transacción. Un
+    documento cuyo origen ya no existe lo elimina (y lo cuenta) un solo nodo.
+    """
+    
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS documents (
+               document_id TEXT PRIMARY KEY,
+               source TEXT NOT NULL,
+               content_sha256 TEXT,
+               encoding TEXT,
+               entry TEXT NOT NULL
+           )""",
+        "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+    )
+    
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=60, isolation_level=None)
+        for statement in self.SCHEMA:
+            self.conn.execute(statement)
+    
+    def encodings(self) -> Dict[str, str]:
+        """Encodings detectados por hash de contenido (caché de ``decode_text``)"""
+        rows = self.conn.execute(
+            "SELECT content_sha256, encoding FROM documents WHERE content_sha256 IS NOT NULL"
+        ).fetchall()
+        return dict(rows)
+    
+    def _previous(self, document_ids: List[str], root: Optional[Path]) -> Dict:
+        """Manifiesto anterior limitado a estos documentos y a los que ya no tienen origen"""
+        meta = dict(self.conn.execute("SELECT key, value FROM meta").fetchall())
+        if not meta:
+            return {}
+        
+        wanted = set(document_ids)
+        wanted.update(document_id for document_id, source in
+                      self.conn.execute("SELECT document_id, source FROM documents")
+                      if not source_exists(source, root))
+        documents = {}
+        wanted = sorted(wanted)
+        for start in range(0, len(wanted), 500):
+            batch = wanted[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT document_id, entry FROM documents WHERE document_id IN ({','.join('?' * len(batch))})",
+                batch
+            )
+            documents.update((document_id, json.loads(entry)) for document_id, entry in rows)
+        
+        return {
+            'generated': meta.get('generated'),
+            'embedding_model': meta.get('embedding_model'),
+            'vector_dimensions': int(meta['vector_dimensions']) if meta.get('vector_dimensions') else None,
+            'documents': documents
+        }
+    
+    def update(self, documents: Dict[str, Dict], root: Optional[Path] = None) -> Dict:
+        """Compara los documentos de este nodo con el manifiesto y lo actualiza; devuelve el diff.
+        
+        ``root`` es el directorio de entrada tal como lo monta este nodo: los
+        orígenes se guardan relativos a él.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            previous = self._previous(list(documents), root)
+            manifest, diff = diff_manifest(previous, documents, root)
+            
+            if diff['model_changed']:
+                self.conn.execute("DELETE FROM documents")
+            removed = set(previous.get('documents', {})) - set(manifest['documents'])
+            self.conn.executemany("DELETE FROM documents WHERE document_id = ?", ((d,) for d in removed))
+            self.conn.executemany(
+                """INSERT OR REPLACE INTO documents (document_id, source, content_sha256, encoding, entry)
+                   VALUES (?, ?, ?, ?, ?)""",
+                ((document_id, entry['source'], entry.get('content_sha256'), entry.get('encoding'),
+                  json.dumps(entry, separators=(',', ':')))
+                 for document_id, entry in documents.items())
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (('generated', manifest['generated']), ('embedding_model', Config.EMBEDDING_MODEL),
+                 ('vector_dimensions', str(Config.EMBEDDING_DIMENSIONS)))
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return diff
+    
+    def close(self):
+        self.conn.close()
+
+# ============================================
+# REPORTES
+# ============================================
+
+def merge_reports(report_paths: Iterable[Path]) -> Dict:
+    """Combina los reportes de varios shards/nodos en un único reporte"""
+    statistics: Dict = {}
+    reingestion: Dict = {}
+    aggregate = RunAggregate()
+    elapsed = 0.0
+    shards = []
+    
+    for report_path in report_paths:
+        with open(report_path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        
+        for key, value in report.get('statistics', {}).items():
+            if key in ('total_size_mb', 'success_rate'):
+                continue
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                statistics[key] = statistics.get(key, 0) + value
+        
+        # Cada documento se compara una sola vez (manifiesto por shard o compartido en
+        # modo ledger): los diffs de los nodos se suman sin duplicarse
+        for key, value in (report.get('reingestion') or {}).items():
+            if isinstance(value, int) and not isinstance(value, bool):
+                reingestion[key] = reingestion.get(key, 0) + value
+        aggregate.merge(report.get('aggregate') or {})
+        run = ((report.get('projection') or {}).get('throughput') or {}).get('run') or {}
+        elapsed = max(elapsed, run.get('seconds', 0.0))
+        
+        shards.append({
+            'report': str(report_path),
+            'node': report.get('node'),
+            'shard': report.get('shard'),
+            'scheduler': report.get('scheduler'),
+            'statistics': report.get('statistics')
+        })
+    
+    attempted = statistics.get('processed', 0) + statistics.get('failed', 0)
+    statistics['total_size_mb'] = statistics.get('total_size', 0) / (1024 * 1024)
+    statistics['success_rate'] = (statistics.get('processed', 0) / attempted * 100) if attempted else 0
+    
+    if reingestion:
+        reingestion['embedding_cost_usd'] = embedding_cost(reingestion.get('tokens_to_embed', 0))
+    
+    return {
+        'statistics': statistics,
+        'projection': aggregate.projection(elapsed),
+        'reingestion': reingestion or None,
+        'aggregate': aggregate.to_dict(manifest=False),
+        'shards': shards
+    }
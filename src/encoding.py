@@ -0,0 +1,111 @@
+"""Decodificación de texto: UTF-8 estricto primero y detección por muestreo solo si falla"""
+
+import codecs
+import hashlib
+import mmap
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple, Union
+
+import chardet
+
+try:
+    import charset_normalizer
+except ImportError:  # pragma: no cover - dependencia opcional
+    charset_normalizer = None
+
+try:
+    import cchardet
+except ImportError:  # pragma: no cover - dependencia opcional
+    cchardet = None
+
+# Ventanas de la muestra que se pasa al detector cuando el texto no es UTF-8
+SAMPLE_WINDOW = 8 * 1024
+SAMPLE_WINDOWS = 4
+
+# Por debajo de este tamaño un único read() es más barato que mapear el archivo
+MMAP_MIN_BYTES = 256 * 1024
+
+# UTF-32 antes que UTF-16: el BOM de UTF-32 LE empieza por el de UTF-16 LE
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16')
+)
+
+_PREFERRED_ON_TIE = 'cp1252'
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+@contextmanager
+def map_file(path: Union[str, Path]) -> Iterator[Buffer]:
+    """Vista de solo lectura del archivo completo.
+    
+    El archivo se lee una sola vez: la detección de tipo, la validación UTF-8
+    y la decodificación usan la misma vista sin copiarla. Los archivos
+    pequeños se leen con un único ``read()``; el resto se mapea en memoria.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < MMAP_MIN_BYTES:
+            yield f.read()
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            yield view
+
+def sample(data: Buffer, position: int = 0) -> bytes:
+    """Inicio, ventana alrededor de ``position`` (primer byte inválido) y ventanas repartidas"""
+    size = len(data)
+    if size <= SAMPLE_WINDOW * (SAMPLE_WINDOWS + 1):
+        return bytes(data)
+    starts = {0, max(0, position - SAMPLE_WINDOW // 2)}
+    starts.update(size * i // SAMPLE_WINDOWS for i in range(1, SAMPLE_WINDOWS))
+    return b"\n".join(bytes(data[start:start + SAMPLE_WINDOW]) for start in sorted(starts))
+
+def detect_sample_encoding(data: bytes) -> Optional[str]:
+    """Encoding de una muestra: charset-normalizer, cchardet o chardet (el primero instalado)"""
+    if charset_normalizer is not None:
+        matches = charset_normalizer.from_bytes(data)
+        best = matches.best()
+        if best is None:
+            return None
+        # Empate exacto (p. ej. cp1250/cp1252 en texto latino): la codificación occidental más habitual
+        for match in matches:
+            if (match.encoding == _PREFERRED_ON_TIE and match.chaos == best.chaos
+                    and match.coherence == best.coherence):
+                return match.encoding
+        return best.encoding
+    if cchardet is not None:
+        return cchardet.detect(data)['encoding']
+    return chardet.detect(data)['encoding']
+
+def decode_text(data: Buffer,
+                cache: Optional[Callable[[], Dict[str, str]]] = None) -> Tuple[str, str, Optional[str]]:
+    """Decodifica un buffer completo; devuelve (texto, encoding, hash del contenido).
+    
+    Un BOM decide el encoding. Si no hay, se intenta UTF-8 estricto; solo si
+    falla se calcula el sha256 del contenido, se busca en ``cache()`` (hash ->
+    encoding) y, si no está, se detecta sobre una muestra. El hash solo se
+    devuelve en ese caso, para guardar el encoding detectado.
+    """
+    for bom, encoding in _BOMS:
+        if data[:len(bom)] == bom:
+            return str(data, encoding, 'replace'), encoding, None
+    
+    try:
+        return str(data, 'utf-8'), 'utf-8', None
+    except UnicodeDecodeError as e:
+        position = e.start
+    
+    digest = hashlib.sha256(data).hexdigest()
+    encodings = cache() if cache is not None else {}
+    encoding = encodings.get(digest) or detect_sample_encoding(sample(data, position)) or 'utf-8'
+    try:
+        text = str(data, encoding, 'replace')
+    except LookupError:
+        encoding = 'utf-8'
+        text = str(data, encoding, 'replace')
+    encodings[digest] = encoding
+    return text, encoding, digest
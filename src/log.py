@@ -0,0 +1,138 @@
+"""Logging estructurado y no bloqueante para la CLI"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+from colorama import Fore, Style
+from tqdm import tqdm
+
+from .config import Config
+
+# Logger raíz del paquete: todos los módulos cuelgan de él
+PACKAGE_LOGGER = __name__.rpartition('.')[0] or __name__
+
+LOG_FORMATS = ('console', 'json')
+
+_LEVEL_COLORS = {
+    logging.DEBUG: Style.DIM,
+    logging.WARNING: Fore.YELLOW,
+    logging.ERROR: Fore.RED,
+    logging.CRITICAL: Fore.RED
+}
+
+# Atributos estándar de LogRecord: el resto son campos del evento
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'color', 'taskName'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+class ConsoleFormatter(logging.Formatter):
+    """Mensaje tal cual, coloreado por nivel o por el campo ``color``"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        if record.exc_info:
+            message += "\n" + self.formatException(record.exc_info)
+        color = getattr(record, 'color', None) or _LEVEL_COLORS.get(record.levelno)
+        return f"{color}{message}{Style.RESET_ALL}" if color else message
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por evento con los campos pasados en ``extra``"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage().strip()
+        }
+        payload.update({k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS})
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+class TqdmStreamHandler(logging.StreamHandler):
+    """Escribe con ``tqdm.write`` para no romper una barra de progreso activa"""
+    
+    def emit(self, record: logging.LogRecord):
+        try:
+            tqdm.write(self.format(record), file=self.stream)
+        except Exception:
+            self.handleError(record)
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Encola el registro sin formatearlo.
+    
+    La cola es en memoria dentro del proceso, así que el formateo y la E/S
+    se hacen en el hilo del listener y no en el camino caliente.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+def setup_logging(level: Optional[str] = None, log_format: Optional[str] = None, stream=None):
+    """Configura el logger del paquete con una cola y un listener en segundo plano.
+    
+    Puede llamarse de nuevo (p. ej. en un worker recién creado); reemplaza la
+    configuración anterior.
+    """
+    global _listener
+    level = (level or Config.LOG_LEVEL).upper()
+    log_format = log_format or Config.LOG_FORMAT
+    stream = stream or sys.stdout
+    
+    stop_logging()
+    
+    if log_format == 'json':
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler = TqdmStreamHandler(stream)
+        handler.setFormatter(ConsoleFormatter())
+    
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger(PACKAGE_LOGGER)
+    for old in list(logger.handlers):
+        if not isinstance(old, logging.NullHandler):
+            logger.removeHandler(old)
+    logger.addHandler(DeferredQueueHandler(log_queue))
+    logger.setLevel(level)
+    logger.propagate = False
+    
+    _listener = logging.handlers.QueueListener(log_queue, handler)
+    _listener.start()
+    return _listener
+
+def stop_logging():
+    """Vacía la cola y detiene el listener"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def progress_enabled() -> bool:
+    """La barra de progreso solo se muestra en modo consola, nivel INFO y en un terminal"""
+    return (Config.SHOW_PROGRESS
+            and Config.LOG_FORMAT == 'console'
+            and logging.getLogger(PACKAGE_LOGGER).isEnabledFor(logging.INFO)
+            and sys.stderr.isatty())
+
+def console_enabled() -> bool:
+    """Salida para personas (banner, resumen): modo consola con nivel INFO o inferior"""
+    return (Config.LOG_FORMAT == 'console'
+            and logging.getLogger(PACKAGE_LOGGER).isEnabledFor(logging.INFO))
+
+def console(*lines: str):
+    """Escribe texto para personas por la misma cola que los eventos.
+    
+    Así conserva el orden respecto a los logs; no hace nada fuera del modo consola.
+    """
+    if console_enabled():
+        logging.getLogger(f"{PACKAGE_LOGGER}.console").info("\n".join(lines))
+
+atexit.register(stop_logging)
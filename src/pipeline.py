@@ -0,0 +1,334 @@
+"""API en memoria del procesador: extracción y chunking sin efectos secundarios"""
+
+import json
+import logging
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+import tiktoken
+from bs4 import BeautifulSoup
+
+from .config import Config
+from .processors import DocumentTypeProcessor
+from .encoding import decode_text, map_file
+from .utils import clean_text
+from .aws_integration import BedrockMetadataGenerator
+
+logger = logging.getLogger(__name__)
+
+# Bytes de continuación UTF-8 (10xxxxxx): no inician un carácter
+_UTF8_CONTINUATION_BYTES = bytes(range(0x80, 0xC0))
+
+# Ruta, bytes o un objeto tipo archivo binario
+DocumentSource = Union[str, Path, bytes, bytearray, memoryview, BinaryIO]
+
+@dataclass
+class Chunk:
+    """Fragmento de un documento listo para embeddings"""
+    
+    __slots__ = ('document_id', 'chunk_index', 'text', 'token_count', 'token_start',
+                 'token_end', 'char_start', 'char_end', 'aws_service', 'doc_type')
+    
+    document_id: str
+    chunk_index: int
+    text: str
+    token_count: int
+    token_start: int
+    token_end: int
+    char_start: int
+    char_end: int
+    aws_service: str
+    doc_type: str
+    
+    def to_dict(self) -> Dict:
+        """Formato de chunk usado por los archivos de salida"""
+        return {
+            'text': self.text,
+            'chunk_index': self.chunk_index,
+            'token_count': self.token_count,
+            'start_position': self.token_start,
+            'end_position': self.token_end,
+            'char_start': self.char_start,
+            'char_end': self.char_end
+        }
+
+@dataclass
+class ProcessedDocument:
+    """Resultado completo de procesar un documento en memoria"""
+    
+    text: str
+    metadata: Dict
+    chunks: List[Chunk] = field(default_factory=list)
+
+class DocumentPipeline:
+    """Extrae, clasifica y fragmenta documentos sin tocar disco ni stdout.
+    
+    Acepta rutas, bytes u objetos tipo archivo. Los avisos de extracción se
+    emiten con ``logging`` (logger ``src``), sin handlers por defecto.
+    """
+    
+    def __init__(self, config: Optional[Config] = None, tokenizer=None):
+        self.config = config or Config()
+        self.tokenizer = tokenizer or tiktoken.get_encoding("cl100k_base")
+        self._encoded = None
+        self.encodings: Optional[Dict[str, str]] = None
+        if self.config.CHUNK_PROFILE:
+            self.load_chunk_profile(self.config.CHUNK_PROFILE)
+    
+    def load_chunk_profile(self, path: Union[str, Path]) -> Dict:
+        """Aplica un perfil de chunking generado con ``--profile``.
+        
+        Los tamaños, overlaps y search_k del perfil sustituyen a los de
+        ``Config`` solo en la configuración de esta instancia.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            profile = json.load(f)
+        
+        self.config.CHUNK_SIZES = {**self.config.CHUNK_SIZES, **profile.get('chunk_sizes', {})}
+        self.config.CHUNK_OVERLAPS = {**self.config.CHUNK_OVERLAPS, **profile.get('chunk_overlaps', {})}
+        self.config.SEARCH_K = {**self.config.SEARCH_K, **profile.get('search_k', {})}
+        return profile
+    
+    def chunk_params(self, doc_type: str) -> Tuple[int, int]:
+        """Tamaño de chunk y overlap (en tokens) para un tipo de documento"""
+        size = self.config.CHUNK_SIZES.get(doc_type, self.config.CHUNK_SIZES['default'])
+        overlap = self.config.CHUNK_OVERLAPS.get(doc_type, self.config.CHUNK_OVERLAP)
+        return size, overlap
+    
+    def encoding_cache(self) -> Dict[str, str]:
+        """Encodings detectados por hash de contenido; se cargan con el primer archivo que no es UTF-8"""
+        if self.encodings is None:
+            self.encodings = self.load_encodings()
+        return self.encodings
+    
+    def load_encodings(self) -> Dict[str, str]:
+        """Caché inicial de encodings: vacía en memoria (``DocumentProcessor`` usa el manifiesto)"""
+        return {}
+    
+    @staticmethod
+    def _resolve_source(source: DocumentSource, filename: Optional[str]) -> Tuple[Union[Path, bytes], str]:
+        """Normaliza la fuente a Path o bytes y determina su nombre"""
+        if isinstance(source, (str, Path)):
+            path = Path(source)
+            return path, filename or path.name
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return bytes(source), filename or 'document'
+        if hasattr(source, 'read'):
+            name = filename or Path(getattr(source, 'name', 'document')).name
+            return source.read(), name
+        raise TypeError(f"Fuente no soportada: {type(source).__name__}")
+    
+    def extract_raw_text(self, source: DocumentSource, filename: Optional[str] = None) -> Tuple[str, Dict]:
+        """Extrae el texto sin limpiar, con saltos de línea, títulos y tablas markdown"""
+        source, filename = self._resolve_source(source, filename)
+        in_memory = isinstance(source, bytes)
+        
+        with ExitStack() as stack:
+            # Una sola lectura: el tipo y el texto salen de la misma vista del archivo
+            view = source if in_memory else stack.enter_context(map_file(source))
+            file_type = DocumentTypeProcessor.detect_file_type(Path(filename) if in_memory else source, data=view)
+            
+            text = ""
+            metadata = {
+                'filename': filename,
+                'file_type': file_type,
+                'file_size_mb': len(view) / (1024 * 1024),
+                'extraction_date': datetime.now().isoformat()
+            }
+            
+            try:
+                if file_type == 'pdf':
+                    text, pdf_meta = DocumentTypeProcessor.extract_from_pdf(source)
+                    metadata.update(pdf_meta)
+                
+                elif file_type == 'docx':
+                    text = DocumentTypeProcessor.extract_from_docx(source)
+                
+                elif file_type in ['txt', 'md', 'html']:
+                    raw, metadata['encoding'], digest = decode_text(view, self.encoding_cache)
+                    if digest is not None:
+                        metadata['content_sha256'] = digest  # Clave del encoding detectado en el manifiesto
+                    text = BeautifulSoup(raw, 'html.parser').get_text() if file_type == 'html' else raw
+                
+                elif file_type in ['xlsx', 'csv']:
+                    text = DocumentTypeProcessor.extract_from_spreadsheet(source, file_type)
+                
+                else:
+                    logger.warning(f"  ⚠️  Tipo de archivo no soportado: {file_type}")
+                    return "", metadata
+            
+            except Exception as e:
+                logger.error(f"  ❌ Error extrayendo texto de {filename}: {e}")
+                return "", metadata
+        
+        return text, metadata
+    
+    def extract_text(self, source: DocumentSource, filename: Optional[str] = None) -> Tuple[str, Dict]:
+        """Extrae y limpia el texto de una fuente; devuelve (texto, metadata)"""
+        start = time.perf_counter()
+        text, metadata = self.extract_raw_text(source, filename)
+        if not text:
+            return "", metadata
+        
+        # Limpiar y normalizar texto
+        text = clean_text(text)
+        metadata['text_length'] = len(text)
+        extracted = time.perf_counter()
+        metadata['token_count'] = len(self.encode(text))
+        
+        # Segundos por etapa (throughput del reporte)
+        metadata['stage_timings'] = {'extract': extracted - start, 'tokenize': time.perf_counter() - extracted}
+        return text, metadata
+    
+    def encode(self, text: str):
+        """Tokeniza el texto una sola vez por documento.
+        
+        Devuelve un array compacto de uint32 que comparten la metadata, el
+        chunking y el reporte; se reutiliza mientras el texto sea el mismo.
+        """
+        if self._encoded is not None:
+            cached_text, cached_tokens = self._encoded
+            if cached_text is text or cached_text == text:
+                return cached_tokens
+        
+        tokens = self.tokenizer.encode_to_numpy(text, disallowed_special=())
+        self._encoded = (text, tokens)
+        return tokens
+    
+    def release_encoding(self):
+        """Libera los tokens del documento actual"""
+        self._encoded = None
+    
+    def identify_aws_service(self, text: str, filename: str) -> str:
+        """Identifica el servicio AWS del documento"""
+        text_lower = text.lower()
+        filename_lower = filename.lower()
+        
+        for service in self.config.AWS_SERVICES:
+            if service in filename_lower or service in text_lower[:1000]:
+                return service
+        
+        return 'general'
+    
+    def identify_doc_type(self, text: str, filename: str) -> str:
+        """Identifica el tipo de documento"""
+        patterns = {
+            'api_reference': ['api reference', 'api documentation', 'method', 'endpoint'],
+            'user_guide': ['user guide', 'getting started', 'how to', 'tutorial'],
+            'troubleshooting': ['troubleshooting', 'error', 'problem', 'issue', 'solution'],
+            'best_practices': ['best practice', 'recommendation', 'optimization'],
+            'tutorial': ['tutorial', 'example', 'walkthrough', 'step-by-step']
+        }
+        
+        text_lower = text.lower()[:2000]  # Check first 2000 chars
+        
+        for doc_type, keywords in patterns.items():
+            if any(keyword in text_lower for keyword in keywords):
+                return doc_type
+        
+        return 'general'
+    
+    def iter_text_chunks(self, text: str, doc_type: str, document_id: str = '',
+                         aws_service: str = 'general') -> Iterator[Chunk]:
+        """Genera los chunks del texto de forma perezosa.
+        
+        Cada chunk se decodifica solo cuando se consume. Los offsets en
+        caracteres se calculan avanzando un cursor que decodifica a bytes
+        cada tramo de tokens una sola vez.
+        """
+        chunk_size, overlap = self.chunk_params(doc_type)
+        step = chunk_size - overlap
+        
+        # Tokenizar (reutiliza la codificación hecha en extract_text)
+        tokens = self.encode(text)
+        total = len(tokens)
+        cursor = {'position': 0, 'chars': 0}
+        
+        def char_offset(position: int) -> int:
+            segment = self.tokenizer.decode_bytes(tokens[cursor['position']:position].tolist())
+            cursor['chars'] += len(segment.translate(None, _UTF8_CONTINUATION_BYTES))
+            cursor['position'] = position
+            return cursor['chars']
+        
+        start_char = 0
+        for index, start in enumerate(range(0, total, step)):
+            end = min(start + chunk_size, total)
+            next_start = start + step
+            
+            # El cursor solo avanza: el inicio del siguiente chunk puede caer
+            # antes del final de este (overlap)
+            if next_start < end:
+                next_start_char = char_offset(next_start)
+                end_char = char_offset(end)
+            else:
+                end_char = char_offset(end)
+                next_start_char = char_offset(next_start) if next_start < total else end_char
+            
+            chunk_tokens = tokens[start:end]
+            yield Chunk(
+                document_id=document_id,
+                chunk_index=index,
+                text=self.tokenizer.decode(chunk_tokens.tolist()),
+                token_count=len(chunk_tokens),
+                token_start=start,
+                token_end=end,
+                char_start=start_char,
+                char_end=end_char,
+                aws_service=aws_service,
+                doc_type=doc_type
+            )
+            start_char = next_start_char
+    
+    def chunk_text(self, text: str, doc_type: str) -> List[Dict]:
+        """Divide texto en chunks optimizados"""
+        return [chunk.to_dict() for chunk in self.iter_text_chunks(text, doc_type)]
+    
+    def iter_chunks(self, source: DocumentSource, filename: Optional[str] = None,
+                    doc_type: Optional[str] = None) -> Iterator[Chunk]:
+        """Extrae una fuente y genera sus chunks de forma perezosa"""
+        text, metadata = self.extract_text(source, filename)
+        if not text:
+            return
+        
+        filename = metadata['filename']
+        service = self.identify_aws_service(text, filename)
+        doc_type = doc_type or self.identify_doc_type(text, filename)
+        try:
+            yield from self.iter_text_chunks(text, doc_type, Path(filename).stem, service)
+        finally:
+            self.release_encoding()
+    
+    def process(self, source: DocumentSource, filename: Optional[str] = None) -> ProcessedDocument:
+        """Procesa una fuente completa en memoria.
+        
+        Si no se pudo extraer texto, el documento devuelto no tiene chunks.
+        """
+        text, metadata = self.extract_text(source, filename)
+        if not text:
+            return ProcessedDocument(text, metadata)
+        
+        filename = metadata['filename']
+        metadata['aws_service'] = self.identify_aws_service(text, filename)
+        metadata['doc_type'] = self.identify_doc_type(text, filename)
+        metadata['chunk_size'], metadata['chunk_overlap'] = self.chunk_params(metadata['doc_type'])
+        metadata['search_k'] = self.config.SEARCH_K.get(metadata['doc_type'], self.config.SEARCH_K['default'])
+        
+        start = time.perf_counter()
+        chunks = list(self.iter_text_chunks(
+            text, metadata['doc_type'], Path(filename).stem, metadata['aws_service']
+        ))
+        metadata['stage_timings']['chunk'] = time.perf_counter() - start
+        self.release_encoding()
+        return ProcessedDocument(text, metadata, chunks)
+    
+    def process_bytes(self, data: bytes, filename: str) -> ProcessedDocument:
+        """Procesa un documento en memoria; ``filename`` orienta la detección de tipo"""
+        return self.process(data, filename)
+    
+    def create_metadata_json(self, doc_metadata: Dict, chunks: List[Dict]) -> Dict:
+        """Crea metadata JSON completo para el documento"""
+        return BedrockMetadataGenerator.create_metadata_json(doc_metadata, chunks)
@@ -12,7 +12,9 @@ import json
 import hashlib
 import shutil
 import argparse
+import logging
 import subprocess
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
@@ -32,6 +34,7 @@ def install_dependencies():
         'boto3',
         'PyPDF2',
         'pdfplumber',
+        'pypdfium2',
         'python-docx',
         'markdown',
         'beautifulsoup4',
@@ -62,12 +65,11 @@ try:
     import markdown
     from bs4 import BeautifulSoup
     from tqdm import tqdm
-    from colorama import Fore, Style, init
+    from colorama import Fore, Style
     import pandas as pd
     import tiktoken
     import magic
     import chardet
-    init(autoreset=True)
 except ImportError:
     install_dependencies()
     # Reimportar después de instalar
@@ -77,212 +79,200 @@ except ImportError:
     import markdown
     from bs4 import BeautifulSoup
     from tqdm import tqdm
-    from colorama import Fore, Style, init
+    from colorama import Fore, Style
     import pandas as pd
     import tiktoken
     import magic
     import chardet
-    init(autoreset=True)
 
 # Importar módulos internos
 from .config import Config
-from .processors import DocumentTypeProcessor
-from .utils import clean_text, table_to_markdown, detect_encoding
-from .aws_integration import S3UploadGenerator, BedrockMetadataGenerator
+from .pipeline import DocumentPipeline
+from .aws_integration import S3UploadGenerator
+from .chunk_store import ChunkStoreWriter, CHUNK_STORE_FORMATS, chunk_store_parts, merge_chunk_store
+from .artifacts import (BLOB_LINK_MODES, UPLOAD_COMPRESSIONS, BlobStore, write_text,
+                        write_upload_document)
+from .scheduler import WorkerPool, plan_work
+from .daemon import IngestDaemon
+from .distributed import (SharedManifest, WorkLedger, default_node_id, document_key, merge_reports,
+                          parse_shard, select_shard)
+from .tables import TABLE_FORMATS
+from .profiler import profile_corpus, write_chunk_profile
+from .run_stats import RunAggregate, diff_manifest, load_manifest, write_manifest
+from .log import LOG_FORMATS, console, console_enabled, progress_enabled, setup_logging
+from .utils import format_size
+
+# Con ``python -m src.process_docs`` __name__ es '__main__': colgar del logger del paquete
+logger = logging.getLogger(f"{__package__ or 'src'}.process_docs")
 
 # ============================================
 # PROCESADOR DE DOCUMENTOS
 # ============================================
 
-class DocumentProcessor:
-    """Procesador principal de documentos"""
+class DocumentProcessor(DocumentPipeline):
+    """Procesador principal de documentos.
+    
+    Consumidor de ``DocumentPipeline`` que escribe las carpetas de salida,
+    muestra el progreso y genera el reporte.
+    """
     
     def __init__(self):
-        self.config = Config()
+        super().__init__()
         self.stats = {
             'processed': 0,
             'failed': 0,
             'total_size': 0,
-            'total_chunks': 0
+            'total_chunks': 0,
+            'total_tokens': 0
         }
+        self.chunk_store = None
+        self.chunk_store_name = "chunks"
+        self.scheduler_stats = None
+        self.node_id = None
+        self.run_id = None
+        self.shard = None
+        self.ledger_path = None
+        self.input_root: Optional[Path] = None
+        self.ledger_stats = None
+        self.aggregate = RunAggregate()
+        self.started = datetime.now()
+        self.blob_store = None
+        if self.config.BLOB_STORE:
+            self.blob_store = BlobStore(self.config.OUTPUT_BASE / "blobs", self.config.BLOB_LINK_MODE)
         self.setup_directories()
-        self.tokenizer = tiktoken.get_encoding("cl100k_base")
-        
+    
     def setup_directories(self):
         """Crea estructura de directorios"""
-        print(f"{Fore.CYAN}📁 Creando estructura de directorios...{Style.RESET_ALL}")
+        logger.debug("📁 Creando estructura de directorios...")
         
         for folder, description in self.config.STRUCTURE.items():
             path = self.config.OUTPUT_BASE / folder
             path.mkdir(parents=True, exist_ok=True)
-            print(f"  ✅ {folder}/ - {description}")
+            logger.debug("  ✅ %s/ - %s", folder, description)
         
         # Crear subdirectorios por servicio
         for service in self.config.AWS_SERVICES:
             service_path = self.config.OUTPUT_BASE / "02_structured" / service
             service_path.mkdir(exist_ok=True)
         
-        print(f"\n{Fore.GREEN}✅ Estructura creada en: {self.config.OUTPUT_BASE}{Style.RESET_ALL}\n")
-    
-    def extract_text(self, file_path: Path) -> Tuple[str, Dict]:
-        """Extrae texto de cualquier tipo de documento"""
-        file_type = DocumentTypeProcessor.detect_file_type(file_path)
-        text = ""
-        metadata = {
-            'filename': file_path.name,
-            'file_type': file_type,
-            'file_size_mb': file_path.stat().st_size / (1024 * 1024),
-            'extraction_date': datetime.now().isoformat()
-        }
-        
-        try:
-            if file_type == 'pdf':
-                text, pdf_meta = DocumentTypeProcessor.extract_from_pdf(file_path)
-                metadata.update(pdf_meta)
-                
-            elif file_type == 'docx':
-                text = DocumentTypeProcessor.extract_from_docx(file_path)
-                
-            elif file_type in ['txt', 'md']:
-                with open(file_path, 'r', encoding=detect_encoding(file_path)) as f:
-                    text = f.read()
-                    
-            elif file_type == 'html':
-                with open(file_path, 'r', encoding=detect_encoding(file_path)) as f:
-                    soup = BeautifulSoup(f.read(), 'html.parser')
-                    text = soup.get_text()
-                    
-            elif file_type in ['xlsx', 'csv']:
-                text = DocumentTypeProcessor.extract_from_spreadsheet(file_path)
-                
-            else:
-                print(f"  ⚠️  Tipo de archivo no soportado: {file_type}")
-                return "", metadata
-                
-        except Exception as e:
-            print(f"  ❌ Error extrayendo texto de {file_path.name}: {e}")
-            return "", metadata
-        
-        # Limpiar y normalizar texto
-        text = clean_text(text)
-        metadata['text_length'] = len(text)
-        metadata['token_count'] = len(self.tokenizer.encode(text, disallowed_special=()))
-        
-        return text, metadata
+        logger.debug("✅ Estructura creada en: %s", self.config.OUTPUT_BASE)
     
-    def identify_aws_service(self, text: str, filename: str) -> str:
-        """Identifica el servicio AWS del documento"""
-        text_lower = text.lower()
-        filename_lower = filename.lower()
-        
-        for service in self.config.AWS_SERVICES:
-            if service in filename_lower or service in text_lower[:1000]:
-                return service
-        
-        return 'general'
-    
-    def identify_doc_type(self, text: str, filename: str) -> str:
-        """Identifica el tipo de documento"""
-        patterns = {
-            'api_reference': ['api reference', 'api documentation', 'method', 'endpoint'],
-            'user_guide': ['user guide', 'getting started', 'how to', 'tutorial'],
-            'troubleshooting': ['troubleshooting', 'error', 'problem', 'issue', 'solution'],
-            'best_practices': ['best practice', 'recommendation', 'optimization'],
-            'tutorial': ['tutorial', 'example', 'walkthrough', 'step-by-step']
-        }
-        
-        text_lower = text.lower()[:2000]  # Check first 2000 chars
-        
-        for doc_type, keywords in patterns.items():
-            if any(keyword in text_lower for keyword in keywords):
-                return doc_type
-        
-        return 'general'
+    def get_chunk_store(self) -> Optional[ChunkStoreWriter]:
+        """Abre el chunk store columnar la primera vez que se necesita"""
+        store_format = self.config.CHUNK_STORE_FORMAT
+        if not store_format:
+            return None
+        
+        if self.chunk_store is None:
+            store_path = self.config.OUTPUT_BASE / "04_chunks" / f"{self.chunk_store_name}{CHUNK_STORE_FORMATS[store_format]}"
+            self.chunk_store = ChunkStoreWriter(
+                store_path,
+                format=store_format,
+                row_group_size=self.config.CHUNK_STORE_ROW_GROUP_SIZE
+            )
+        return self.chunk_store
     
-    def chunk_text(self, text: str, doc_type: str) -> List[Dict]:
-        """Divide texto en chunks optimizados"""
-        chunk_size = self.config.CHUNK_SIZES.get(doc_type, self.config.CHUNK_SIZES['default'])
-        overlap = self.config.CHUNK_OVERLAP
-        
-        # Tokenizar
-        tokens = self.tokenizer.encode(text, disallowed_special=())
-        chunks = []
-        
-        for i in range(0, len(tokens), chunk_size - overlap):
-            chunk_tokens = tokens[i:i + chunk_size]
-            chunk_text = self.tokenizer.decode(chunk_tokens)
-            
-            # Crear metadata para cada chunk
-            chunk_data = {
-                'text': chunk_text,
-                'chunk_index': len(chunks),
-                'token_count': len(chunk_tokens),
-                'start_position': i,
-                'end_position': min(i + chunk_size, len(tokens))
-            }
-            chunks.append(chunk_data)
-        
-        return chunks
-    
-    def create_metadata_json(self, doc_metadata: Dict, chunks: List[Dict]) -> Dict:
-        """Crea metadata JSON completo para el documento"""
-        return BedrockMetadataGenerator.create_metadata_json(doc_metadata, chunks)
+    def close_chunk_store(self):
+        """Cierra el chunk store, volcando el último row group"""
+        if self.chunk_store is not None:
+            self.chunk_store.close()
+            logger.info("🗃️  Chunk store: %s (%d chunks)", self.chunk_store.path, self.chunk_store.rows_written,
+                        extra={'event': 'chunk_store_closed', 'path': str(self.chunk_store.path),
+                               'chunks': self.chunk_store.rows_written})
+            self.chunk_store = None
+    
+    def clear_chunk_store_parts(self):
+        """Borra las partes de workers que dejó una ejecución anterior (p. ej. interrumpida)"""
+        if self.config.CHUNK_STORE_FORMAT:
+            for part in chunk_store_parts(self.config.OUTPUT_BASE / "04_chunks", self.config.CHUNK_STORE_FORMAT):
+                part.unlink()
+    
+    def merge_chunk_store_parts(self):
+        """Une las partes escritas por los workers en un único chunk store"""
+        store_format = self.config.CHUNK_STORE_FORMAT
+        if not store_format:
+            return
+        directory = self.config.OUTPUT_BASE / "04_chunks"
+        parts = chunk_store_parts(directory, store_format)
+        if not parts:
+            return
+        path = directory / f"{self.chunk_store_name}{CHUNK_STORE_FORMATS[store_format]}"
+        rows = merge_chunk_store(parts, path, store_format, self.config.CHUNK_STORE_ROW_GROUP_SIZE)
+        logger.info("🗃️  Chunk store: %s (%d chunks de %d workers)", path, rows, len(parts),
+                    extra={'event': 'chunk_store_closed', 'path': str(path), 'chunks': rows})
+    
+    def sweep_blobs(self):
+        """Elimina los blobs que ya no tienen vistas (documentos cambiados o reprocesados)"""
+        if self.blob_store is None:
+            return
+        views = [self.config.OUTPUT_BASE / name for name in ("01_processed", "02_structured", "04_chunks")]
+        swept = self.blob_store.sweep(views, self.config.BLOB_SWEEP_GRACE_SECONDS)
+        if swept['blobs_removed']:
+            logger.info("🧹 Blob store: %d blobs sin vistas eliminados (%s)", swept['blobs_removed'],
+                        format_size(swept['bytes_freed']), extra={'event': 'blobs_swept', **swept})
+    
+    def write_view(self, path: Path, text: str):
+        """Escribe un texto de salida como enlace al blob store (o archivo normal si está desactivado)"""
+        if self.blob_store is not None:
+            self.blob_store.write(path, text)
+        else:
+            write_text(path, text)
     
     def process_document(self, file_path: Path) -> bool:
         """Procesa un documento completo"""
-        print(f"\n{Fore.YELLOW}📄 Procesando: {file_path.name}{Style.RESET_ALL}")
-        print(f"   Tamaño: {file_path.stat().st_size / (1024*1024):.2f} MB")
+        # Un solo evento INFO por documento; el detalle va a DEBUG
+        size = file_path.stat().st_size
+        logger.debug("📄 Procesando: %s (%.2f MB)", file_path.name, size / (1024*1024))
         
         # Verificar tamaño
-        if file_path.stat().st_size > self.config.MAX_FILE_SIZE_MB * 1024 * 1024:
-            print(f"   ⚠️  Archivo muy grande (>{self.config.MAX_FILE_SIZE_MB}MB)")
-            # Continuar de todos modos
+        if size > self.config.MAX_FILE_SIZE_MB * 1024 * 1024:
+            logger.warning("⚠️  %s: archivo muy grande (>%sMB)", file_path.name, self.config.MAX_FILE_SIZE_MB,
+                           extra={'event': 'large_file', 'file': str(file_path), 'size_bytes': size})
+            # Continuar de todos modos (process_files_parallel los envía a un carril dedicado)
         
-        # Extraer texto y metadata
-        text, metadata = self.extract_text(file_path)
+        # Extraer, clasificar y fragmentar en memoria
+        document = self.process(file_path)
+        text, metadata = document.text, document.metadata
         
         if not text:
-            print(f"   ❌ No se pudo extraer texto")
+            logger.error("❌ %s: no se pudo extraer texto", file_path.name,
+                         extra={'event': 'document_failed', 'file': str(file_path)})
             self.stats['failed'] += 1
             return False
         
-        print(f"   ✅ Texto extraído: {len(text)} caracteres, {metadata.get('token_count', 0)} tokens")
-        
-        # Identificar servicio y tipo
-        service = self.identify_aws_service(text, file_path.name)
-        doc_type = self.identify_doc_type(text, file_path.name)
-        
-        metadata['aws_service'] = service
-        metadata['doc_type'] = doc_type
-        
-        print(f"   📁 Servicio: {service} | Tipo: {doc_type}")
-        
-        # Crear chunks
-        chunks = self.chunk_text(text, doc_type)
-        print(f"   ✂️  Dividido en {len(chunks)} chunks")
+        service = metadata['aws_service']
+        doc_type = metadata['doc_type']
+        chunks = [chunk.to_dict() for chunk in document.chunks]
         
         # Guardar archivos procesados
+        write_start = time.perf_counter()
         base_name = file_path.stem
-        safe_name = re.sub(r'', '_', base_name)
+        safe_name = re.sub(r'[^\w\-]', '_', base_name)
         
         # 1. Guardar texto completo procesado
         processed_path = self.config.OUTPUT_BASE / "01_processed" / f"{safe_name}_processed.txt"
-        with open(processed_path, 'w', encoding='utf-8') as f:
-            f.write(text)
+        self.write_view(processed_path, text)
         
-        # 2. Guardar en carpeta de servicio
+        # 2. Guardar en carpeta de servicio (mismo blob que 01_processed)
         service_path = self.config.OUTPUT_BASE / "02_structured" / service / f"{safe_name}.txt"
-        with open(service_path, 'w', encoding='utf-8') as f:
-            f.write(text)
+        service_path.parent.mkdir(exist_ok=True)  # 'general' no está en AWS_SERVICES
+        self.write_view(service_path, text)
         
         # 3. Guardar chunks
         chunks_dir = self.config.OUTPUT_BASE / "04_chunks" / safe_name
         chunks_dir.mkdir(exist_ok=True)
         
         for i, chunk in enumerate(chunks):
-            chunk_path = chunks_dir / f"chunk_{i:04d}.txt"
-            with open(chunk_path, 'w', encoding='utf-8') as f:
-                f.write(chunk['text'])
+            self.write_view(chunks_dir / f"chunk_{i:04d}.txt", chunk['text'])
+        # Chunks sobrantes de una versión anterior más larga (mantendrían vivos sus blobs)
+        for stale in chunks_dir.glob("chunk_*.txt"):
+            if stale.stem[6:].isdigit() and int(stale.stem[6:]) >= len(chunks):
+                stale.unlink()
+        
+        # Añadir al chunk store columnar (opcional)
+        chunk_store = self.get_chunk_store()
+        if chunk_store is not None:
+            chunk_store.add_document(safe_name, metadata, chunks)
         
         # 4. Guardar metadata
         full_metadata = self.create_metadata_json(metadata, chunks)
@@ -295,46 +285,156 @@ class DocumentProcessor:
         s3_ready_dir.mkdir(parents=True, exist_ok=True)
         
         # Crear archivo consolidado con metadata embebida
-        s3_doc = {
-            'content': text,
-            'metadata': metadata,
-            'chunks': [{'index': c['chunk_index'], 'text': c['text']} for c in chunks]
-        }
-        
-        s3_path = s3_ready_dir / f"{safe_name}.json"
-        with open(s3_path, 'w', encoding='utf-8') as f:
-            json.dump(s3_doc, f, indent=2)
+        s3_path = write_upload_document(s3_ready_dir, safe_name, text, metadata, chunks,
+                                        compression=self.config.UPLOAD_COMPRESSION)
+        upload_bytes = s3_path.stat().st_size
+        
+        # Agregados del reporte: tokens, histogramas, throughput y manifiesto
+        timings = metadata['stage_timings']
+        self.aggregate.add_timing('extract', timings['extract'], size)
+        self.aggregate.add_timing('tokenize', timings['tokenize'], metadata.get('token_count', 0))
+        self.aggregate.add_timing('chunk', timings['chunk'], sum(c['token_count'] for c in chunks))
+        self.aggregate.add_timing('write', time.perf_counter() - write_start, upload_bytes)
+        document_id = self.document_id(file_path)
+        self.aggregate.add_document(document_id, document_id, metadata, chunks, upload_bytes)
         
         # Actualizar estadísticas
         self.stats['processed'] += 1
-        self.stats['total_size'] += file_path.stat().st_size
+        self.stats['total_size'] += size
         self.stats['total_chunks'] += len(chunks)
+        self.stats['total_tokens'] += metadata.get('token_count', 0)
         
-        print(f"   {Fore.GREEN}✅ Procesamiento completado{Style.RESET_ALL}")
+        logger.info("✅ %s: %d caracteres, %d tokens, %s/%s, %d chunks", file_path.name, len(text),
+                    metadata.get('token_count', 0), service, doc_type, len(chunks),
+                    extra={'event': 'document_processed', 'file': str(file_path), 'size_bytes': size,
+                           'chars': len(text), 'tokens': metadata.get('token_count', 0),
+                           'aws_service': service, 'doc_type': doc_type, 'chunks': len(chunks)})
         return True
     
-    def process_directory(self, directory_path: Path):
-        """Procesa todos los documentos en un directorio"""
-        # Encontrar todos los archivos
-        supported_extensions = ['.pdf', '.docx', '.txt', '.md', '.html', '.xlsx', '.csv']
-        files = []
+    def document_id(self, file_path: Path) -> str:
+        """Clave del documento en el manifiesto: ruta relativa al directorio de entrada.
+        
+        Es la misma en todos los nodos aunque monten la entrada en rutas
+        distintas (ver ``document_key``). Sin directorio de entrada (un solo
+        archivo) es la ruta absoluta.
+        """
+        if self.input_root is not None:
+            try:
+                return document_key(file_path, self.input_root)
+            except ValueError:
+                pass
+        return str(file_path.resolve())
+    
+    def manifest_path(self) -> Path:
+        """Manifiesto de chunks de la salida (uno por shard en modo distribuido).
         
-        for ext in supported_extensions:
+        El nombre no depende del nodo: el mismo shard encuentra su manifiesto
+        aunque lo procese otra máquina u otro pid.
+        """
+        suffix = f"_shard{self.shard['index']}-of-{self.shard['count']}" if self.shard else ""
+        return self.config.OUTPUT_BASE / f"chunk_manifest{suffix}.json"
+    
+    def shared_manifest_path(self) -> Path:
+        """Manifiesto compartido del modo ledger, junto al ledger (almacenamiento común)"""
+        return self.ledger_path.parent / "chunk_manifest.db"
+    
+    def encoding_cache_path(self) -> Path:
+        """Caché de encodings de la salida (hash de contenido → encoding), una por shard"""
+        suffix = f"_shard{self.shard['index']}-of-{self.shard['count']}" if self.shard else ""
+        return self.config.OUTPUT_BASE / f"encoding_cache{suffix}.json"
+    
+    def load_encodings(self) -> Dict[str, str]:
+        """Encodings detectados en ejecuciones anteriores, por hash de contenido.
+        
+        La clave es el contenido, no la ruta: sirve la caché de cualquier shard
+        de la salida y, en modo ledger, el manifiesto compartido. Solo la carga
+        el proceso principal; los workers reciben el diccionario ya cargado.
+        """
+        encodings = {}
+        for path in sorted(self.config.OUTPUT_BASE.glob("encoding_cache*.json")):
+            encodings.update(load_manifest(path))
+        if self.ledger_path is not None and self.shared_manifest_path().exists():
+            shared = SharedManifest(self.shared_manifest_path())
+            try:
+                encodings.update(shared.encodings())
+            finally:
+                shared.close()
+        return encodings
+    
+    def merge_delta(self, delta: Dict):
+        """Suma el delta de un documento procesado en un worker"""
+        for key, value in delta.items():
+            if key == 'aggregate':
+                self.aggregate.merge(value)
+                # Los workers que se arranquen después ya no vuelven a detectarlos
+                if self.encodings is not None:
+                    self.encodings.update((entry['content_sha256'], entry['encoding'])
+                                          for entry in value.get('manifest', {}).values()
+                                          if 'content_sha256' in entry)
+            else:
+                self.stats[key] = self.stats.get(key, 0) + value
+    
+    @staticmethod
+    def find_documents(directory_path: Path) -> List[Path]:
+        """Documentos con extensión soportada bajo un directorio"""
+        files = []
+        for ext in Config.SUPPORTED_EXTENSIONS:
             files.extend(directory_path.glob(f'**/*{ext}'))
+        return files
+    
+    def process_directory(self, directory_path: Path, shard: Optional[Tuple[int, int]] = None,
+                          ledger_path: Optional[Path] = None):
+        """Procesa todos los documentos en un directorio.
+        
+        Con ``shard=(i, N)`` solo se procesan los archivos cuyo hash de ruta
+        corresponde al shard i. Con ``ledger_path`` los documentos se toman
+        de un ledger compartido entre nodos (modo coordinado), uno a uno: cada
+        nodo es un proceso, así que no admite ``MAX_WORKERS`` > 1.
+        """
+        if ledger_path is not None and self.config.MAX_WORKERS > 1:
+            raise ValueError("El modo ledger procesa un documento a la vez por nodo: "
+                             "lanza varios nodos sobre el mismo ledger en lugar de usar workers")
+        
+        # Encontrar todos los archivos
+        self.input_root = directory_path
+        files = self.find_documents(directory_path)
         
         if not files:
-            print(f"{Fore.RED}❌ No se encontraron archivos soportados en {directory_path}{Style.RESET_ALL}")
+            logger.error("❌ No se encontraron archivos soportados en %s", directory_path)
+            return
+        
+        if shard is not None or ledger_path is not None:
+            self.node_id = self.node_id or default_node_id()
+        
+        if shard is not None:
+            files = select_shard(files, directory_path, *shard)
+            self.shard = {'index': shard[0], 'count': shard[1]}
+            logger.info("🧩 Shard %d/%d: %d documentos", shard[0], shard[1], len(files),
+                        extra={'color': Fore.CYAN})
+        
+        logger.info("📚 Encontrados %d documentos para procesar", len(files),
+                    extra={'event': 'run_started', 'documents': len(files), 'color': Fore.CYAN})
+        
+        if ledger_path is not None:
+            self.ledger_path = ledger_path
+            self.process_files_from_ledger(directory_path, files, ledger_path)
+            self.generate_report()
             return
         
-        print(f"\n{Fore.CYAN}📚 Encontrados {len(files)} documentos para procesar{Style.RESET_ALL}")
+        if self.config.MAX_WORKERS > 1:
+            self.process_files_parallel(files)
+            self.generate_report()
+            return
         
         # Procesar cada archivo con barra de progreso
-        with tqdm(total=len(files), desc="Procesando documentos", unit="doc") as pbar:
+        with tqdm(total=len(files), desc="Procesando documentos", unit="doc",
+                  disable=not progress_enabled()) as pbar:
             for file_path in files:
                 try:
                     self.process_document(file_path)
                 except Exception as e:
-                    print(f"\n   ❌ Error procesando {file_path.name}: {e}")
+                    logger.error("❌ Error procesando %s: %s", file_path.name, e,
+                                 extra={'event': 'document_failed', 'file': str(file_path)})
                     self.stats['failed'] += 1
                 finally:
                     pbar.update(1)
@@ -342,9 +442,136 @@ class DocumentProcessor:
         # Generar reporte
         self.generate_report()
     
+    def process_files_from_ledger(self, directory_path: Path, files: List[Path], ledger_path: Path):
+        """Procesa documentos arrendados de un ledger compartido hasta agotarlo"""
+        ledger = WorkLedger(ledger_path, self.config.LEDGER_LEASE_SECONDS, self.config.LEDGER_MAX_ATTEMPTS)
+        self.run_id = self.run_id or ledger.run_id
+        added = ledger.register(document_key(f, directory_path) for f in files)
+        logger.info("📒 Ledger %s: %d documentos nuevos registrados (nodo %s)", ledger_path, added, self.node_id,
+                    extra={'event': 'ledger_registered', 'ledger': str(ledger_path), 'documents': added,
+                           'node': self.node_id, 'color': Fore.CYAN})
+        
+        try:
+            with tqdm(desc="Procesando documentos", unit="doc", disable=not progress_enabled()) as pbar:
+                while True:
+                    key = ledger.lease(self.node_id)
+                    if key is None:
+                        break
+                    
+                    file_path = directory_path / key
+                    try:
+                        with ledger.heartbeat(key, self.node_id):
+                            success = self.process_document(file_path)
+                    except Exception as e:
+                        logger.error("❌ Error procesando %s: %s", file_path.name, e,
+                                     extra={'event': 'document_failed', 'file': str(file_path)})
+                        self.stats['failed'] += 1
+                        success = False
+                    
+                    ledger.complete(key, self.node_id, success)
+                    pbar.update(1)
+            
+            self.ledger_stats = ledger.counts()
+        finally:
+            ledger.close()
+    
+    def watch_directory(self, directory_path: Path, include_existing: bool = False,
+                        metrics_port: Optional[int] = None):
+        """Modo daemon: procesa los documentos que aparecen en el directorio.
+        
+        Mantiene los workers calientes y genera el reporte al detenerse (Ctrl+C).
+        """
+        last_sweep = time.monotonic()
+        
+        def on_result(file_path, ok, delta, latency):
+            nonlocal last_sweep
+            self.merge_delta(delta)
+            # Un documento modificado deja blobs sin vistas: limpiar periódicamente
+            if time.monotonic() - last_sweep >= self.config.BLOB_SWEEP_INTERVAL:
+                self.sweep_blobs()
+                last_sweep = time.monotonic()
+            took = f" en {latency:.2f}s" if latency is not None else ""
+            logger.log(logging.INFO if ok else logging.ERROR, "%s %s%s", "✅" if ok else "❌",
+                       Path(file_path).name, took,
+                       extra={'event': 'document_ready', 'file': str(file_path), 'ok': ok,
+                              'latency_seconds': latency, 'color': Fore.GREEN if ok else None})
+        
+        self.input_root = directory_path
+        daemon = IngestDaemon([directory_path], self.config.MAX_WORKERS, metrics_port,
+                              include_existing, on_result, input_root=directory_path,
+                              encodings=self.encoding_cache())
+        logger.info("👀 Vigilando %s (%s, %d worker/s). Ctrl+C para detener.", directory_path,
+                    daemon.watcher.backend, self.config.MAX_WORKERS,
+                    extra={'event': 'watch_started', 'directory': str(directory_path),
+                           'watcher_backend': daemon.watcher.backend, 'color': Fore.CYAN})
+        if daemon.metrics_port:
+            logger.info("📈 Métricas: http://127.0.0.1:%d/metrics", daemon.metrics_port)
+        
+        # El chunk store lo escriben los workers (una parte por worker que se une al final)
+        self.close_chunk_store()
+        self.clear_chunk_store_parts()
+        daemon.run_forever()
+        self.merge_chunk_store_parts()
+        self.generate_report()
+    
+    def process_files_parallel(self, files: List[Path]):
+        """Procesa archivos en workers con límite de memoria.
+        
+        Los archivos se ordenan por coste estimado; los que superan
+        MAX_FILE_SIZE_MB van a un carril dedicado de baja concurrencia.
+        """
+        regular, large = plan_work(files)
+        if large:
+            logger.info("🐘 %d archivos grandes (>%sMB) en carril dedicado (%d worker/s)", len(large),
+                        self.config.MAX_FILE_SIZE_MB, self.config.LARGE_FILE_WORKERS,
+                        extra={'event': 'large_file_lane', 'documents': len(large), 'color': Fore.YELLOW})
+        
+        # El chunk store lo escriben los workers (una parte por worker que se une al final)
+        self.close_chunk_store()
+        self.clear_chunk_store_parts()
+        pool = WorkerPool(self.config.MAX_WORKERS, self.config.LARGE_FILE_WORKERS, self.input_root,
+                          self.encoding_cache())
+        
+        with tqdm(total=len(files), desc="Procesando documentos", unit="doc",
+                  disable=not progress_enabled()) as pbar:
+            def on_result(file_path, ok, delta):
+                self.merge_delta(delta)
+                pbar.update(1)
+            
+            pool.run(regular, large, on_result)
+        self.merge_chunk_store_parts()
+        
+        self.scheduler_stats = {
+            'workers': self.config.MAX_WORKERS,
+            'large_file_workers': self.config.LARGE_FILE_WORKERS,
+            'large_files': len(large),
+            'workers_recycled': pool.recycled,
+            'peak_workers_rss_mb': pool.peak_rss / (1024 * 1024)
+        }
+    
     def generate_report(self):
         """Genera reporte de procesamiento"""
-        report_path = self.config.OUTPUT_BASE / "logs" / f"processing_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        self.close_chunk_store()
+        self.sweep_blobs()
+        
+        suffix = f"_{self.node_id}" if self.node_id else ""
+        report_path = self.config.OUTPUT_BASE / "logs" / f"processing_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}{suffix}.json"
+        
+        # Diff de chunks contra el manifiesto de la ejecución anterior: lo que costará re-ingestar
+        if self.ledger_path is not None:
+            shared = SharedManifest(self.shared_manifest_path())
+            try:
+                reingestion = shared.update(self.aggregate.manifest, self.input_root)
+            finally:
+                shared.close()
+        else:
+            manifest_path = self.manifest_path()
+            manifest, reingestion = diff_manifest(load_manifest(manifest_path), self.aggregate.manifest,
+                                                  self.input_root)
+            write_manifest(manifest, manifest_path)
+        if self.encodings:
+            write_manifest(self.encodings, self.encoding_cache_path())
+        projection = self.aggregate.projection((datetime.now() - self.started).total_seconds())
         
         report = {
             'timestamp': datetime.now().isoformat(),
@@ -353,6 +580,14 @@ class DocumentProcessor:
                 'total_size_mb': self.stats['total_size'] / (1024 * 1024),
                 'success_rate': (self.stats['processed'] / (self.stats['processed'] + self.stats['failed']) * 100) if (self.stats['processed'] + self.stats['failed']) > 0 else 0
             },
+            'scheduler': self.scheduler_stats,
+            'node': self.node_id,
+            'run_id': self.run_id,
+            'shard': self.shard,
+            'ledger': self.ledger_stats,
+            'projection': projection,
+            'reingestion': reingestion,
+            'aggregate': self.aggregate.to_dict(manifest=False),
             'output_location': str(self.config.OUTPUT_BASE),
             'next_steps': [
                 f"1. Revisar documentos procesados en: {self.config.OUTPUT_BASE / '01_processed'}",
@@ -365,28 +600,122 @@ class DocumentProcessor:
         with open(report_path, 'w') as f:
             json.dump(report, f, indent=2)
         
-        # Imprimir resumen
-        print(f"\n{Fore.CYAN}{'='*60}{Style.RESET_ALL}")
-        print(f"{Fore.GREEN}📊 RESUMEN DE PROCESAMIENTO{Style.RESET_ALL}")
-        print(f"{Fore.CYAN}{'='*60}{Style.RESET_ALL}")
-        print(f"✅ Documentos procesados: {self.stats['processed']}")
-        print(f"❌ Documentos fallidos: {self.stats['failed']}")
-        print(f"📦 Tamaño total procesado: {self.stats['total_size'] / (1024*1024):.2f} MB")
-        print(f"✂️  Total de chunks creados: {self.stats['total_chunks']}")
-        print(f"📁 Salida guardada en: {self.config.OUTPUT_BASE}")
-        print(f"📋 Reporte completo: {report_path}")
-        print(f"{Fore.CYAN}{'='*60}{Style.RESET_ALL}")
-        
         # Script para subir a S3
         S3UploadGenerator.generate_s3_upload_script(self.config.OUTPUT_BASE)
-        print(f"\n📜 Script de subida a S3 creado: {self.config.OUTPUT_BASE / 'upload_to_s3.sh'}")
+        
+        # Resumen: cuadro en consola, un único evento estructurado en JSON
+        if not console_enabled():
+            logger.info("📊 Resumen de procesamiento", extra={
+                'event': 'run_summary', 'report': str(report_path), **report['statistics'],
+                'embedded_tokens': projection['totals']['embedded_tokens'],
+                'vector_mb': projection['totals']['vector_mb'],
+                'tokens_to_embed': reingestion['tokens_to_embed']
+            })
+            return
+        
+        console(
+            f"\n{Fore.CYAN}{'='*60}{Style.RESET_ALL}",
+            f"{Fore.GREEN}📊 RESUMEN DE PROCESAMIENTO{Style.RESET_ALL}",
+            f"{Fore.CYAN}{'='*60}{Style.RESET_ALL}",
+            f"✅ Documentos procesados: {self.stats['processed']}",
+            f"❌ Documentos fallidos: {self.stats['failed']}",
+            f"📦 Tamaño total procesado: {self.stats['total_size'] / (1024*1024):.2f} MB",
+            f"✂️  Total de chunks creados: {self.stats['total_chunks']}",
+            f"🔤 Total de tokens: {self.stats['total_tokens']}",
+            f"🧮 Tokens a embeber: {projection['totals']['embedded_tokens']} "
+            f"(~{projection['totals']['embedding_cost_usd']} USD), vectores: {projection['totals']['vector_mb']} MB",
+            f"🔁 Re-ingesta: +{reingestion['chunks_added']} ~{reingestion['chunks_changed']} "
+            f"-{reingestion['chunks_removed']} chunks, {reingestion['tokens_to_embed']} tokens",
+            f"📁 Salida guardada en: {self.config.OUTPUT_BASE}",
+            f"📋 Reporte completo: {report_path}",
+            f"{Fore.CYAN}{'='*60}{Style.RESET_ALL}",
+            f"\n📜 Script de subida a S3 creado: {self.config.OUTPUT_BASE / 'upload_to_s3.sh'}"
+        )
 
 # ============================================
 # FUNCIÓN PRINCIPAL
 # ============================================
 
+def merge_report_directory(logs_dir: Path, run_id: Optional[str] = None) -> Path:
+    """Combina los reportes por nodo/shard de una ejecución en uno solo.
+    
+    Solo entran los reportes con ``run_id``; sin indicarlo, los de la
+    ejecución del reporte por nodo más reciente.
+    """
+    reports = []
+    for report_path in sorted(logs_dir.glob("processing_report_*.json")):
+        if report_path.stem.endswith("_merged"):
+            continue
+        with open(report_path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        if report.get('node') or report.get('shard'):
+            reports.append((report.get('timestamp', ''), report.get('run_id'), report_path))
+    
+    if not reports:
+        logger.error("❌ No se encontraron reportes por nodo en %s", logs_dir)
+        sys.exit(1)
+    
+    if run_id is None:
+        run_id = max(reports, key=lambda report: report[0])[1]
+        if run_id is None:
+            logger.error("❌ El reporte más reciente de %s no tiene run id: indica la ejecución con --run-id",
+                         logs_dir)
+            sys.exit(1)
+    report_paths = [path for _, report_run, path in reports if report_run == run_id]
+    if not report_paths:
+        logger.error("❌ No hay reportes de la ejecución %s en %s", run_id, logs_dir)
+        sys.exit(1)
+    
+    merged = {
+        'timestamp': datetime.now().isoformat(),
+        'run_id': run_id,
+        **merge_reports(report_paths)
+    }
+    merged_path = logs_dir / f"processing_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}_merged.json"
+    with open(merged_path, 'w') as f:
+        json.dump(merged, f, indent=2)
+    
+    stats = merged['statistics']
+    logger.info("📊 %d reportes de la ejecución %s combinados: %d procesados, %d fallidos, %d chunks → %s",
+                len(report_paths), run_id, stats.get('processed', 0), stats.get('failed', 0),
+                stats.get('total_chunks', 0), merged_path,
+                extra={'event': 'reports_merged', 'run_id': run_id, 'reports': len(report_paths),
+                       'report': str(merged_path), 'color': Fore.GREEN})
+    return merged_path
+
+def profile_directory(directory_path: Path, output_path: Optional[Path] = None,
+                      sample_size: Optional[int] = None) -> Path:
+    """Perfila una muestra del corpus y guarda el perfil de chunking recomendado"""
+    files = DocumentProcessor.find_documents(directory_path)
+    if not files:
+        logger.error("❌ No se encontraron archivos soportados en %s", directory_path)
+        sys.exit(1)
+    
+    profile = profile_corpus(files, sample_size)
+    output_path = write_chunk_profile(profile, output_path or Config.OUTPUT_BASE / "chunk_profile.json")
+    
+    for doc_type, stats in profile['doc_types'].items():
+        current = stats['projection']['current']
+        recommended = stats['projection']['recommended']
+        logger.info("📐 %s: %d documentos → chunk %d (overlap %d, k=%d) | chunks %d → %d | vectores %.1f → %.1f MB",
+                    doc_type, stats['documents'], recommended['chunk_size'], recommended['chunk_overlap'],
+                    stats['recommendation']['search_k'], current['chunks'], recommended['chunks'],
+                    current['vector_mb'], recommended['vector_mb'],
+                    extra={'event': 'profile_doc_type', 'doc_type': doc_type, **stats['recommendation']})
+    
+    corpus = profile['corpus']
+    logger.info("📐 Perfil de %d/%d documentos guardado en %s (usar con --chunk-profile)",
+                corpus['profiled'], corpus['documents'], output_path,
+                extra={'event': 'profile_written', 'profile': str(output_path),
+                       'projection': profile['projection'], 'color': Fore.GREEN})
+    return output_path
+
 def main():
     """Función principal"""
+    # Solo la CLI envuelve stdout: importar el módulo no debe tener efectos
+    from colorama import init
+    init(autoreset=True)
+    
     parser = argparse.ArgumentParser(
         description='📚 Procesador de Documentos para AWS Bedrock Knowledge Base',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -395,6 +724,11 @@ Ejemplos de uso:
   %(prog)s /path/to/document.pdf           # Procesar un archivo
   %(prog)s /path/to/documents/folder       # Procesar carpeta
   %(prog)s ~/Downloads/aws-docs            # Procesar directorio
+  %(prog)s /shared/docs --shard 0/4 --run-id 2024-06-01  # Procesar el shard 0 de 4
+  %(prog)s /shared/docs --ledger /shared/ledger.sqlite   # Nodo en modo coordinado
+  %(prog)s /shared/out/logs --merge-reports              # Combinar los reportes de la última ejecución
+  %(prog)s ~/aws-docs --profile                          # Recomendar chunking para el corpus
+  %(prog)s ~/aws-docs --chunk-profile chunk_profile.json # Procesar con el perfil recomendado
         """
     )
     
@@ -411,10 +745,161 @@ Ejemplos de uso:
         help='Directorio de salida personalizado (default: ~/Documents/AWS_Knowledge_Base)'
     )
     
+    parser.add_argument(
+        '--chunk-store',
+        choices=sorted(CHUNK_STORE_FORMATS),
+        default=None,
+        help='Escribe además todos los chunks en un archivo columnar (requiere pyarrow)'
+    )
+    
+    parser.add_argument(
+        '--table-format',
+        choices=TABLE_FORMATS,
+        default=None,
+        help='Formato de las tablas extraídas: markdown o compact (CSV, menos tokens) (default: markdown)'
+    )
+    
+    parser.add_argument(
+        '--compress',
+        choices=[c for c in UPLOAD_COMPRESSIONS if c],
+        default=None,
+        help='Comprime los documentos de 05_ready_to_upload (zstd requiere zstandard)'
+    )
+    
+    parser.add_argument(
+        '--blob-link',
+        choices=BLOB_LINK_MODES + ('none',),
+        default=None,
+        help='Cómo enlazan 01_processed, 02_structured y 04_chunks al blob store; none lo desactiva (default: hardlink)'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Procesos worker en paralelo para directorios (default: 1, secuencial)'
+    )
+    
+    parser.add_argument(
+        '--shard',
+        type=str,
+        default=None,
+        help='Procesar solo el shard i/N del directorio (por hash de ruta)'
+    )
+    
+    parser.add_argument(
+        '--ledger',
+        type=str,
+        default=None,
+        help='Ledger SQLite compartido: los nodos toman documentos por lease (modo coordinado)'
+    )
+    
+    parser.add_argument(
+        '--run-id',
+        type=str,
+        default=None,
+        help='Identificador de la ejecución distribuida, igual en todos los nodos (obligatorio con --shard; '
+             'con --ledger, por defecto el del ledger). Con --merge-reports, la ejecución a combinar '
+             '(default: la más reciente)'
+    )
+    
+    parser.add_argument(
+        '--node-id',
+        type=str,
+        default=None,
+        help='Identificador del nodo en reportes y ledger (default: host-pid)'
+    )
+    
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Modo daemon: vigilar el directorio y procesar los documentos nuevos o modificados'
+    )
+    
+    parser.add_argument(
+        '--process-existing',
+        action='store_true',
+        help='Con --watch, procesar también los documentos ya presentes al arrancar'
+    )
+    
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        default=None,
+        help=f'Con --watch, puerto HTTP local para /metrics, /status y /healthz (default: {Config.WATCH_METRICS_PORT}, 0 = desactivado)'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Perfilar una muestra del directorio y guardar tamaños de chunk/overlap recomendados por tipo'
+    )
+    
+    parser.add_argument(
+        '--profile-sample',
+        type=int,
+        default=None,
+        help=f'Documentos a muestrear con --profile (default: {Config.PROFILE_SAMPLE_SIZE})'
+    )
+    
+    parser.add_argument(
+        '--profile-output',
+        type=str,
+        default=None,
+        help='Archivo del perfil generado (default: <output>/chunk_profile.json)'
+    )
+    
+    parser.add_argument(
+        '--chunk-profile',
+        type=str,
+        default=None,
+        help='Aplicar un perfil de chunking generado con --profile'
+    )
+    
+    parser.add_argument(
+        '--log-level',
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+        default=None,
+        help=f'Nivel de log (default: {Config.LOG_LEVEL}; DEBUG muestra el detalle por documento)'
+    )
+    
+    parser.add_argument(
+        '--log-format',
+        choices=LOG_FORMATS,
+        default=None,
+        help='Formato de log: consola o una línea JSON por evento (default: console)'
+    )
+    
+    parser.add_argument(
+        '-q', '--quiet',
+        action='store_true',
+        help='Solo avisos y errores: sin banner, barra de progreso ni resumen'
+    )
+    
+    parser.add_argument(
+        '--merge-reports',
+        action='store_true',
+        help='Combinar los reportes por nodo/shard del directorio de logs indicado en path'
+    )
+    
     args = parser.parse_args()
+    if args.ledger and args.workers and args.workers > 1:
+        parser.error("--ledger procesa un documento a la vez por nodo: lanza varios nodos sobre el "
+                     "mismo ledger en lugar de usar --workers")
+    if args.shard and not args.run_id and not args.merge_reports:
+        parser.error("--shard requiere --run-id (el mismo en todos los nodos) para combinar sus reportes")
+    
+    # Logging en segundo plano (los workers heredan la configuración)
+    if args.log_level:
+        Config.LOG_LEVEL = args.log_level
+    if args.quiet:
+        Config.LOG_LEVEL = "WARNING"
+    if args.log_format:
+        Config.LOG_FORMAT = args.log_format
+    setup_logging()
     
     # Banner
-    print(f"""
+    console(f"""
 {Fore.CYAN}╔══════════════════════════════════════════════════════════╗
 ║     📚 AWS Knowledge Base Document Processor v1.0        ║
 ║              Powered by THAÄROS System                   ║
@@ -425,32 +910,75 @@ Ejemplos de uso:
     path = Path(args.path).expanduser().resolve()
     
     if not path.exists():
-        print(f"{Fore.RED}❌ Error: La ruta no existe: {path}{Style.RESET_ALL}")
+        logger.error("❌ Error: La ruta no existe: %s", path)
         sys.exit(1)
     
     # Configurar output personalizado si se proporciona
     if args.output:
         Config.OUTPUT_BASE = Path(args.output).expanduser().resolve()
     
+    if args.chunk_store:
+        Config.CHUNK_STORE_FORMAT = args.chunk_store
+    
+    if args.table_format:
+        Config.TABLE_FORMAT = args.table_format
+    
+    if args.compress:
+        Config.UPLOAD_COMPRESSION = args.compress
+    
+    if args.blob_link == 'none':
+        Config.BLOB_STORE = False
+    elif args.blob_link:
+        Config.BLOB_STORE = True
+        Config.BLOB_LINK_MODE = args.blob_link
+    
+    if args.workers:
+        Config.MAX_WORKERS = args.workers
+    
+    if args.chunk_profile:
+        Config.CHUNK_PROFILE = Path(args.chunk_profile).expanduser().resolve()
+    
+    if args.merge_reports:
+        merge_report_directory(path, args.run_id)
+        return
+    
+    if args.profile:
+        output_path = Path(args.profile_output).expanduser().resolve() if args.profile_output else None
+        profile_directory(path, output_path, args.profile_sample)
+        return
+    
+    try:
+        shard = parse_shard(args.shard) if args.shard else None
+    except ValueError as e:
+        logger.error("❌ Error: %s", e)
+        sys.exit(1)
+    
     # Crear procesador
     processor = DocumentProcessor()
+    processor.node_id = args.node_id
+    processor.run_id = args.run_id
     
     # Procesar
     if path.is_file():
         success = processor.process_document(path)
         if success:
             processor.generate_report()
+    elif path.is_dir() and args.watch:
+        processor.watch_directory(path, args.process_existing, args.metrics_port)
     elif path.is_dir():
-        processor.process_directory(path)
+        ledger_path = Path(args.ledger).expanduser().resolve() if args.ledger else None
+        processor.process_directory(path, shard=shard, ledger_path=ledger_path)
     else:
-        print(f"{Fore.RED}❌ Error: La ruta no es un archivo ni directorio válido{Style.RESET_ALL}")
+        logger.error("❌ Error: La ruta no es un archivo ni directorio válido")
         sys.exit(1)
     
-    print(f"\n{Fore.GREEN}✨ Procesamiento completado exitosamente!{Style.RESET_ALL}")
-    print(f"\n📌 Próximos pasos:")
-    print(f"   1. Revisar documentos en: {Config.OUTPUT_BASE}")
-    print(f"   2. Ejecutar script de subida: {Config.OUTPUT_BASE}/upload_to_s3.sh")
-    print(f"   3. Configurar Bedrock Knowledge Base con el bucket S3")
+    console(
+        f"\n{Fore.GREEN}✨ Procesamiento completado exitosamente!{Style.RESET_ALL}",
+        f"\n📌 Próximos pasos:",
+        f"   1. Revisar documentos en: {Config.OUTPUT_BASE}",
+        f"   2. Ejecutar script de subida: {Config.OUTPUT_BASE}/upload_to_s3.sh",
+        f"   3. Configurar Bedrock Knowledge Base con el bucket S3"
+    )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,34 +1,327 @@
 """Procesadores de documentos específicos por tipo"""
 
+import io
+import logging
+import re
+import time
+import zipfile
+from xml.etree import ElementTree
 import PyPDF2
 import pdfplumber
-import docx
 import pandas as pd
 from bs4 import BeautifulSoup
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 import magic
 
-from .utils import detect_encoding, table_to_markdown
+try:
+    import pypdfium2 as pdfium
+    import pypdfium2.raw as pdfium_c
+except ImportError:  # pragma: no cover - backend opcional
+    pdfium = None
+
+from .config import Config
+from .tables import TableRenderer, render_table
+from .utils import ExtractionTimeout, detect_encoding, run_with_deadline, looks_like_table
+
+logger = logging.getLogger(__name__)
+
+# Un documento puede venir de disco (Path) o de memoria (bytes)
+Source = Union[Path, bytes]
+
+def as_stream(source: Source):
+    """Devuelve una ruta o un stream nuevo en memoria para la fuente"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    return source
+
+# ============================================
+# BACKENDS DE PDF
+# ============================================
+
+# pdfium no es thread-safe: si se abandona un hilo que sigue dentro de pdfium,
+# el proceso no vuelve a llamarlo (ni libera esos objetos, cuyo finalizador
+# también llama a pdfium) hasta que el worker se recicla
+_abandoned_native: List = []
+
+def pdfium_abandoned() -> bool:
+    """True si este proceso abandonó un hilo dentro de pdfium (el worker debe reciclarse)"""
+    return bool(_abandoned_native)
+
+class PdfiumBackend:
+    """Extractor rápido de texto basado en pypdfium2"""
+    
+    name = 'pypdfium2'
+    native = True
+    
+    def __init__(self, source: Source):
+        if pdfium is None:
+            raise ImportError("pypdfium2 no está instalado")
+        if _abandoned_native:
+            raise RuntimeError("pypdfium2 deshabilitado en este proceso: un hilo abandonado sigue dentro de pdfium")
+        self.pdf = pdfium.PdfDocument(str(source) if isinstance(source, Path) else source)
+    
+    def page_count(self) -> int:
+        return len(self.pdf)
+    
+    def extract_text(self, page_index: int) -> str:
+        page = self.pdf[page_index]
+        textpage = page.get_textpage()
+        try:
+            return textpage.get_text_bounded()
+        finally:
+            textpage.close()
+            page.close()
+    
+    def suggests_tables(self, page_index: int, page_text: str) -> bool:
+        """Una página con muchos trazos (líneas/rectángulos) suele contener tablas"""
+        page = self.pdf[page_index]
+        try:
+            rules = 0
+            for _ in page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_PATH]):
+                rules += 1
+                if rules >= Config.PDF_TABLE_MIN_RULES:
+                    return True
+        finally:
+            page.close()
+        return looks_like_table(page_text)
+    
+    def close(self):
+        self.pdf.close()
+
+class PdfplumberBackend:
+    """Extractor de texto y tablas basado en pdfplumber"""
+    
+    name = 'pdfplumber'
+    native = False
+    
+    def __init__(self, source: Source):
+        self.pdf = pdfplumber.open(as_stream(source))
+    
+    def page_count(self) -> int:
+        return len(self.pdf.pages)
+    
+    def extract_text(self, page_index: int) -> str:
+        page = self.pdf.pages[page_index]
+        try:
+            return page.extract_text() or ""
+        finally:
+            page.flush_cache()
+    
+    def suggests_tables(self, page_index: int, page_text: str) -> bool:
+        page = self.pdf.pages[page_index]
+        try:
+            return len(page.lines) + len(page.rects) >= Config.PDF_TABLE_MIN_RULES or looks_like_table(page_text)
+        finally:
+            page.flush_cache()
+    
+    def extract_tables(self, page_index: int) -> List[List]:
+        page = self.pdf.pages[page_index]
+        try:
+            return page.extract_tables()
+        finally:
+            # Liberar los objetos parseados de la página
+            page.flush_cache()
+    
+    def close(self):
+        self.pdf.close()
+
+class PyPDF2Backend:
+    """Extractor de último recurso basado en PyPDF2"""
+    
+    name = 'pypdf2'
+    native = False
+    
+    def __init__(self, source: Source):
+        self.file = open(source, 'rb') if isinstance(source, Path) else as_stream(source)
+        self.reader = PyPDF2.PdfReader(self.file)
+    
+    def page_count(self) -> int:
+        return len(self.reader.pages)
+    
+    def extract_text(self, page_index: int) -> str:
+        return self.reader.pages[page_index].extract_text() or ""
+    
+    def suggests_tables(self, page_index: int, page_text: str) -> bool:
+        return looks_like_table(page_text)
+    
+    def close(self):
+        self.file.close()
+
+PDF_BACKENDS = {
+    backend.name: backend
+    for backend in (PdfiumBackend, PdfplumberBackend, PyPDF2Backend)
+}
+
+# ============================================
+# DOCX EN STREAMING
+# ============================================
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+# Los nombres de estilos integrados son siempre en inglés ("heading 1")
+_HEADING_STYLE = re.compile(r'heading ([1-9])')
+
+def _outline_level(element) -> int:
+    """Nivel de esquema (1-9) de un w:outlineLvl; 0 si es texto normal"""
+    if element is None:
+        return 0
+    level = int(element.get(f'{_W}val', '9')) + 1
+    return level if level <= 9 else 0
+
+def _docx_heading_levels(archive: zipfile.ZipFile) -> Dict[str, int]:
+    """Nivel de título por styleId según word/styles.xml (con herencia basedOn)"""
+    try:
+        root = ElementTree.fromstring(archive.read('word/styles.xml'))
+    except KeyError:
+        return {}
+    
+    levels, based_on = {}, {}
+    for style in root.iter(f'{_W}style'):
+        style_id = style.get(f'{_W}styleId')
+        name = style.find(f'{_W}name')
+        name = name.get(f'{_W}val', '').lower() if name is not None else ''
+        match = _HEADING_STYLE.fullmatch(name)
+        outline = _outline_level(style.find(f'{_W}pPr/{_W}outlineLvl'))
+        if match:
+            levels[style_id] = int(match.group(1))
+        elif name == 'title':
+            levels[style_id] = 1
+        elif outline:
+            levels[style_id] = outline
+        parent = style.find(f'{_W}basedOn')
+        if parent is not None:
+            based_on[style_id] = parent.get(f'{_W}val')
+    
+    # Un estilo propio basado en un título hereda su nivel
+    for style_id in based_on:
+        current, seen = style_id, set()
+        while current not in levels and current in based_on and current not in seen:
+            seen.add(current)
+            current = based_on[current]
+        if current in levels:
+            levels.setdefault(style_id, levels[current])
+    return levels
+
+def _docx_paragraph(paragraph, heading_levels: Dict[str, int]) -> Tuple[str, int]:
+    """Texto de un w:p y su nivel de título (0 si no es título)"""
+    level = 0
+    parts = []
+    for child in paragraph:
+        if child.tag == f'{_W}pPr':
+            level = _outline_level(child.find(f'{_W}outlineLvl'))
+            style = child.find(f'{_W}pStyle')
+            if not level and style is not None:
+                level = heading_levels.get(style.get(f'{_W}val'), 0)
+            continue
+        for node in child.iter():
+            if node.tag == f'{_W}t':
+                parts.append(node.text or '')
+            elif node.tag == f'{_W}tab':
+                parts.append('\t')
+            elif node.tag in (f'{_W}br', f'{_W}cr'):
+                parts.append('\n')
+    return ''.join(parts).strip(), level
+
+def iter_docx_blocks(source: Source) -> Iterator[str]:
+    """Recorre word/document.xml con iterparse y genera los bloques en orden.
+    
+    Párrafos tal cual, títulos como markdown (``#``) y tablas (ver
+    ``Config.TABLE_FORMAT``) en su posición original. Las celdas combinadas (gridSpan/vMerge) se
+    emiten una sola vez. Cada elemento se libera tras procesarlo, así la
+    memoria no crece con el tamaño del documento.
+    """
+    with zipfile.ZipFile(as_stream(source)) as archive:
+        heading_levels = _docx_heading_levels(archive)
+        
+        with archive.open('word/document.xml') as xml:
+            body = None
+            depth = 0
+            tables = []  # Pila de tablas abiertas (puede haber tablas anidadas)
+            
+            for event, elem in ElementTree.iterparse(xml, events=('start', 'end')):
+                tag = elem.tag
+                if event == 'start':
+                    depth += 1
+                    if tag == f'{_W}body':
+                        body = elem
+                    elif tag == f'{_W}tbl':
+                        tables.append({'rows': [], 'row': None, 'cell': None})
+                    elif tag == f'{_W}tr' and tables:
+                        tables[-1]['row'] = []
+                    elif tag == f'{_W}tc' and tables:
+                        tables[-1]['cell'] = {'parts': [], 'span': 1, 'continued': False}
+                    continue
+                
+                depth -= 1
+                table = tables[-1] if tables else None
+                
+                if tag == f'{_W}p':
+                    text, level = _docx_paragraph(elem, heading_levels)
+                    # Limpiar también evita repetir párrafos anidados (cuadros de texto)
+                    elem.clear()
+                    if text and table is not None and table['cell'] is not None:
+                        table['cell']['parts'].append(text)
+                    elif text:
+                        yield f"{'#' * min(level, 6)} {text}" if level else text
+                
+                elif tag == f'{_W}tcPr' and table is not None and table['cell'] is not None:
+                    span = elem.find(f'{_W}gridSpan')
+                    merge = elem.find(f'{_W}vMerge')
+                    if span is not None:
+                        table['cell']['span'] = int(span.get(f'{_W}val', '1'))
+                    # vMerge sin valor (o 'continue') prolonga la celda de arriba
+                    if merge is not None and merge.get(f'{_W}val', 'continue') == 'continue':
+                        table['cell']['continued'] = True
+                
+                elif tag == f'{_W}tc' and table is not None:
+                    cell = table['cell']
+                    text = '' if cell['continued'] else ' '.join(cell['parts'])
+                    table['row'].extend([text] + [''] * (cell['span'] - 1))
+                    table['cell'] = None
+                    elem.clear()
+                
+                elif tag == f'{_W}tr' and table is not None:
+                    if any(table['row']):
+                        table['rows'].append(table['row'])
+                    table['row'] = None
+                    elem.clear()
+                
+                elif tag == f'{_W}tbl':
+                    table = tables.pop()
+                    elem.clear()
+                    if table['rows'] and tables and tables[-1]['cell'] is not None:
+                        # Tabla anidada: se aplana dentro de la celda que la contiene
+                        tables[-1]['cell']['parts'].extend(' '.join(row) for row in table['rows'])
+                    elif table['rows']:
+                        yield render_table(table['rows'])
+                
+                # Hijo directo de w:body terminado: ya no se necesita nada anterior
+                if depth == 2 and body is not None:
+                    body.clear()
 
 class DocumentTypeProcessor:
     """Clase base para procesadores de tipos de documentos"""
     
     @staticmethod
-    def detect_file_type(file_path: Path) -> str:
-        """Detecta el tipo de archivo"""
+    def detect_file_type(file_path: Path, data: Optional[bytes] = None) -> str:
+        """Detecta el tipo de archivo (por contenido si se pasa ``data``)"""
         try:
             mime = magic.Magic(mime=True)
-            file_type = mime.from_file(str(file_path))
+            if data is not None:
+                file_type = mime.from_buffer(bytes(data[:8192]))
+            else:
+                file_type = mime.from_file(str(file_path))
             
+            # 'text' al final: text/html, text/csv o text/markdown también lo contienen
             type_mapping = {
                 'pdf': 'pdf',
                 'word': 'docx',
-                'text': 'txt',
                 'markdown': 'md',
                 'html': 'html',
                 'excel': 'xlsx',
-                'csv': 'csv'
+                'csv': 'csv',
+                'text': 'txt'
             }
             
             for key, value in type_mapping.items():
@@ -41,88 +334,168 @@ class DocumentTypeProcessor:
             return file_path.suffix.lower().strip('.')
     
     @staticmethod
-    def extract_from_pdf(file_path: Path) -> Tuple[str, Dict]:
-        """Extrae texto de PDF con pdfplumber para mejor manejo de tablas"""
-        text_parts = []
-        metadata = {'pages': 0, 'has_tables': False}
+    def extract_from_pdf(file_path: Source) -> Tuple[str, Dict]:
+        """Extrae texto de PDF página a página con una cadena de backends.
+        
+        El primer backend de ``Config.PDF_BACKENDS`` extrae el texto; si una
+        página falla o excede ``Config.PDF_PAGE_TIMEOUT`` se reintenta con el
+        siguiente. Un backend que excede el plazo queda abandonado (su hilo
+        no se puede interrumpir) y no se usa en el resto del documento; si es
+        pypdfium2, tampoco en el resto del proceso (ver ``pdfium_abandoned``).
+        Las tablas se extraen con pdfplumber solo en las páginas cuyo layout
+        sugiere una tabla.
+        """
+        chain = Config.PDF_BACKENDS
+        timeout = Config.PDF_PAGE_TIMEOUT
+        metadata = {
+            'pages': 0,
+            'has_tables': False,
+            'pdf_backend_timings': {},
+            'pdf_page_backends': {},
+            'pdf_failed_pages': []
+        }
+        timings = metadata['pdf_backend_timings']
+        # Una tabla partida entre páginas solo repite su cabecera una vez
+        tables_renderer = TableRenderer()
+        last_table_page = None
+        opened = {}
+        unavailable = set()
+        
+        def abandon(name):
+            """Descarta un backend cuyo hilo sigue ocupado (no se cierra bajo sus pies)"""
+            backend = opened.pop(name, None)
+            unavailable.add(name)
+            if PDF_BACKENDS[name].native:
+                _abandoned_native.append(backend)
+                logger.warning(f"    ⚠️  {name} deshabilitado en este proceso hasta reciclar el worker")
+        
+        def read_page(backend, page_index):
+            page_text = backend.extract_text(page_index)
+            return page_text, Config.PDF_TABLE_EXTRACTION and backend.suggests_tables(page_index, page_text)
+        
+        def get_backend(name):
+            """Abre cada backend una sola vez y solo si se necesita"""
+            if name in opened:
+                return opened[name]
+            if name in unavailable or name not in PDF_BACKENDS:
+                return None
+            start = time.perf_counter()
+            try:
+                opened[name] = run_with_deadline(timeout, PDF_BACKENDS[name], file_path)
+            except Exception as e:
+                logger.warning(f"    ⚠️  Backend {name} no disponible: {e}")
+                if isinstance(e, ExtractionTimeout):
+                    abandon(name)
+                unavailable.add(name)
+                return None
+            finally:
+                timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+            return opened[name]
         
+        text_parts = []
         try:
-            with pdfplumber.open(file_path) as pdf:
-                metadata['pages'] = len(pdf.pages)
-                
-                for page_num, page in enumerate(pdf.pages, 1):
-                    # Extraer texto
-                    page_text = page.extract_text() or ""
-                    
-                    # Extraer tablas
-                    tables = page.extract_tables()
-                    if tables:
-                        metadata['has_tables'] = True
-                        for table in tables:
-                            # Convertir tabla a markdown
-                            table_md = table_to_markdown(table)
-                            page_text += f"\n\n{table_md}\n\n"
+            page_count = None
+            for name in chain:
+                backend = get_backend(name)
+                if backend is not None:
+                    page_count = backend.page_count()
+                    break
+            
+            if page_count is None:
+                logger.error("    ❌ Ningún backend pudo abrir el PDF")
+                return "", metadata
+            
+            metadata['pages'] = page_count
+            
+            for page_index in range(page_count):
+                page_text = None
+                for name in chain:
+                    backend = get_backend(name)
+                    if backend is None:
+                        continue
+                    start = time.perf_counter()
+                    try:
+                        page_text, wants_tables = run_with_deadline(timeout, read_page, backend, page_index)
+                    except Exception as e:
+                        if isinstance(e, ExtractionTimeout):
+                            abandon(name)
+                        logger.warning(f"    ⚠️  Página {page_index + 1} falló con {name}: {e}")
+                        page_text = None
+                        continue
+                    finally:
+                        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
                     
-                    text_parts.append(f"[Página {page_num}]\n{page_text}")
+                    page_backends = metadata['pdf_page_backends']
+                    page_backends[name] = page_backends.get(name, 0) + 1
+                    break
                 
-        except Exception as e:
-            print(f"    Intentando con PyPDF2: {e}")
-            # Fallback a PyPDF2
-            try:
-                with open(file_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    metadata['pages'] = len(pdf_reader.pages)
+                if page_text is None:
+                    metadata['pdf_failed_pages'].append(page_index + 1)
+                    continue
+                
+                # Extraer tablas solo en páginas candidatas
+                plumber = get_backend('pdfplumber') if wants_tables else None
+                if plumber is not None:
+                    start = time.perf_counter()
+                    try:
+                        tables = run_with_deadline(timeout, plumber.extract_tables, page_index)
+                    except Exception as e:
+                        if isinstance(e, ExtractionTimeout):
+                            abandon('pdfplumber')
+                        logger.warning(f"    ⚠️  Tablas de la página {page_index + 1} omitidas: {e}")
+                        tables = []
+                    finally:
+                        timings['pdfplumber_tables'] = (timings.get('pdfplumber_tables', 0.0)
+                                                        + time.perf_counter() - start)
                     
-                    for page_num, page in enumerate(pdf_reader.pages, 1):
-                        text_parts.append(f"[Página {page_num}]\n{page.extract_text()}")
-            except Exception as e2:
-                print(f"    ❌ Error con ambos métodos: {e2}")
-                return "", metadata
+                    for position, table in enumerate(tables):
+                        # Solo la primera tabla de la página siguiente continúa la anterior
+                        if position or last_table_page != page_index - 1:
+                            tables_renderer.break_continuity()
+                        last_table_page = page_index
+                        rendered = tables_renderer.render(table)
+                        if rendered:
+                            metadata['has_tables'] = True
+                            page_text += f"\n\n{rendered}\n\n"
+                
+                text_parts.append(f"[Página {page_index + 1}]\n{page_text}")
+        finally:
+            for backend in opened.values():
+                try:
+                    backend.close()
+                except Exception:
+                    pass
+        
+        if metadata['pdf_failed_pages']:
+            logger.warning(f"    ⚠️  Páginas sin extraer: {metadata['pdf_failed_pages']}")
         
         return "\n\n".join(text_parts), metadata
     
     @staticmethod
-    def extract_from_docx(file_path: Path) -> str:
-        """Extrae texto de Word"""
-        doc = docx.Document(file_path)
-        text_parts = []
-        
-        for paragraph in doc.paragraphs:
-            if paragraph.text.strip():
-                text_parts.append(paragraph.text)
-        
-        # Extraer texto de tablas
-        for table in doc.tables:
-            table_text = DocumentTypeProcessor.extract_table_from_docx(table)
-            text_parts.append(table_text)
-        
-        return "\n\n".join(text_parts)
+    def extract_from_docx(file_path: Source) -> str:
+        """Extrae texto de Word en orden del documento (ver ``iter_docx_blocks``)"""
+        return "\n\n".join(iter_docx_blocks(file_path))
     
     @staticmethod
     def extract_table_from_docx(table) -> str:
-        """Extrae tabla de Word como markdown"""
-        rows = []
-        for row in table.rows:
-            row_data = [cell.text.strip() for cell in row.cells]
-            rows.append(row_data)
-        
-        if not rows:
-            return ""
-        
-        # Convertir a markdown
-        return table_to_markdown(rows)
+        """Extrae una tabla de python-docx (ver ``Config.TABLE_FORMAT``)"""
+        return render_table([cell.text for cell in row.cells] for row in table.rows)
     
     @staticmethod
-    def extract_from_spreadsheet(file_path: Path) -> str:
+    def extract_from_spreadsheet(file_path: Source, file_type: Optional[str] = None) -> str:
         """Extrae texto de Excel/CSV"""
         try:
-            if file_path.suffix.lower() == '.csv':
-                df = pd.read_csv(file_path)
+            if file_type is None:
+                file_type = file_path.suffix.lower().strip('.')
+            if file_type == 'csv':
+                df = pd.read_csv(as_stream(file_path))
             else:
-                df = pd.read_excel(file_path)
+                df = pd.read_excel(as_stream(file_path))
             
-            # Convertir a markdown
-            return df.to_markdown()
+            # Cabecera + filas con el renderizador de tablas (NaN -> vacío).
+            # astype(object): con todas las columnas numéricas .values las
+            # convertiría a float64 (2 -> 2.0)
+            return render_table([list(df.columns)] + df.astype(object).values.tolist())
         except Exception as e:
-            print(f"    ❌ Error procesando spreadsheet: {e}")
+            logger.error(f"    ❌ Error procesando spreadsheet: {e}")
             return ""
\ No newline at end of file
@@ -0,0 +1,237 @@
+"""Perfilado del corpus: recomienda tamaño de chunk y overlap por tipo de documento"""
+
+import json
+import random
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .config import Config
+from .pipeline import DocumentPipeline
+from .run_stats import vector_bytes
+from .utils import clean_text
+
+# Límites del tamaño de chunk recomendado (tokens)
+MIN_CHUNK_SIZE = 256
+MAX_CHUNK_SIZE = 2048
+
+_BLOCK_SEPARATOR = re.compile(r'\n\s*\n')
+_HEADING_LINE = re.compile(r'#{1,6}\s')
+
+# ============================================
+# ESTRUCTURA DE LOS DOCUMENTOS
+# ============================================
+
+def distribution(values: List[int]) -> Dict:
+    """Resumen de una distribución: media y percentiles (rango más cercano)"""
+    if not values:
+        return {'count': 0}
+    ordered = sorted(values)
+    
+    def percentile(q: float) -> int:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    
+    return {
+        'count': len(ordered),
+        'mean': round(sum(ordered) / len(ordered), 1),
+        'p50': percentile(0.5),
+        'p75': percentile(0.75),
+        'p90': percentile(0.9),
+        'max': ordered[-1]
+    }
+
+def document_structure(raw_text: str, count_tokens: Callable[[str], int]) -> Dict[str, List[int]]:
+    """Longitudes en tokens de párrafos, secciones y tablas de un texto sin limpiar.
+    
+    Los bloques se separan por líneas en blanco; una línea ``#`` abre una
+    sección y un bloque cuyas líneas empiezan por ``|`` es una tabla markdown.
+    """
+    structure = {'paragraphs': [], 'sections': [], 'tables': [], 'table_rows': []}
+    section = None
+    
+    for block in _BLOCK_SEPARATOR.split(raw_text):
+        lines = block.strip().splitlines()
+        if lines and _HEADING_LINE.match(lines[0]):
+            if section is not None:
+                structure['sections'].append(section)
+            section = 0
+            lines = lines[1:]
+        if not lines:
+            continue
+        
+        tokens = count_tokens(clean_text("\n".join(lines)))
+        if all(line.lstrip().startswith('|') for line in lines):
+            structure['tables'].append(tokens)
+            structure['table_rows'].append(max(0, len(lines) - 2))  # Sin cabecera ni separador
+        else:
+            structure['paragraphs'].append(tokens)
+        if section is not None:
+            section += tokens
+    
+    if section is not None:
+        structure['sections'].append(section)
+    return structure
+
+# ============================================
+# RECOMENDACIÓN Y PROYECCIÓN
+# ============================================
+
+def _round_up(value: float, multiple: int) -> int:
+    return int(-(-value // multiple) * multiple)
+
+def recommend_chunking(structure: Dict[str, List[int]]) -> Dict:
+    """Tamaño de chunk, overlap y search_k a partir de la estructura medida.
+    
+    El chunk debe contener dos párrafos largos (p90), una sección típica
+    (p75) y una tabla grande (p90) completas, dentro de los límites del
+    módulo. El overlap cubre un párrafo mediano sin superar el 20% del chunk.
+    """
+    paragraphs = distribution(structure['paragraphs'])
+    sections = distribution(structure['sections'])
+    tables = distribution(structure['tables'])
+    
+    candidates = [MIN_CHUNK_SIZE]
+    if paragraphs['count']:
+        candidates.append(2 * paragraphs['p90'])
+    if sections['count'] >= 2:
+        candidates.append(sections['p75'])
+    if tables['count']:
+        candidates.append(tables['p90'])
+    chunk_size = min(MAX_CHUNK_SIZE, _round_up(max(candidates), 64))
+    
+    overlap = paragraphs['p50'] if paragraphs['count'] else Config.CHUNK_OVERLAP
+    overlap = max(32, min(_round_up(overlap, 16), chunk_size // 5 // 16 * 16))
+    
+    search_k = max(1, min(10, round(Config.RETRIEVAL_TOKEN_BUDGET / chunk_size)))
+    return {'chunk_size': chunk_size, 'chunk_overlap': overlap, 'search_k': search_k}
+
+def project_chunks(token_counts: Iterable[int], chunk_size: int, overlap: int,
+                   bytes_per_token: float, scale: float = 1.0) -> Dict:
+    """Chunks, tokens a embeber y almacenamiento para unos documentos.
+    
+    Sigue el mismo recorrido que ``DocumentPipeline.iter_text_chunks``;
+    ``scale`` extrapola de la muestra al corpus completo.
+    """
+    step = chunk_size - overlap
+    chunks = embedded = 0
+    for total in token_counts:
+        for start in range(0, total, step):
+            chunks += 1
+            embedded += min(chunk_size, total - start)
+    
+    return {
+        'chunk_size': chunk_size,
+        'chunk_overlap': overlap,
+        'chunks': round(chunks * scale),
+        'embedded_tokens': round(embedded * scale),
+        'text_mb': round(embedded * bytes_per_token * scale / (1024 * 1024), 3),
+        'vector_mb': round(vector_bytes(chunks * scale) / (1024 * 1024), 3)
+    }
+
+def _sum_projections(projections: Iterable[Dict]) -> Dict:
+    keys = ('chunks', 'embedded_tokens', 'text_mb', 'vector_mb')
+    totals = dict.fromkeys(keys, 0)
+    for projection in projections:
+        for key in keys:
+            totals[key] += projection[key]
+    totals['text_mb'] = round(totals['text_mb'], 3)
+    totals['vector_mb'] = round(totals['vector_mb'], 3)
+    return totals
+
+# ============================================
+# PERFIL DEL CORPUS
+# ============================================
+
+def profile_corpus(files: List[Path], sample_size: Optional[int] = None, seed: int = 0,
+                   pipeline: Optional[DocumentPipeline] = None) -> Dict:
+    """Muestrea el corpus, mide su estructura por doc_type y recomienda chunking.
+    
+    Devuelve el perfil listo para ``write_chunk_profile``: recomendaciones
+    (``chunk_sizes``, ``chunk_overlaps``, ``search_k``), estadísticas por tipo
+    y la proyección de chunks y almacenamiento con la configuración actual
+    y con la recomendada.
+    """
+    files = sorted(files)
+    sample_size = sample_size or Config.PROFILE_SAMPLE_SIZE
+    sample = random.Random(seed).sample(files, min(sample_size, len(files)))
+    pipeline = pipeline or DocumentPipeline()
+    
+    def count_tokens(text: str) -> int:
+        return len(pipeline.tokenizer.encode(text, disallowed_special=()))
+    
+    measured: Dict[str, Dict] = {}
+    for file_path in sample:
+        raw, metadata = pipeline.extract_raw_text(file_path)
+        text = clean_text(raw)
+        if not text:
+            continue
+        
+        doc_type = pipeline.identify_doc_type(text, metadata['filename'])
+        structure = document_structure(raw, count_tokens)
+        tokens = count_tokens(text)
+        for key in (doc_type, 'default'):
+            entry = measured.setdefault(key, {
+                'documents': [], 'bytes': 0,
+                'paragraphs': [], 'sections': [], 'tables': [], 'table_rows': []
+            })
+            entry['documents'].append(tokens)
+            entry['bytes'] += len(text.encode('utf-8'))
+            for name, values in structure.items():
+                entry[name].extend(values)
+    
+    profiled = len(measured['default']['documents']) if measured else 0
+    scale = len(files) / profiled if profiled else 0
+    
+    profile = {
+        'generated': datetime.now().isoformat(),
+        'corpus': {'documents': len(files), 'sampled': len(sample), 'profiled': profiled, 'seed': seed},
+        'chunk_sizes': {},
+        'chunk_overlaps': {},
+        'search_k': {},
+        'doc_types': {},
+        'projection': {}
+    }
+    
+    current, recommended = [], []
+    for doc_type, entry in sorted(measured.items()):
+        recommendation = recommend_chunking(entry)
+        profile['chunk_sizes'][doc_type] = recommendation['chunk_size']
+        profile['chunk_overlaps'][doc_type] = recommendation['chunk_overlap']
+        profile['search_k'][doc_type] = recommendation['search_k']
+        
+        tokens = entry['documents']
+        bytes_per_token = entry['bytes'] / max(1, sum(tokens))
+        size, overlap = pipeline.chunk_params(doc_type)
+        stats = {
+            'documents': len(tokens),
+            'document_tokens': distribution(tokens),
+            'paragraph_tokens': distribution(entry['paragraphs']),
+            'section_tokens': distribution(entry['sections']),
+            'table_tokens': distribution(entry['tables']),
+            'table_rows': distribution(entry['table_rows']),
+            'recommendation': recommendation,
+            'projection': {
+                'current': project_chunks(tokens, size, overlap, bytes_per_token, scale),
+                'recommended': project_chunks(tokens, recommendation['chunk_size'],
+                                              recommendation['chunk_overlap'], bytes_per_token, scale)
+            }
+        }
+        profile['doc_types'][doc_type] = stats
+        if doc_type != 'default':
+            current.append(stats['projection']['current'])
+            recommended.append(stats['projection']['recommended'])
+    
+    profile['projection'] = {
+        'current': _sum_projections(current),
+        'recommended': _sum_projections(recommended)
+    }
+    return profile
+
+def write_chunk_profile(profile: Dict, path: Path) -> Path:
+    """Guarda el perfil; se carga con ``--chunk-profile`` o ``Config.CHUNK_PROFILE``"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, indent=2)
+    return path
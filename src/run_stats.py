@@ -0,0 +1,267 @@
+"""Agregados de una ejecución: tokens, proyección de embeddings, throughput y manifiesto de chunks"""
+
+import hashlib
+import json
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .config import Config
+
+# Límites superiores (tokens) del histograma de tamaño de chunk; el último bucket es +Inf
+CHUNK_TOKEN_BUCKETS = (64, 128, 256, 512, 768, 1024, 1536, 2048)
+
+# Etapas medidas y la unidad de su throughput
+STAGE_UNITS = {
+    'extract': 'bytes',    # Bytes de entrada
+    'tokenize': 'tokens',  # Tokens del documento
+    'chunk': 'tokens',     # Tokens embebidos (con overlap)
+    'write': 'bytes'       # Bytes del documento de subida
+}
+
+_GROUP_COUNTERS = ('documents', 'tokens', 'chunks', 'embedded_tokens', 'upload_bytes')
+
+def vector_bytes(chunks: float) -> float:
+    """Almacenamiento de los vectores (float32) a la dimensión configurada"""
+    return chunks * Config.EMBEDDING_DIMENSIONS * 4
+
+def embedding_cost(tokens: float) -> float:
+    """Coste estimado (USD) de embeber ``tokens``"""
+    return round(tokens / 1000 * Config.EMBEDDING_PRICE_PER_1K_TOKENS, 6)
+
+def chunk_hash(text: str) -> str:
+    """Huella corta del texto de un chunk para el manifiesto"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+# ============================================
+# AGREGADOS
+# ============================================
+
+class RunAggregate:
+    """Contadores de una ejecución que se acumulan documento a documento.
+    
+    Solo guarda sumas, histogramas y una huella por chunk; ``to_dict`` y
+    ``merge`` permiten combinar los agregados de workers y nodos.
+    """
+    
+    def __init__(self):
+        self.services: Dict[str, Dict[str, Dict[str, int]]] = {}
+        self.histograms: Dict[str, List[int]] = {}
+        self.stages = {stage: {'seconds': 0.0, 'documents': 0, 'units': 0} for stage in STAGE_UNITS}
+        self.manifest: Dict[str, Dict] = {}
+    
+    def add_timing(self, stage: str, seconds: float, units: int):
+        entry = self.stages[stage]
+        entry['seconds'] += seconds
+        entry['documents'] += 1
+        entry['units'] += units
+    
+    def add_document(self, document_id: str, source: str, metadata: Dict, chunks: List[Dict],
+                     upload_bytes: int = 0):
+        """Registra un documento procesado y sus chunks"""
+        doc_type = metadata['doc_type']
+        group = self.services.setdefault(metadata['aws_service'], {}).setdefault(
+            doc_type, dict.fromkeys(_GROUP_COUNTERS, 0))
+        histogram = self.histograms.setdefault(doc_type, [0] * (len(CHUNK_TOKEN_BUCKETS) + 1))
+        
+        embedded = 0
+        for chunk in chunks:
+            embedded += chunk['token_count']
+            histogram[bisect_left(CHUNK_TOKEN_BUCKETS, chunk['token_count'])] += 1
+        
+        group['documents'] += 1
+        group['tokens'] += metadata.get('token_count', 0)
+        group['chunks'] += len(chunks)
+        group['embedded_tokens'] += embedded
+        group['upload_bytes'] += upload_bytes
+        
+        self.manifest[document_id] = {
+            'source': source,
+            'chunks': [[chunk_hash(chunk['text']), chunk['token_count']] for chunk in chunks]
+        }
+        # Encoding que hubo que detectar (no UTF-8): se reutiliza si el contenido no cambia
+        if 'content_sha256' in metadata:
+            self.manifest[document_id]['content_sha256'] = metadata['content_sha256']
+            self.manifest[document_id]['encoding'] = metadata['encoding']
+    
+    def merge(self, data: Dict):
+        """Suma los agregados serializados con ``to_dict``"""
+        for service, doc_types in data.get('services', {}).items():
+            for doc_type, counters in doc_types.items():
+                group = self.services.setdefault(service, {}).setdefault(
+                    doc_type, dict.fromkeys(_GROUP_COUNTERS, 0))
+                for key in _GROUP_COUNTERS:
+                    group[key] += counters.get(key, 0)
+        for doc_type, counts in data.get('histograms', {}).items():
+            histogram = self.histograms.setdefault(doc_type, [0] * len(counts))
+            for i, count in enumerate(counts):
+                histogram[i] += count
+        for stage, entry in data.get('stages', {}).items():
+            for key in ('seconds', 'documents', 'units'):
+                self.stages[stage][key] += entry.get(key, 0)
+        self.manifest.update(data.get('manifest', {}))
+    
+    def to_dict(self, manifest: bool = True) -> Dict:
+        data = {'services': self.services, 'histograms': self.histograms, 'stages': self.stages}
+        if manifest:
+            data['manifest'] = self.manifest
+        return data
+    
+    def drain(self) -> Dict:
+        """Devuelve los agregados acumulados y empieza de cero (delta por documento de un worker)"""
+        data = self.to_dict()
+        self.__init__()
+        return data
+    
+    def projection(self, elapsed_seconds: float = 0.0) -> Dict:
+        """Tokens por servicio y tipo, embeddings y vectores proyectados, histogramas y throughput.
+        
+        Los segundos por etapa se suman entre workers; ``elapsed_seconds`` es
+        el tiempo real de la ejecución.
+        """
+        totals = dict.fromkeys(_GROUP_COUNTERS, 0)
+        by_service = {}
+        for service, doc_types in sorted(self.services.items()):
+            service_totals = dict.fromkeys(_GROUP_COUNTERS, 0)
+            for counters in doc_types.values():
+                for key in _GROUP_COUNTERS:
+                    service_totals[key] += counters[key]
+                    totals[key] += counters[key]
+            by_service[service] = {
+                **service_totals,
+                'vector_bytes': vector_bytes(service_totals['chunks']),
+                'doc_types': {
+                    doc_type: {**counters, 'vector_bytes': vector_bytes(counters['chunks'])}
+                    for doc_type, counters in sorted(doc_types.items())
+                }
+            }
+        
+        throughput = {}
+        for stage, entry in self.stages.items():
+            seconds = entry['seconds']
+            rate = entry['units'] / seconds if seconds else 0
+            throughput[stage] = {
+                'seconds': round(seconds, 3),
+                'documents': entry['documents'],
+                'documents_per_second': round(entry['documents'] / seconds, 2) if seconds else 0
+            }
+            if STAGE_UNITS[stage] == 'bytes':
+                throughput[stage]['mb_per_second'] = round(rate / (1024 * 1024), 3)
+            else:
+                throughput[stage]['tokens_per_second'] = round(rate)
+        
+        extract = self.stages['extract']
+        throughput['run'] = {
+            'seconds': round(elapsed_seconds, 3),
+            'documents': totals['documents'],
+            'documents_per_second': round(totals['documents'] / elapsed_seconds, 2) if elapsed_seconds else 0,
+            'mb_per_second': round(extract['units'] / elapsed_seconds / (1024 * 1024), 3) if elapsed_seconds else 0
+        }
+        
+        return {
+            'embedding_model': Config.EMBEDDING_MODEL,
+            'vector_dimensions': Config.EMBEDDING_DIMENSIONS,
+            'totals': {
+                **totals,
+                'vector_mb': round(vector_bytes(totals['chunks']) / (1024 * 1024), 3),
+                'embedding_cost_usd': embedding_cost(totals['embedded_tokens'])
+            },
+            'by_service': by_service,
+            'chunk_tokens_histogram': {
+                'buckets': [str(bound) for bound in CHUNK_TOKEN_BUCKETS] + ['+Inf'],
+                'doc_types': dict(sorted(self.histograms.items()))
+            },
+            'throughput': throughput
+        }
+
+# ============================================
+# MANIFIESTO DE CHUNKS
+# ============================================
+
+def load_manifest(path: Path) -> Dict:
+    """Manifiesto de la ejecución anterior (vacío si no existe)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def source_exists(source: str, root: Optional[Path] = None) -> bool:
+    """True si el origen de una entrada existe (relativo a ``root`` si se indica)"""
+    return (Path(root) / source if root is not None else Path(source)).exists()
+
+def diff_manifest(previous: Dict, documents: Dict[str, Dict],
+                  root: Optional[Path] = None) -> Tuple[Dict, Dict]:
+    """Compara los documentos de esta ejecución con el manifiesto anterior.
+    
+    Devuelve el manifiesto actualizado y el diff. Los documentos no procesados
+    ahora se conservan salvo que su origen ya no exista (eliminados); el
+    origen es relativo al directorio de entrada ``root`` del nodo. Dentro
+    de un documento los chunks se comparan por huella: los que sobran de un
+    lado y del otro se emparejan como cambiados. Si cambia el modelo o la
+    dimensión de los embeddings, todo chunk procesado cuenta como nuevo.
+    """
+    model_changed = bool(previous) and (
+        previous.get('embedding_model') != Config.EMBEDDING_MODEL
+        or previous.get('vector_dimensions') != Config.EMBEDDING_DIMENSIONS
+    )
+    old_documents = {} if model_changed else previous.get('documents', {})
+    merged = dict(old_documents)
+    diff = dict.fromkeys((
+        'documents_added', 'documents_changed', 'documents_unchanged', 'documents_removed',
+        'chunks_added', 'chunks_changed', 'chunks_unchanged', 'chunks_removed', 'tokens_to_embed'
+    ), 0)
+    
+    for document_id, entry in documents.items():
+        merged[document_id] = entry
+        old = old_documents.get(document_id)
+        remaining = Counter(h for h, _ in old['chunks']) if old else Counter()
+        fresh = []
+        for h, tokens in entry['chunks']:
+            if remaining[h] > 0:
+                remaining[h] -= 1
+                diff['chunks_unchanged'] += 1
+            else:
+                fresh.append(tokens)
+        gone = sum(remaining.values())
+        changed = min(len(fresh), gone)
+        
+        diff['chunks_added'] += len(fresh) - changed
+        diff['chunks_changed'] += changed
+        diff['chunks_removed'] += gone - changed
+        diff['tokens_to_embed'] += sum(fresh)
+        if old is None:
+            diff['documents_added'] += 1
+        elif fresh or gone:
+            diff['documents_changed'] += 1
+        else:
+            diff['documents_unchanged'] += 1
+    
+    for document_id, old in old_documents.items():
+        if document_id not in documents and not source_exists(old['source'], root):
+            del merged[document_id]
+            diff['documents_removed'] += 1
+            diff['chunks_removed'] += len(old['chunks'])
+    
+    diff['embedding_cost_usd'] = embedding_cost(diff['tokens_to_embed'])
+    diff['model_changed'] = model_changed
+    diff['previous_manifest'] = previous.get('generated')
+    
+    manifest = {
+        'generated': datetime.now().isoformat(),
+        'embedding_model': Config.EMBEDDING_MODEL,
+        'vector_dimensions': Config.EMBEDDING_DIMENSIONS,
+        'documents': merged
+    }
+    return manifest, diff
+
+def write_manifest(manifest: Dict, path: Path) -> Path:
+    """Guarda el manifiesto compacto (una huella y tokens por chunk)"""
+    path = Path(path)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+    tmp.replace(path)
+    return path
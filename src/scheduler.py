@@ -0,0 +1,338 @@
+"""Planificación de documentos por coste y pool de workers con límite de memoria"""
+
+import os
+import queue
+import logging
+import multiprocessing as mp
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .chunk_store import CHUNK_STORE_PART_PREFIX
+from .config import Config
+from .log import setup_logging, stop_logging
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# PLANIFICACIÓN
+# ============================================
+
+def file_size(file_path: Path) -> int:
+    """Tamaño de un archivo en bytes (0 si desapareció entre el listado y el stat)"""
+    try:
+        return file_path.stat().st_size
+    except OSError:
+        return 0
+
+def estimate_cost(file_path: Path) -> float:
+    """Coste estimado de un documento: bytes × factor por formato"""
+    factor = Config.COST_FACTORS.get(file_path.suffix.lower(), 1.0)
+    return file_size(file_path) * factor
+
+def plan_work(files: List[Path]) -> Tuple[List[Path], List[Path]]:
+    """Separa los archivos en carril normal y carril de archivos grandes.
+    
+    Ambos carriles se ordenan por coste descendente para que los documentos
+    caros empiecen primero y no queden al final de la ejecución.
+    """
+    limit = Config.MAX_FILE_SIZE_MB * 1024 * 1024
+    regular, large = [], []
+    for file_path in sorted(files, key=estimate_cost, reverse=True):
+        (large if file_size(file_path) > limit else regular).append(file_path)
+    return regular, large
+
+def process_rss(pid: int) -> int:
+    """RSS de un proceso en bytes (0 si no se puede medir)"""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+# ============================================
+# WORKERS
+# ============================================
+
+def _worker_main(config_overrides: Dict, tasks, results, max_documents: int, max_bytes: int,
+                 input_root: Optional[str] = None, encodings: Optional[Dict[str, str]] = None):
+    """Bucle de un worker: procesa documentos hasta alcanzar su límite"""
+    for key, value in config_overrides.items():
+        setattr(Config, key, value)
+    
+    # El hilo del listener no sobrevive a fork: cada worker tiene el suyo
+    setup_logging()
+    
+    from .process_docs import DocumentProcessor
+    from .processors import pdfium_abandoned
+    processor = DocumentProcessor()
+    processor.chunk_store_name = f"{CHUNK_STORE_PART_PREFIX}{os.getpid()}"
+    processor.input_root = Path(input_root) if input_root is not None else None
+    if encodings is not None:
+        processor.encodings = encodings  # Cargada una vez en el proceso principal
+    pid = os.getpid()
+    documents = 0
+    processed_bytes = 0
+    
+    try:
+        while True:
+            file_path = tasks.get()
+            if file_path is None:
+                break
+            
+            # El tamaño se toma antes: el archivo puede borrarse mientras se procesa
+            size = file_size(Path(file_path))
+            before = dict(processor.stats)
+            try:
+                processor.process_document(Path(file_path))
+            except Exception as e:
+                logger.error("❌ Error procesando %s: %s", Path(file_path).name, e,
+                             extra={'event': 'document_failed', 'file': str(file_path)})
+                processor.stats['failed'] += 1
+            delta = {key: processor.stats[key] - before.get(key, 0) for key in processor.stats}
+            delta['aggregate'] = processor.aggregate.drain()
+            
+            documents += 1
+            processed_bytes += size
+            # Un hilo abandonado dentro de pdfium solo se detiene terminando el proceso
+            retiring = documents >= max_documents or processed_bytes >= max_bytes or pdfium_abandoned()
+            results.put(('done', pid, file_path, delta, retiring))
+            if retiring:
+                break
+    finally:
+        processor.close_chunk_store()
+        results.put(('retired', pid, None, None, True))
+        stop_logging()
+
+class _Worker:
+    """Proceso worker con su propia cola de tareas (una tarea a la vez)"""
+    
+    def __init__(self, ctx, lane: str, config_overrides: Dict, results, input_root: Optional[Path] = None,
+                 encodings: Optional[Dict[str, str]] = None):
+        self.lane = lane
+        self.tasks = ctx.Queue()
+        self.current: Optional[str] = None
+        self.current_size = 0
+        self.retiring = False
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(config_overrides, self.tasks, results,
+                  Config.WORKER_MAX_DOCUMENTS, Config.WORKER_MAX_MB * 1024 * 1024,
+                  str(input_root) if input_root is not None else None, encodings),
+            daemon=True
+        )
+        self.process.start()
+    
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+    
+    def assign(self, file_path: Path):
+        self.current = str(file_path)
+        self.current_size = file_size(file_path)
+        self.tasks.put(self.current)
+    
+    def stop(self):
+        self.tasks.put(None)
+
+class WorkerPool:
+    """Pool de workers con admisión por memoria y carril para archivos grandes.
+    
+    - Un documento solo se despacha si los bytes en vuelo más su tamaño no
+      superan ``Config.MAX_IN_FLIGHT_MB`` y el RSS total de los workers está
+      por debajo de ``Config.MAX_WORKERS_RSS_MB`` (siempre se admite uno si
+      no hay nada en vuelo).
+    - Los archivos mayores que ``Config.MAX_FILE_SIZE_MB`` van a un carril
+      con ``Config.LARGE_FILE_WORKERS`` workers.
+    - Cada worker se recicla tras ``Config.WORKER_MAX_DOCUMENTS`` documentos
+      o ``Config.WORKER_MAX_MB`` MB procesados.
+    
+    ``input_root`` es el directorio de entrada: las claves del manifiesto son
+    relativas a él. ``encodings`` es la caché de encodings del proceso
+    principal: cada worker (también los reciclados) arranca con ella en lugar
+    de leerla de disco.
+    """
+    
+    def __init__(self, workers: int, large_workers: Optional[int] = None,
+                 input_root: Optional[Path] = None, encodings: Optional[Dict[str, str]] = None):
+        self.lane_sizes = {
+            'regular': max(1, workers),
+            'large': max(1, large_workers if large_workers is not None else Config.LARGE_FILE_WORKERS)
+        }
+        self.ctx = mp.get_context()
+        self.results = self.ctx.Queue()
+        self.config_overrides = {
+            key: getattr(Config, key) for key in dir(Config) if key.isupper()
+        }
+        self.input_root = input_root
+        self.encodings = encodings
+        self.workers: Dict[int, _Worker] = {}
+        self.pending: Dict[str, List[Path]] = {'regular': [], 'large': []}
+        self.queued: Set[str] = set()    # Rutas en pending encoladas con submit
+        self.deferred: Set[str] = set()  # Cambiaron mientras estaban en vuelo; se reencolan al terminar
+        self.in_flight_bytes = 0
+        self.max_in_flight = Config.MAX_IN_FLIGHT_MB * 1024 * 1024
+        self.max_rss = Config.MAX_WORKERS_RSS_MB * 1024 * 1024
+        self.peak_rss = 0
+        self.recycled = 0
+    
+    def _lane_workers(self, lane: str) -> List[_Worker]:
+        return [w for w in self.workers.values() if w.lane == lane]
+    
+    def _spawn(self, lane: str):
+        worker = _Worker(self.ctx, lane, self.config_overrides, self.results, self.input_root,
+                         self.encodings)
+        self.workers[worker.pid] = worker
+    
+    def _total_rss(self) -> int:
+        rss = sum(process_rss(pid) for pid in self.workers)
+        self.peak_rss = max(self.peak_rss, rss)
+        return rss
+    
+    def _admit(self, size: int) -> bool:
+        if self.in_flight_bytes == 0:
+            return True
+        if self.in_flight_bytes + size > self.max_in_flight:
+            return False
+        return self._total_rss() < self.max_rss
+    
+    def _dispatch(self, results: List):
+        for lane, files in self.pending.items():
+            if not files:
+                continue
+            self._ensure_workers(lane)
+            
+            for worker in self._lane_workers(lane):
+                if worker.current is not None or worker.retiring:
+                    continue
+                # Archivos borrados antes de despacharse: se dan por fallidos sin worker
+                while files and not files[0].exists():
+                    self._vanished(files.pop(0), results)
+                if not files:
+                    break
+                if not self._admit(file_size(files[0])):
+                    break  # Sin presupuesto en este carril; el siguiente puede admitir el suyo
+                worker.assign(files.pop(0))
+                self.queued.discard(worker.current)
+                self.in_flight_bytes += worker.current_size
+    
+    def _vanished(self, file_path: Path, results: List):
+        self.queued.discard(str(file_path))
+        logger.warning("⚠️  %s desapareció antes de procesarse", file_path.name,
+                       extra={'event': 'document_vanished', 'file': str(file_path)})
+        results.append((str(file_path), False, {'failed': 1}))
+    
+    def _ensure_workers(self, lane: str):
+        while len(self._lane_workers(lane)) < self.lane_sizes[lane]:
+            self._spawn(lane)
+    
+    def _finish(self, worker: _Worker):
+        if worker.current is not None:
+            file_path = worker.current
+            self.in_flight_bytes -= worker.current_size
+            worker.current = None
+            worker.current_size = 0
+            # Cambió mientras se procesaba: se procesa otra vez ahora que no hay otro worker con él
+            if file_path in self.deferred:
+                self.deferred.discard(file_path)
+                if Path(file_path).exists():
+                    self.submit(Path(file_path))
+    
+    def warm(self):
+        """Arranca ya los workers del carril normal (tokenizer cargado)"""
+        self._ensure_workers('regular')
+    
+    def submit(self, file_path: Path) -> bool:
+        """Encola un documento en el carril que le corresponde por tamaño.
+        
+        Un documento ya pendiente no se duplica (la versión encolada leerá el
+        contenido nuevo). Si está en vuelo se retiene y se reencola cuando
+        termine, para que dos workers no escriban las mismas salidas a la
+        vez. Devuelve False si el envío se fusionó con uno anterior.
+        """
+        key = str(file_path)
+        if key in self.queued or key in self.deferred:
+            return False
+        if any(worker.current == key for worker in self.workers.values()):
+            self.deferred.add(key)
+            return True
+        
+        limit = Config.MAX_FILE_SIZE_MB * 1024 * 1024
+        lane = 'large' if file_size(file_path) > limit else 'regular'
+        self.pending[lane].append(file_path)
+        self.queued.add(key)
+        return True
+    
+    @property
+    def busy(self) -> bool:
+        """True si quedan documentos pendientes o en proceso"""
+        return any(self.pending.values()) or any(w.current for w in self.workers.values())
+    
+    def poll(self, timeout: float = 1.0) -> List[Tuple[str, bool, Dict]]:
+        """Despacha trabajo y recoge resultados: lista de (path, ok, stats_delta)"""
+        results = []
+        self._dispatch(results)
+        
+        try:
+            kind, pid, file_path, delta, retiring = self.results.get(timeout=timeout)
+        except queue.Empty:
+            self._reap_dead(results)
+            return results
+        
+        worker = self.workers.get(pid)
+        if kind == 'done':
+            if worker is not None:
+                self._finish(worker)
+                worker.retiring = retiring
+            results.append((file_path, delta.get('processed', 0) > 0, delta))
+        elif kind == 'retired' and worker is not None:
+            # Retirado sin informar de su tarea: el worker falló fuera del documento
+            if worker.current is not None:
+                file_path = worker.current
+                self._finish(worker)
+                logger.error("❌ Worker %d se retiró sin terminar %s", pid, Path(file_path).name,
+                             extra={'event': 'worker_died', 'pid': pid, 'file': file_path})
+                results.append((file_path, False, {'failed': 1}))
+            worker.retiring = True
+            worker.process.join()
+            del self.workers[pid]
+            self.recycled += 1
+        return results
+    
+    def run(self, regular: List[Path], large: List[Path],
+            on_result: Callable[[str, bool, Dict], None]):
+        """Procesa ambos carriles; ``on_result(path, ok, stats_delta)`` por documento"""
+        self.pending['regular'].extend(regular)
+        self.pending['large'].extend(large)
+        
+        try:
+            while self.busy:
+                for result in self.poll():
+                    on_result(*result)
+        finally:
+            self.shutdown()
+    
+    def _reap_dead(self, results: List):
+        """Detecta workers muertos (p. ej. OOM) y da por fallida su tarea"""
+        for pid, worker in list(self.workers.items()):
+            # Un worker reciclado sale con código 0; sus mensajes siguen en la cola
+            if worker.process.is_alive() or worker.process.exitcode == 0:
+                continue
+            if worker.current is not None:
+                file_path = worker.current
+                self._finish(worker)
+                logger.error("❌ Worker %d terminó inesperadamente procesando %s", pid, Path(file_path).name,
+                             extra={'event': 'worker_died', 'pid': pid, 'file': str(file_path),
+                                    'exitcode': worker.process.exitcode})
+                results.append((file_path, False, {'failed': 1}))
+            del self.workers[pid]
+    
+    def shutdown(self):
+        """Detiene todos los workers"""
+        for worker in self.workers.values():
+            if worker.process.is_alive():
+                worker.stop()
+        for worker in self.workers.values():
+            worker.process.join(timeout=30)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self.workers.clear()
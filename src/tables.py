@@ -0,0 +1,115 @@
+"""Renderizado de tablas extraídas: markdown o formato compacto tipo CSV"""
+
+import csv
+import io
+from typing import Iterable, List, Optional, Sequence
+
+from .config import Config
+
+# 'markdown': tabla markdown; 'compact': CSV (menos tokens, sin separadores ni bordes)
+TABLE_FORMATS = ('markdown', 'compact')
+
+def normalize_cell(value) -> str:
+    """Texto de una celda: None/NaN vacíos y espacios internos colapsados"""
+    if value is None or value != value:  # NaN de pandas
+        return ""
+    return " ".join(str(value).split())
+
+def normalize_rows(table: Iterable[Sequence]) -> List[List[str]]:
+    """Normaliza las celdas, descarta filas vacías e iguala el ancho de las filas"""
+    rows = []
+    for row in table:
+        if not row:
+            continue
+        cells = [normalize_cell(cell) for cell in row]
+        if any(cells):
+            rows.append(cells)
+    if not rows:
+        return []
+    width = max(len(row) for row in rows)
+    for row in rows:
+        if len(row) < width:
+            row.extend([""] * (width - len(row)))
+    return rows
+
+def _header_key(row: List[str]) -> tuple:
+    """Cabecera sin las celdas vacías añadidas al igualar el ancho"""
+    end = len(row)
+    while end and not row[end - 1]:
+        end -= 1
+    return tuple(row[:end])
+
+def _markdown_row(row: List[str]) -> str:
+    # Escapar '|' una vez por fila: las celdas ya no contienen saltos de línea
+    line = "\n".join(row)
+    if '|' in line:
+        line = line.replace('|', '\\|')
+    return "| " + line.replace("\n", " | ") + " |"
+
+def _render_markdown(header: Optional[List[str]], body: List[List[str]]) -> str:
+    lines = []
+    if header is not None:
+        lines.append(_markdown_row(header))
+        lines.append("| " + " | ".join(["---"] * len(header)) + " |")
+    lines.extend(_markdown_row(row) for row in body)
+    return "\n".join(lines)
+
+def _render_compact(header: Optional[List[str]], body: List[List[str]]) -> str:
+    rows = body if header is None else [header] + body
+    lines = []
+    quoted = None
+    for row in rows:
+        line = ",".join(row)
+        # Solo las filas con comas o comillas dentro de una celda necesitan csv
+        if line.count(',') != len(row) - 1 or '"' in line:
+            if quoted is None:
+                quoted = io.StringIO()
+                writer = csv.writer(quoted, lineterminator="")
+            quoted.seek(0)
+            quoted.truncate()
+            writer.writerow(row)
+            line = quoted.getvalue()
+        lines.append(line)
+    return "\n".join(lines)
+
+_RENDERERS = {
+    'markdown': _render_markdown,
+    'compact': _render_compact
+}
+
+def render_table(table: Iterable[Sequence], table_format: Optional[str] = None) -> str:
+    """Renderiza una tabla; la primera fila es la cabecera"""
+    return TableRenderer(table_format).render(table)
+
+class TableRenderer:
+    """Renderiza las tablas de un documento en orden.
+    
+    Recuerda la última cabecera: si una tabla empieza con la misma cabecera
+    que la anterior (tabla partida por un salto de página) solo se emiten
+    sus filas. Quien llama debe llamar a ``break_continuity`` cuando entre
+    dos tablas haya otro contenido, para que una tabla distinta con la misma
+    cabecera la conserve. Las repeticiones de la cabecera dentro de una
+    tabla también se descartan.
+    """
+    
+    def __init__(self, table_format: Optional[str] = None):
+        self.table_format = table_format or Config.TABLE_FORMAT
+        if self.table_format not in _RENDERERS:
+            raise ValueError(f"Formato de tabla no soportado: {self.table_format}")
+        self._last_header = None
+    
+    def break_continuity(self):
+        """La siguiente tabla no puede continuar la anterior: emitirá su cabecera"""
+        self._last_header = None
+    
+    def render(self, table: Iterable[Sequence]) -> str:
+        rows = normalize_rows(table)
+        if not rows:
+            return ""
+        
+        header = rows[0]
+        key = _header_key(header)
+        body = [row for row in rows[1:] if row[0] != header[0] or _header_key(row) != key]
+        continued = key == self._last_header
+        self._last_header = key
+        return _RENDERERS[self.table_format](None if continued else header, body)
@@ -2,26 +2,64 @@
 
 import hashlib
 import re
-import chardet
+import threading
 from pathlib import Path
-from typing import List
+from typing import Callable, List
+
+from .encoding import decode_text, map_file
+from .tables import render_table
+
+class ExtractionTimeout(TimeoutError):
+    """Se lanza cuando una extracción excede su tiempo límite"""
+
+def run_with_deadline(seconds: float, fn: Callable, *args):
+    """Ejecuta ``fn(*args)`` en un hilo y espera como máximo ``seconds``.
+    
+    A diferencia de una alarma (SIGALRM), funciona fuera del hilo principal
+    y con llamadas nativas que liberan el GIL (pypdfium2). Un hilo que excede
+    el plazo no se puede interrumpir: se abandona (daemon) y termina por su
+    cuenta, así que quien llama no debe volver a usar el objeto que maneja.
+    """
+    if not seconds:
+        return fn(*args)
+    
+    outcome = {}
+    
+    def target():
+        try:
+            outcome['value'] = fn(*args)
+        except BaseException as e:
+            outcome['error'] = e
+    
+    thread = threading.Thread(target=target, name="deadline", daemon=True)
+    thread.start()
+    thread.join(seconds)
+    if thread.is_alive():
+        raise ExtractionTimeout(f"Tiempo límite excedido ({seconds}s)")
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['value']
 
 def detect_encoding(file_path: Path) -> str:
-    """Detecta encoding del archivo"""
+    """Detecta encoding del archivo (ver ``encoding.decode_text``)"""
     try:
-        with open(file_path, 'rb') as f:
-            result = chardet.detect(f.read(10000))
-            return result['encoding'] or 'utf-8'
-    except:
+        with map_file(file_path) as view:
+            return decode_text(view)[1]
+    except OSError:
         return 'utf-8'
 
+def decode_bytes(data: bytes) -> str:
+    """Decodifica bytes: UTF-8 estricto o el encoding detectado sobre una muestra"""
+    return decode_text(data)[0]
+
 def clean_text(text: str) -> str:
     """Limpia y normaliza el texto"""
     # Eliminar caracteres no imprimibles
     text = ''.join(char for char in text if char.isprintable() or char.isspace())
     
-    # Normalizar espacios
-    text = re.sub(r'\s+', ' ', text)
+    # Normalizar espacios conservando los saltos de línea (filas de tablas, párrafos)
+    text = re.sub(r'[^\S\n]+', ' ', text)
+    text = re.sub(r' ?\n ?', '\n', text)
     text = re.sub(r'\n{3,}', '\n\n', text)
     
     # Eliminar headers/footers comunes de AWS
@@ -38,21 +76,19 @@ def clean_text(text: str) -> str:
     return text.strip()
 
 def table_to_markdown(table_data: List[List]) -> str:
-    """Convierte tabla a formato markdown"""
-    if not table_data or not table_data[0]:
-        return ""
-    
-    # Headers
-    headers = table_data[0]
-    markdown = "| " + " | ".join(str(h) for h in headers) + " |\n"
-    markdown += "| " + " | ".join(["---"] * len(headers)) + " |\n"
-    
-    # Rows
-    for row in table_data[1:]:
-        if row:  # Skip empty rows
-            markdown += "| " + " | ".join(str(cell) for cell in row) + " |\n"
-    
-    return markdown
+    """Convierte tabla a formato markdown (ver ``tables.render_table``)"""
+    return render_table(table_data, 'markdown')
+
+def looks_like_table(text: str, min_rows: int = 3) -> bool:
+    """Heurística: detecta líneas con columnas separadas por espacios o tabs"""
+    column_gap = re.compile(r'\S(?: {2,}|\t)\S')
+    rows = 0
+    for line in text.splitlines():
+        if len(column_gap.findall(line)) >= 2:
+            rows += 1
+            if rows >= min_rows:
+                return True
+    return False
 
 def calculate_file_hash(file_path: Path) -> str:
     """Calcula hash SHA256 del archivo"""
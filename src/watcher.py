@@ -0,0 +1,142 @@
+"""Vigilancia de directorios con debounce (inotify vía watchdog o sondeo)"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # pragma: no cover - dependencia opcional
+    Observer = None
+    FileSystemEventHandler = object
+
+from .config import Config
+
+class _Debouncer:
+    """Agrupa ráfagas de escrituras: un archivo está listo tras un periodo de silencio"""
+    
+    def __init__(self, quiet_seconds: float):
+        self.quiet_seconds = quiet_seconds
+        self._lock = threading.Lock()
+        # path -> (primer evento, último evento)
+        self._events: Dict[Path, Tuple[float, float]] = {}
+    
+    def touch(self, path: Path):
+        now = time.monotonic()
+        with self._lock:
+            first, _ = self._events.get(path, (now, now))
+            self._events[path] = (first, now)
+    
+    def ready(self) -> List[Tuple[Path, float]]:
+        """Archivos sin eventos desde hace ``quiet_seconds`` con su primer evento"""
+        now = time.monotonic()
+        ready = []
+        with self._lock:
+            for path, (first, last) in list(self._events.items()):
+                if now - last >= self.quiet_seconds:
+                    del self._events[path]
+                    ready.append((path, first))
+        return ready
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher: 'DirectoryWatcher'):
+        super().__init__()
+        self.watcher = watcher
+    
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type not in ('created', 'modified', 'moved', 'closed'):
+            return
+        path = getattr(event, 'dest_path', None) or event.src_path
+        self.watcher.record(Path(os.fsdecode(path)))
+
+class DirectoryWatcher:
+    """Detecta documentos nuevos o modificados en uno o varios directorios.
+    
+    Usa inotify (a través de watchdog) si está disponible y, si no, un
+    sondeo periódico de mtime/tamaño. ``ready()`` devuelve los archivos cuya
+    ráfaga de escrituras terminó hace ``Config.WATCH_DEBOUNCE_SECONDS``.
+    
+    Los archivos bajo ``exclude`` (por defecto ``Config.OUTPUT_BASE``) se
+    ignoran: si la salida está dentro de un directorio vigilado, el daemon
+    no vuelve a ingerir sus propios archivos.
+    """
+    
+    def __init__(self, directories: Iterable[Path], extensions: Optional[Iterable[str]] = None,
+                 use_inotify: bool = True, exclude: Optional[Iterable[Path]] = None):
+        self.directories = [Path(d) for d in directories]
+        self.extensions = {ext.lower() for ext in (extensions or Config.SUPPORTED_EXTENSIONS)}
+        self.exclude = [Path(d).resolve() for d in (exclude if exclude is not None else [Config.OUTPUT_BASE])]
+        self.debouncer = _Debouncer(Config.WATCH_DEBOUNCE_SECONDS)
+        self.backend = 'inotify' if use_inotify and Observer is not None else 'polling'
+        self._observer = None
+        self._poll_thread = None
+        self._stop = threading.Event()
+        self._snapshot: Dict[Path, Tuple[int, int]] = {}
+    
+    def excluded(self, path: Path) -> bool:
+        """True si la ruta está bajo un directorio excluido (la salida)"""
+        resolved = path.resolve()
+        return any(resolved == directory or directory in resolved.parents for directory in self.exclude)
+    
+    def record(self, path: Path):
+        """Registra un evento sobre un archivo (filtrando extensiones, temporales y la salida)"""
+        if path.suffix.lower() in self.extensions and not path.name.startswith('.') and not self.excluded(path):
+            self.debouncer.touch(path)
+    
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for directory in self.directories:
+            for root, dirs, names in os.walk(directory):
+                dirs[:] = [d for d in dirs if not self.excluded(Path(root) / d)]
+                for name in names:
+                    path = Path(root) / name
+                    if path.suffix.lower() not in self.extensions:
+                        continue
+                    try:
+                        stat = path.stat()
+                    except OSError:
+                        continue
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+    
+    def _poll(self):
+        while not self._stop.wait(Config.WATCH_POLL_INTERVAL):
+            snapshot = self._scan()
+            for path, signature in snapshot.items():
+                if self._snapshot.get(path) != signature:
+                    self.record(path)
+            self._snapshot = snapshot
+    
+    def start(self, include_existing: bool = False):
+        """Empieza a vigilar; con ``include_existing`` encola los archivos actuales"""
+        existing = self._scan()
+        if include_existing:
+            for path in existing:
+                self.record(path)
+        
+        if self.backend == 'inotify':
+            self._observer = Observer()
+            handler = _EventHandler(self)
+            for directory in self.directories:
+                self._observer.schedule(handler, str(directory), recursive=True)
+            self._observer.start()
+        else:
+            self._snapshot = existing
+            self._poll_thread = threading.Thread(target=self._poll, daemon=True)
+            self._poll_thread.start()
+    
+    def ready(self) -> List[Tuple[Path, float]]:
+        """Archivos listos para procesar: (ruta, instante monotónico del primer evento)"""
+        return [(path, first) for path, first in self.debouncer.ready() if path.exists()]
+    
+    def stop(self):
+        """Detiene la vigilancia"""
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        if self._poll_thread is not None:
+            self._poll_thread.join()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""Genera los fixtures del arnés golden (uno o más por formato soportado).
+
+Los archivos generados están versionados; este script solo documenta cómo
+se crearon y permite regenerarlos. Si cambia algún fixture hay que
+regenerar también los valores esperados:
+
+    python test/fixtures/golden/generate_fixtures.py
+    UPDATE_GOLDEN=1 pytest test/test_golden.py
+"""
+
+import csv
+from pathlib import Path
+
+import docx
+import openpyxl
+
+FIXTURES_DIR = Path(__file__).parent
+
+LAMBDA_GUIDE = """# AWS Lambda Developer Guide
+
+## Getting started
+
+AWS Lambda runs your code without provisioning or managing servers. You pay only
+for the compute time that you consume.
+
+1. Create a function from the console or with `aws lambda create-function`.
+2. Choose a runtime: Python 3.12, Node.js 20 or Java 21.
+3. Configure the handler, memory and timeout.
+
+```python
+def handler(event, context):
+    return {"statusCode": 200, "body": "hola"}
+```
+
+## Quotas
+
+| Resource | Default | Adjustable |
+|---|---|---|
+| Concurrent executions | 1,000 | Yes |
+| Function timeout | 900 seconds | No |
+| Deployment package (.zip) | 50 MB | No |
+
+## Configuración en español
+
+La función se ejecuta en un entorno aislado; el tamaño máximo de la capa es de
+250 MB descomprimida. Los años, las señales y los acentos deben conservarse.
+"""
+
+S3_TROUBLESHOOTING = """Troubleshooting Amazon S3
+
+Error: 403 Access Denied when calling GetObject
+Problem: the bucket policy denies s3:GetObject for the caller.
+Solution: check the bucket policy, the IAM policy and the object ownership
+setting. Objects uploaded by another account need BucketOwnerEnforced.
+
+Error: 503 Slow Down
+Problem: too many requests per prefix.
+Solution: spread keys across prefixes and retry with exponential backoff.
+
+
+
+Solución de problemas en español: la réplica entre regiones falla si el
+versionado no está activado en ambos buckets. Revise también el cifrado
+SSE-KMS y los permisos de la clave — «kms:Decrypt» y «kms:GenerateDataKey».
+"""
+
+DYNAMODB_LEGACY = """Mejores prácticas de DynamoDB (best practices)
+
+Diseño de claves: use una clave de partición con muchos valores distintos
+para repartir el tráfico. Evite las particiones calientes.
+
+Índices secundarios: proyecte solo los atributos necesarios; cada índice
+añade coste de escritura. Recomendación: revise el tamaño de los ítems
+(máximo 400 KB) y comprima los atributos grandes.
+
+Capacidad: el modo bajo demanda simplifica la planificación; el modo
+aprovisionado con auto scaling reduce el coste en cargas estables.
+"""
+
+APIGATEWAY_REFERENCE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <title>Amazon API Gateway API Reference</title>
+</head>
+<body>
+  <nav>Home &gt; API Gateway &gt; API Reference</nav>
+  <h1>API Gateway API Reference</h1>
+  <p>This API reference describes the <code>apigateway</code> REST endpoint
+  and every method it exposes.</p>
+  <h2>CreateRestApi</h2>
+  <p>Creates a new <strong>RestApi</strong> resource.</p>
+  <table>
+    <tr><th>Parameter</th><th>Type</th><th>Required</th></tr>
+    <tr><td>name</td><td>String</td><td>Yes</td></tr>
+    <tr><td>endpointConfiguration</td><td>EndpointConfiguration</td><td>No</td></tr>
+  </table>
+  <h2>GetRestApis</h2>
+  <p>Lists the RestApi resources &amp; their stages. Límite: 500 por página.</p>
+  <ul>
+    <li>position &ndash; pagination token</li>
+    <li>limit &ndash; maximum number of results</li>
+  </ul>
+</body>
+</html>
+"""
+
+PRICING_ROWS = [
+    ["Plan", "Region", "vCPU", "Memory GiB", "Hourly USD", "Notes"],
+    ["m7g.large", "us-east-1", 2, 8, 0.0816, "Graviton3"],
+    ["m7g.xlarge", "us-east-1", 4, 16, 0.1632, ""],
+    ["c7g.large", "eu-west-1", 2, 4, 0.0798, "Compute optimized"],
+    ["r7g.large", "eu-west-1", 2, 16, 0.1189, "Memory optimized, 1:8"],
+    ["t4g.micro", "sa-east-1", 2, 1, 0.0134, "Burstable; año 2024"]
+]
+
+BEDROCK_QUOTAS = [
+    ["Model", "Quota", "Value", "Adjustable"],
+    ["Claude 3 Haiku", "On-demand tokens per minute", 2000000, "Yes"],
+    ["Claude 3 Sonnet", "On-demand requests per minute", 500, "Yes"],
+    ["Titan Text Embeddings V2", "Batch inference jobs", 10, "No"],
+    ["Llama 3 70B", "Provisioned model units", None, "Yes"]
+]
+
+WAF_PAGE_TEXT = [
+    "AWS WAF Developer Guide",
+    "Rule groups and web ACLs",
+    "A web ACL contains rules that inspect requests to CloudFront,",
+    "API Gateway or an Application Load Balancer.",
+    "Each rule has a priority; the first matching rule decides the action.",
+    "Managed rule groups are maintained by AWS and Marketplace sellers."
+]
+
+WAF_TABLE = [
+    ["Rule", "Action", "Priority"],
+    ["AWSManagedRulesCommonRuleSet", "Block", "10"],
+    ["RateLimit2000", "Count", "20"],
+    ["GeoBlockList", "Block", "30"]
+]
+
+def write_docx(path: Path):
+    document = docx.Document()
+    document.core_properties.author = "golden"
+    document.add_heading("Amazon ECS Runbook", 1)
+    document.add_paragraph("How to roll out a new task definition revision without downtime.")
+    table = document.add_table(rows=3, cols=3)
+    for col, header in enumerate(["Step", "Command", "Notes"]):
+        table.cell(0, col).text = header
+    table.cell(1, 0).text = "1"
+    table.cell(1, 1).text = "aws ecs register-task-definition"
+    table.cell(1, 2).merge(table.cell(2, 2)).text = "Retry on throttling"
+    table.cell(2, 0).text = "2"
+    table.cell(2, 1).text = "aws ecs update-service --force-new-deployment"
+    document.add_heading("Rollback", 2)
+    document.add_paragraph("Vuelva a la revisión anterior si el despliegue no alcanza el estado estable.")
+    document.save(path)
+
+def write_xlsx(path: Path):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Quotas"
+    for row in BEDROCK_QUOTAS:
+        sheet.append(row)
+    workbook.save(path)
+
+def pdf_text(x: float, y: float, text: str, size: int = 11) -> str:
+    escaped = text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return f"BT /F1 {size} Tf {x} {y} Td ({escaped}) Tj ET"
+
+def write_pdf(path: Path):
+    """PDF mínimo de dos páginas (Helvetica); la segunda tiene una tabla con trazos"""
+    first = [pdf_text(72, 720, WAF_PAGE_TEXT[0], 16)]
+    first += [pdf_text(72, 690 - 18 * i, line) for i, line in enumerate(WAF_PAGE_TEXT[1:])]
+    
+    second = [pdf_text(72, 720, "Example rules", 14)]
+    widths = (220, 80, 70)
+    top, row_height = 700, 20
+    bottom = top - row_height * len(WAF_TABLE)
+    for r, row in enumerate(WAF_TABLE):
+        x = 72
+        for width, cell in zip(widths, row):
+            second.append(pdf_text(x + 4, top - row_height * (r + 1) + 6, cell, 10))
+            x += width
+    for r in range(len(WAF_TABLE) + 1):
+        y = top - row_height * r
+        second.append(f"72 {y} m {72 + sum(widths)} {y} l S")
+    x = 72
+    for width in (0,) + widths:
+        x += width
+        second.append(f"{x} {top} m {x} {bottom} l S")
+    
+    streams = ["\n".join(first), "\n".join(second)]
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R 4 0 R] /Count 2 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        "/Resources << /Font << /F1 5 0 R >> >> /Contents 6 0 R >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        "/Resources << /Font << /F1 5 0 R >> >> /Contents 7 0 R >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+    ] + [f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream" for stream in streams]
+    
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode('latin-1')
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('latin-1')
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode('latin-1')
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode('latin-1')
+    path.write_bytes(bytes(out))
+
+def main():
+    (FIXTURES_DIR / "lambda_user_guide.md").write_text(LAMBDA_GUIDE, encoding='utf-8')
+    (FIXTURES_DIR / "s3_troubleshooting.txt").write_text(S3_TROUBLESHOOTING, encoding='utf-8')
+    (FIXTURES_DIR / "dynamodb_best_practices_cp1252.txt").write_bytes(DYNAMODB_LEGACY.encode('cp1252'))
+    (FIXTURES_DIR / "apigateway_api_reference.html").write_text(APIGATEWAY_REFERENCE, encoding='utf-8')
+    with open(FIXTURES_DIR / "instance_pricing.csv", 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f, lineterminator='\n').writerows(PRICING_ROWS)
+    write_xlsx(FIXTURES_DIR / "bedrock_quotas.xlsx")
+    write_docx(FIXTURES_DIR / "ecs_runbook.docx")
+    write_pdf(FIXTURES_DIR / "waf_rules.pdf")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Tests para el blob store y los documentos de subida"""
+
+import pytest
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.artifacts import BlobStore, read_upload_document, write_text, write_upload_document
+from src.config import Config
+from src.process_docs import DocumentProcessor
+
+def test_views_share_one_blob(tmp_path):
+    """Test that identical texts are stored once and rewriting a view leaves the blob intact"""
+    store = BlobStore(tmp_path / "blobs")
+    first = tmp_path / "01_processed.txt"
+    second = tmp_path / "02_structured.txt"
+    
+    digest = store.write(first, "contenido de la guía")
+    assert store.write(second, "contenido de la guía") == digest
+    assert len(list((tmp_path / "blobs").rglob("*"))) == 2  # Subdirectorio + blob
+    assert os.path.samefile(first, store.path(digest))
+    assert os.path.samefile(first, second)
+    
+    store.write(first, "contenido de la guía")
+    write_text(second, "versión editada")
+    assert store.path(digest).read_text(encoding='utf-8') == "contenido de la guía"
+    assert second.read_text(encoding='utf-8') == "versión editada"
+    assert not list(tmp_path.glob(".*.tmp"))
+
+@pytest.mark.parametrize("link_mode", ["hardlink", "symlink", "copy"])
+def test_sweep_removes_blobs_without_views(tmp_path, link_mode):
+    """Test that a replaced view's blob is swept, the live one kept, and recent blobs spared"""
+    store = BlobStore(tmp_path / "blobs", link_mode)
+    views = tmp_path / "views"
+    views.mkdir()
+    old = store.write(views / "guide.txt", "versión 1")
+    new = store.write(views / "guide.txt", "versión 2")
+    
+    assert store.sweep([views], min_age_seconds=3600) == {'blobs_removed': 0, 'bytes_freed': 0}
+    swept = store.sweep([views])
+    
+    assert not store.path(old).exists()
+    assert store.path(new).exists() == (link_mode != 'copy')
+    assert swept['blobs_removed'] == (1 if link_mode != 'copy' else 2)
+    assert (views / "guide.txt").read_text(encoding='utf-8') == "versión 2"
+
+def test_reprocessing_a_shorter_document_frees_its_old_blobs(tmp_path, monkeypatch):
+    """Test that stale chunk views are dropped and the report run sweeps their blobs"""
+    monkeypatch.setattr(Config, 'OUTPUT_BASE', tmp_path / "out")
+    monkeypatch.setattr(Config, 'BLOB_SWEEP_GRACE_SECONDS', 0)
+    monkeypatch.setattr(Config, 'CHUNK_PROFILE', None)
+    monkeypatch.setattr(Config, 'CHUNK_SIZES', {'default': 20})
+    monkeypatch.setattr(Config, 'CHUNK_OVERLAPS', {})
+    monkeypatch.setattr(Config, 'CHUNK_OVERLAP', 0)
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    guide = docs / "lambda_guide.txt"
+    
+    guide.write_text(" ".join(f"AWS Lambda paso {i}." for i in range(60)))
+    DocumentProcessor().process_directory(docs)
+    guide.write_text("AWS Lambda user guide, versión corta.")
+    DocumentProcessor().process_directory(docs)
+    
+    chunks = list((tmp_path / "out" / "04_chunks" / "lambda_guide").iterdir())
+    blobs = list((tmp_path / "out" / "blobs").glob("*/*"))
+    assert [p.name for p in chunks] == ["chunk_0000.txt"]
+    # Texto completo (01 y 02 comparten blob) y el único chunk (mismo texto)
+    assert len(blobs) == 1
+    assert all(blob.stat().st_nlink > 1 for blob in blobs)
+
+@pytest.mark.parametrize("compression", [None, "gzip", "zstd"])
+def test_upload_document_roundtrip(tmp_path, compression):
+    """Test compact upload documents with optional compression and stale variant cleanup"""
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    chunks = [{'chunk_index': i, 'text': f"chunk {i} ñ"} for i in range(3)]
+    metadata = {'aws_service': 'lambda', 'doc_type': 'user_guide'}
+    
+    write_upload_document(tmp_path, "guide", "texto", metadata, chunks, compression="gzip" if compression is None else None)
+    path = write_upload_document(tmp_path, "guide", "texto", metadata, chunks, compression=compression)
+    
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]
+    assert read_upload_document(path) == {
+        'content': "texto",
+        'metadata': metadata,
+        'chunks': [{'index': i, 'text': f"chunk {i} ñ"} for i in range(3)]
+    }
@@ -0,0 +1,89 @@
+"""Benchmarks de throughput (pytest-benchmark) con umbrales mínimos.
+
+Los umbrales están muy por debajo de lo que mide un portátil actual: solo
+fallan ante regresiones graves. Para ver las cifras:
+
+    pytest test/test_benchmarks.py --benchmark-only
+"""
+
+import pytest
+import os
+import sys
+from pathlib import Path
+
+pytest.importorskip("pytest_benchmark")
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config import Config
+from src.pipeline import DocumentPipeline
+from src.utils import clean_text
+
+GOLDEN_DIR = Path(os.path.dirname(__file__)) / "fixtures" / "golden"
+FIXTURES = sorted(p for p in GOLDEN_DIR.iterdir() if p.suffix in Config.SUPPORTED_EXTENSIONS)
+
+# Documentos por segundo al extraer (y limpiar) cada fixture
+MIN_EXTRACT_DOCS_PER_SECOND = {
+    '.pdf': 10,
+    '.docx': 5,
+    '.xlsx': 15,
+    '.csv': 40,
+    '.txt': 40,
+    '.md': 40,
+    '.html': 40
+}
+MIN_CLEAN_MB_PER_SECOND = 0.1
+MIN_CHUNK_TOKENS_PER_SECOND = 300_000
+
+# clean_text escala peor que linealmente con el tamaño (patrones perezosos
+# de headers/footers): se mide siempre sobre el mismo volumen
+CLEAN_TEXT_BYTES = 64 * 1024
+CHUNK_TEXT_BYTES = 1024 * 1024
+
+@pytest.fixture(scope="module")
+def pipeline():
+    return DocumentPipeline()
+
+@pytest.fixture(scope="module")
+def corpus_text():
+    """Markdown and plain text fixtures concatenated"""
+    return "\n\n".join(path.read_text(encoding='utf-8') for path in FIXTURES
+                       if path.suffix in ('.md', '.txt') and 'cp1252' not in path.name)
+
+def repeat_to(text: str, size: int) -> str:
+    return text * (size // len(text.encode('utf-8')) + 1)
+
+def best_rate(benchmark, units: float) -> float:
+    """Units per second in the fastest round (infinite with --benchmark-disable)"""
+    if benchmark.disabled:
+        return float('inf')
+    return units / benchmark.stats.stats.min
+
+@pytest.mark.benchmark(group="extract", max_time=0.5)
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda path: path.name)
+def test_extract_throughput(benchmark, pipeline, path):
+    """Test extraction and cleaning throughput for every format"""
+    text, _ = benchmark(pipeline.extract_text, path)
+    assert text
+    assert best_rate(benchmark, 1) >= MIN_EXTRACT_DOCS_PER_SECOND[path.suffix]
+
+@pytest.mark.benchmark(group="clean", max_time=0.5)
+def test_clean_text_throughput(benchmark, corpus_text):
+    """Test clean_text throughput on a fixed-size document"""
+    text = repeat_to(corpus_text, CLEAN_TEXT_BYTES)
+    benchmark(clean_text, text)
+    assert best_rate(benchmark, len(text.encode('utf-8')) / (1024 * 1024)) >= MIN_CLEAN_MB_PER_SECOND
+
+@pytest.mark.benchmark(group="chunk", max_time=0.5)
+def test_tokenize_and_chunk_throughput(benchmark, pipeline, corpus_text):
+    """Test tokenization plus chunking throughput on about 1 MB of cleaned text"""
+    text = clean_text(repeat_to(corpus_text, CLEAN_TEXT_BYTES)) * (CHUNK_TEXT_BYTES // CLEAN_TEXT_BYTES)
+    
+    def tokenize_and_chunk():
+        pipeline.release_encoding()
+        return pipeline.chunk_text(text, 'user_guide')
+    
+    chunks = benchmark(tokenize_and_chunk)
+    tokens = len(pipeline.encode(text))
+    assert chunks
+    assert best_rate(benchmark, tokens) >= MIN_CHUNK_TOKENS_PER_SECOND
@@ -0,0 +1,40 @@
+"""Tests para el chunk store columnar"""
+
+import pytest
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+pytest.importorskip("pyarrow")
+
+from src.chunk_store import ChunkStoreWriter, read_chunk_store
+
+def make_chunks(count):
+    return [
+        {'text': f'chunk {i}', 'chunk_index': i, 'token_count': 2,
+         'start_position': i * 2, 'end_position': i * 2 + 2,
+         'char_start': i * 8, 'char_end': i * 8 + 7}
+        for i in range(count)
+    ]
+
+@pytest.mark.parametrize("store_format", ["parquet", "arrow"])
+def test_chunk_store_roundtrip(tmp_path, store_format):
+    """Test incremental writes and filtering by service"""
+    path = tmp_path / f"chunks.{store_format}"
+    
+    with ChunkStoreWriter(path, format=store_format, row_group_size=3) as store:
+        store.add_document('lambda_guide', {'aws_service': 'lambda', 'doc_type': 'user_guide'}, make_chunks(4))
+        store.add_document('s3_api', {'aws_service': 's3', 'doc_type': 'api_reference'}, make_chunks(2))
+    
+    assert store.rows_written == 6
+    
+    table = read_chunk_store(path, filters={'aws_service': 'lambda'})
+    assert table.num_rows == 4
+    assert table.column('chunk_index').to_pylist() == [0, 1, 2, 3]
+    assert set(table.column('doc_type').to_pylist()) == {'user_guide'}
+
+def test_chunk_store_rejects_unknown_format(tmp_path):
+    """Test that unsupported formats fail early"""
+    with pytest.raises(ValueError):
+        ChunkStoreWriter(tmp_path / "chunks.csv", format='csv')
@@ -27,4 +27,18 @@ def test_adaptive_chunking():
     guide_chunks = processor.chunk_text(text, "user_guide")
     
     # API reference should have smaller chunks
-    assert len(api_chunks) > len(guide_chunks)
\ No newline at end of file
+    assert len(api_chunks) > len(guide_chunks)
+
+def test_chunking_reuses_document_encoding():
+    """Test that metadata and chunking share a single encoding"""
+    processor = DocumentProcessor()
+    text = "Shared tokens for metadata and chunks. " * 200
+    
+    tokens = processor.encode(text)
+    chunks = processor.chunk_text(text, "default")
+    
+    assert processor.encode(text) is tokens
+    assert chunks[-1]['end_position'] == len(tokens)
+    
+    processor.release_encoding()
+    assert processor.encode(text) is not tokens
@@ -0,0 +1,220 @@
+"""Tests para sharding, ledger compartido y combinación de reportes"""
+
+import pytest
+import json
+import os
+import shutil
+import sys
+import time
+import multiprocessing as mp
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src import encoding
+from src.config import Config
+from src.distributed import WorkLedger, merge_reports, parse_shard, select_shard
+from src.process_docs import DocumentProcessor, merge_report_directory
+
+LEGACY_TEXT = "Guía de AWS Lambda: configuración de la función, tamaño máximo y años. " * 20
+
+def lease_all(db_path, node, results):
+    """Simulated node: leases and completes documents until the ledger is empty"""
+    ledger = WorkLedger(db_path)
+    leased = []
+    while True:
+        key = ledger.lease(node)
+        if key is None:
+            break
+        leased.append(key)
+        ledger.complete(key, node)
+    ledger.close()
+    results.put(leased)
+
+def write_corpus(directory):
+    """Three small documents, one of them cp1252"""
+    directory.mkdir()
+    (directory / "lambda_guide.txt").write_text("AWS Lambda user guide. " * 20)
+    (directory / "s3_guide.md").write_text("# Amazon S3\n\nAmazon S3 user guide. " * 20)
+    (directory / "lambda_legacy.txt").write_bytes(LEGACY_TEXT.encode('cp1252'))
+
+def run_node(directory, node, **kwargs):
+    """Runs one node over the directory and returns the re-ingestion diff of its report"""
+    processor = DocumentProcessor()
+    processor.node_id = node
+    processor.process_directory(directory, **kwargs)
+    report, = (Config.OUTPUT_BASE / "logs").glob(f"processing_report_*_{node}.json")
+    return json.loads(report.read_text())['reingestion']
+
+def count_detections(monkeypatch):
+    calls = []
+    detect = encoding.detect_sample_encoding
+    monkeypatch.setattr(encoding, 'detect_sample_encoding', lambda sample: calls.append(1) or detect(sample))
+    return calls
+
+def test_shards_partition_all_files(tmp_path):
+    """Test that every file lands in exactly one shard"""
+    files = [tmp_path / f"doc_{i}.pdf" for i in range(50)]
+    shards = [select_shard(files, tmp_path, i, 4) for i in range(4)]
+    
+    assert sorted(f for shard in shards for f in shard) == sorted(files)
+    assert parse_shard("2/4") == (2, 4)
+    with pytest.raises(ValueError):
+        parse_shard("4/4")
+
+def test_ledger_leases_each_document_once_across_processes(tmp_path):
+    """Test that concurrent local nodes never lease the same document twice"""
+    db_path = tmp_path / "ledger.sqlite"
+    keys = [f"guide_{i}.pdf" for i in range(40)]
+    WorkLedger(db_path).register(keys)
+    
+    results = mp.Queue()
+    nodes = [mp.Process(target=lease_all, args=(db_path, f"node-{n}", results)) for n in range(3)]
+    for node in nodes:
+        node.start()
+    leased = [key for _ in nodes for key in results.get(timeout=30)]
+    for node in nodes:
+        node.join()
+    
+    assert sorted(leased) == sorted(keys)
+    assert WorkLedger(db_path).counts() == {'done': 40}
+
+def test_expired_lease_is_reassigned(tmp_path):
+    """Test that a dead node's lease becomes available after expiry"""
+    ledger = WorkLedger(tmp_path / "ledger.sqlite", lease_seconds=0.05)
+    ledger.register(["runbook.docx"])
+    
+    assert ledger.lease("dead-node") == "runbook.docx"
+    assert ledger.lease("live-node") is None
+    
+    time.sleep(0.1)
+    assert ledger.lease("live-node") == "runbook.docx"
+    assert not ledger.renew("runbook.docx", "dead-node")
+
+def test_merge_reports(tmp_path):
+    """Test that per-shard statistics are summed into one report"""
+    paths = []
+    for index, (processed, failed) in enumerate([(3, 1), (5, 0)]):
+        path = tmp_path / f"processing_report_shard{index}.json"
+        path.write_text(json.dumps({
+            'node': f"node-{index}",
+            'shard': {'index': index, 'count': 2},
+            'statistics': {'processed': processed, 'failed': failed,
+                           'total_size': 1024 * 1024, 'total_chunks': 10, 'success_rate': 0}
+        }))
+        paths.append(path)
+    
+    merged = merge_reports(paths)
+    
+    assert merged['statistics']['processed'] == 8
+    assert merged['statistics']['total_chunks'] == 20
+    assert merged['statistics']['total_size_mb'] == 2
+    assert merged['statistics']['success_rate'] == pytest.approx(8 / 9 * 100)
+    assert len(merged['shards']) == 2
+
+def test_same_shard_on_another_node_finds_its_manifest(tmp_path, monkeypatch):
+    """Test that a shard re-run by a different node sees its documents as unchanged"""
+    monkeypatch.setattr(Config, 'OUTPUT_BASE', tmp_path / "out")
+    docs = tmp_path / "docs"
+    write_corpus(docs)
+    calls = count_detections(monkeypatch)
+    
+    first = run_node(docs, "node-a", shard=(0, 1))
+    assert first['documents_added'] == 3
+    assert len(calls) == 1
+    
+    second = run_node(docs, "node-b", shard=(0, 1))
+    assert second['documents_unchanged'] == 3
+    assert second['documents_added'] == second['tokens_to_embed'] == 0
+    assert len(calls) == 1  # El encoding sale de la caché de la salida
+    assert [p.name for p in (tmp_path / "out").glob("chunk_manifest*")] == ["chunk_manifest_shard0-of-1.json"]
+    assert [p.name for p in (tmp_path / "out").glob("encoding_cache*")] == ["encoding_cache_shard0-of-1.json"]
+
+def test_ledger_nodes_share_one_manifest(tmp_path, monkeypatch):
+    """Test that ledger runs diff against one shared manifest and count a removal once"""
+    monkeypatch.setattr(Config, 'OUTPUT_BASE', tmp_path / "out")
+    docs = tmp_path / "docs"
+    write_corpus(docs)
+    calls = count_detections(monkeypatch)
+    ledgers = tmp_path / "ledgers"
+    
+    assert run_node(docs, "node-a", ledger_path=ledgers / "run1.db")['documents_added'] == 3
+    
+    # Segunda ejecución (ledger nuevo) con otros nodos y un documento borrado
+    (docs / "s3_guide.md").unlink()
+    second = run_node(docs, "node-b", ledger_path=ledgers / "run2.db")
+    third = run_node(docs, "node-c", ledger_path=ledgers / "run2.db")
+    
+    assert second['documents_unchanged'] == 2
+    assert second['documents_added'] == 0
+    assert second['documents_removed'] + third['documents_removed'] == 1
+    assert third['documents_unchanged'] == 0
+    assert len(calls) == 1
+
+def test_merge_reports_only_combines_one_run(tmp_path, monkeypatch):
+    """Test that merging the logs directory keeps the latest run (or the requested one) apart from older runs"""
+    monkeypatch.setattr(Config, 'OUTPUT_BASE', tmp_path / "out")
+    docs = tmp_path / "docs"
+    write_corpus(docs)
+    ledgers = tmp_path / "ledgers"
+    logs = tmp_path / "out" / "logs"
+    
+    run_node(docs, "node-a", ledger_path=ledgers / "run1.db")
+    run_node(docs, "node-b", ledger_path=ledgers / "run2.db")
+    run_node(docs, "node-c", ledger_path=ledgers / "run2.db")
+    first_run = WorkLedger(ledgers / "run1.db").run_id
+    assert first_run != WorkLedger(ledgers / "run2.db").run_id
+    
+    latest = json.loads(merge_report_directory(logs).read_text())
+    assert sorted(shard['node'] for shard in latest['shards']) == ["node-b", "node-c"]
+    assert latest['statistics']['processed'] == 3
+    
+    older = json.loads(merge_report_directory(logs, first_run).read_text())
+    assert [shard['node'] for shard in older['shards']] == ["node-a"]
+    assert older['run_id'] == first_run
+
+def test_merge_reports_without_run_id_is_rejected(tmp_path):
+    """Test that node reports with no run id are never merged blindly"""
+    (tmp_path / "processing_report_20240101_000000_node-a.json").write_text(json.dumps({
+        'timestamp': "2024-01-01T00:00:00", 'node': "node-a", 'statistics': {'processed': 1}
+    }))
+    
+    with pytest.raises(SystemExit):
+        merge_report_directory(tmp_path)
+
+def test_ledger_rejects_parallel_workers(tmp_path, monkeypatch):
+    """Test that ledger mode refuses MAX_WORKERS > 1 instead of silently ignoring it"""
+    monkeypatch.setattr(Config, 'OUTPUT_BASE', tmp_path / "out")
+    monkeypatch.setattr(Config, 'MAX_WORKERS', 2)
+    docs = tmp_path / "docs"
+    write_corpus(docs)
+    
+    with pytest.raises(ValueError):
+        DocumentProcessor().process_directory(docs, ledger_path=tmp_path / "ledger.db")
+
+def test_nodes_with_different_mount_points_keep_each_others_documents(tmp_path, monkeypatch):
+    """Test that a node never counts as removed a document another node read from its own mount"""
+    monkeypatch.setattr(Config, 'OUTPUT_BASE', tmp_path / "out")
+    # La misma entrada compartida, vista en cada nodo bajo otra ruta
+    mount_a, mount_b = tmp_path / "mount_a", tmp_path / "mount_b"
+    write_corpus(mount_a)
+    shutil.copytree(mount_a, mount_b)
+    ledger = tmp_path / "ledgers" / "run1.db"
+    
+    assert run_node(mount_a, "node-a", ledger_path=ledger)['documents_added'] == 3
+    shutil.rmtree(mount_a)  # El punto de montaje de node-a no existe en node-b
+    
+    assert run_node(mount_b, "node-b", ledger_path=ledger)['documents_removed'] == 0
+
+def test_same_file_name_in_two_directories_are_two_documents(tmp_path, monkeypatch):
+    """Test that manifest entries are keyed by relative path, not by file stem"""
+    monkeypatch.setattr(Config, 'OUTPUT_BASE', tmp_path / "out")
+    docs = tmp_path / "docs"
+    for name, service in (("a", "Lambda"), ("b", "Amazon S3")):
+        (docs / name).mkdir(parents=True)
+        (docs / name / "guide.md").write_text(f"# {service}\n\n{service} user guide. " * 20)
+    
+    assert run_node(docs, "node-a", shard=(0, 1))['documents_added'] == 2
+    assert run_node(docs, "node-b", shard=(0, 1))['documents_unchanged'] == 2
+    manifest = json.loads((tmp_path / "out" / "chunk_manifest_shard0-of-1.json").read_text())
+    assert sorted(manifest['documents']) == ["a/guide.md", "b/guide.md"]
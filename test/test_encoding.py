@@ -0,0 +1,45 @@
+"""Tests para la decodificación de texto con UTF-8 estricto y detección por muestreo"""
+
+import pytest
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src import encoding
+from src.encoding import MMAP_MIN_BYTES, decode_text, map_file
+
+SPANISH = "Configuración de la función Lambda: tamaño máximo, años y ñandúes. " * 40
+
+def test_utf8_and_bom_skip_detection(tmp_path, monkeypatch):
+    """Test that UTF-8 (mapped or read) and BOM-marked text never reach the detector"""
+    def fail(data):
+        raise AssertionError("no debería detectarse")
+    monkeypatch.setattr(encoding, 'detect_sample_encoding', fail)
+    
+    path = tmp_path / "large.md"
+    path.write_text(SPANISH * (MMAP_MIN_BYTES // len(SPANISH) + 1), encoding='utf-8')
+    with map_file(path) as view:
+        assert not isinstance(view, bytes)
+        text, name, digest = decode_text(view)
+    assert (name, digest) == ('utf-8', None)
+    assert text.startswith("Configuración")
+    
+    text, name, _ = decode_text(SPANISH.encode('utf-16'))
+    assert (text, name) == (SPANISH, 'utf-16')
+
+def test_legacy_encoding_is_detected_once_per_content(monkeypatch):
+    """Test that non UTF-8 text is detected on a sample and then served from the cache"""
+    data = (SPANISH * 200).encode('cp1252')
+    calls = []
+    detect = encoding.detect_sample_encoding
+    monkeypatch.setattr(encoding, 'detect_sample_encoding', lambda sample: calls.append(len(sample)) or detect(sample))
+    
+    cache = {}
+    text, name, digest = decode_text(data, lambda: cache)
+    assert text == SPANISH * 200
+    assert cache == {digest: name}
+    assert calls[0] < len(data)  # Solo una muestra
+    
+    assert decode_text(data, lambda: cache) == (text, name, digest)
+    assert len(calls) == 1
@@ -0,0 +1,106 @@
+"""Tests golden: salida exacta (texto, clasificación y chunks) de los fixtures de cada formato.
+
+Regenerar los valores esperados tras un cambio intencionado de salida:
+
+    UPDATE_GOLDEN=1 pytest test/test_golden.py
+"""
+
+import pytest
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config import Config
+from src.pipeline import DocumentPipeline
+from src.process_docs import DocumentProcessor
+from src.artifacts import read_upload_document
+from src.run_stats import chunk_hash
+
+GOLDEN_DIR = Path(os.path.dirname(__file__)) / "fixtures" / "golden"
+EXPECTED_PATH = GOLDEN_DIR / "expected.json"
+FIXTURES = sorted(p for p in GOLDEN_DIR.iterdir() if p.suffix in Config.SUPPORTED_EXTENSIONS)
+UPDATE = bool(os.environ.get('UPDATE_GOLDEN'))
+
+# Chunks pequeños para que cada fixture produzca varios, con overlap
+GOLDEN_CHUNK_SIZE = 48
+GOLDEN_CHUNK_OVERLAP = 8
+
+@pytest.fixture(scope="module")
+def expected():
+    """Loads the expected outputs; with UPDATE_GOLDEN=1 rewrites them at teardown"""
+    data = json.loads(EXPECTED_PATH.read_text(encoding='utf-8')) if EXPECTED_PATH.exists() else {}
+    yield data
+    if UPDATE:
+        text = json.dumps(data, indent=2, ensure_ascii=False, sort_keys=True)
+        # Un chunk [hash, tokens] por línea: los diffs muestran qué chunk cambió
+        text = re.sub(r'\[\s+("\w+"),\s+(\d+)\s+\]', r'[\1, \2]', text)
+        EXPECTED_PATH.write_text(text + "\n", encoding='utf-8')
+
+@pytest.fixture
+def golden_config(monkeypatch):
+    """Fixed chunking so the goldens do not depend on the tuned defaults"""
+    monkeypatch.setattr(Config, 'CHUNK_SIZES', {'default': GOLDEN_CHUNK_SIZE})
+    monkeypatch.setattr(Config, 'CHUNK_OVERLAPS', {})
+    monkeypatch.setattr(Config, 'CHUNK_OVERLAP', GOLDEN_CHUNK_OVERLAP)
+    monkeypatch.setattr(Config, 'CHUNK_PROFILE', None)
+    return Config()
+
+def golden_record(text, metadata, chunks):
+    """Deterministic part of a processed document"""
+    record = {
+        'file_type': metadata['file_type'],
+        'aws_service': metadata['aws_service'],
+        'doc_type': metadata['doc_type'],
+        'text_sha256': chunk_hash(text),
+        'token_count': metadata['token_count'],
+        'chunks': [[chunk_hash(chunk['text']), chunk['token_count']] for chunk in chunks]
+    }
+    if 'encoding' in metadata:
+        record['encoding'] = metadata['encoding']
+    return record
+
+def test_every_supported_format_has_a_fixture():
+    """Test that the golden fixtures cover every supported extension"""
+    assert {path.suffix for path in FIXTURES} == set(Config.SUPPORTED_EXTENSIONS)
+
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda path: path.name)
+def test_pipeline_matches_golden(path, golden_config, expected):
+    """Test that extraction, cleaning, classification and chunking match the golden output"""
+    document = DocumentPipeline(golden_config).process(path)
+    chunks = [chunk.to_dict() for chunk in document.chunks]
+    record = golden_record(document.text, document.metadata, chunks)
+    
+    if UPDATE:
+        expected[path.name] = record
+        return
+    assert path.name in expected, "Sin valores esperados: ejecutar con UPDATE_GOLDEN=1"
+    assert record == expected[path.name]
+    
+    # Los offsets de cada chunk recortan exactamente su texto
+    for chunk in chunks:
+        assert document.text[chunk['char_start']:chunk['char_end']] == chunk['text']
+
+def test_processor_outputs_match_golden(tmp_path, golden_config, expected, monkeypatch):
+    """Test that the files written by the processor carry the golden text and chunks"""
+    if UPDATE:
+        pytest.skip("Actualizando valores esperados")
+    monkeypatch.setattr(Config, 'OUTPUT_BASE', tmp_path)
+    processor = DocumentProcessor()
+    
+    for path in FIXTURES:
+        assert processor.process_document(path), path.name
+        golden = expected[path.name]
+        upload = read_upload_document(
+            tmp_path / "05_ready_to_upload" / golden['aws_service'] / f"{path.stem}.json")
+        structured = tmp_path / "02_structured" / golden['aws_service'] / f"{path.stem}.txt"
+        
+        assert chunk_hash(upload['content']) == golden['text_sha256']
+        assert chunk_hash(structured.read_text(encoding='utf-8')) == golden['text_sha256']
+        assert [chunk_hash(chunk['text']) for chunk in upload['chunks']] == [h for h, _ in golden['chunks']]
+        assert len(list((tmp_path / "04_chunks" / path.stem).iterdir())) == len(golden['chunks'])
+    
+    assert processor.stats['processed'] == len(FIXTURES)
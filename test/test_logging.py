@@ -0,0 +1,59 @@
+"""Tests para el logging estructurado en segundo plano"""
+
+import pytest
+import io
+import json
+import logging
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config import Config
+from src.log import PACKAGE_LOGGER, console, setup_logging, stop_logging
+
+@pytest.fixture
+def restore_logging():
+    yield
+    stop_logging()
+    logger = logging.getLogger(PACKAGE_LOGGER)
+    for handler in list(logger.handlers):
+        if not isinstance(handler, logging.NullHandler):
+            logger.removeHandler(handler)
+    logger.setLevel(logging.NOTSET)
+    logger.propagate = True
+
+def test_json_events_are_written_by_listener(restore_logging, monkeypatch):
+    """Test that events become one JSON line each with their extra fields"""
+    monkeypatch.setattr(Config, 'LOG_FORMAT', 'json')
+    stream = io.StringIO()
+    setup_logging(level='INFO', stream=stream)
+    
+    logger = logging.getLogger(f"{PACKAGE_LOGGER}.process_docs")
+    logger.info("✅ %s: %d chunks", "guide.md", 3,
+                extra={'event': 'document_processed', 'file': 'guide.md', 'chunks': 3})
+    logger.debug("detalle que no debe aparecer")
+    console("banner solo para consola")
+    stop_logging()
+    
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record['level'] == 'INFO'
+    assert record['message'] == "✅ guide.md: 3 chunks"
+    assert record['event'] == 'document_processed'
+    assert record['chunks'] == 3
+
+def test_quiet_level_keeps_only_warnings(restore_logging):
+    """Test that WARNING level drops per-document events but keeps errors"""
+    stream = io.StringIO()
+    setup_logging(level='WARNING', log_format='console', stream=stream)
+    
+    logger = logging.getLogger(f"{PACKAGE_LOGGER}.process_docs")
+    logger.info("✅ guide.md procesado")
+    logger.error("❌ broken.pdf: no se pudo extraer texto")
+    stop_logging()
+    
+    output = stream.getvalue()
+    assert "guide.md" not in output
+    assert "broken.pdf" in output
@@ -0,0 +1,115 @@
+"""Tests para la cadena de backends de PDF"""
+
+import pytest
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import PyPDF2
+
+from src import processors
+from src.config import Config
+from src.processors import DocumentTypeProcessor, PDF_BACKENDS, pdfium_abandoned
+from src.utils import ExtractionTimeout, run_with_deadline, looks_like_table
+
+@pytest.fixture(autouse=True)
+def reset_abandoned_pdfium(monkeypatch):
+    """A hung pdfium call disables pdfium for the whole process: keep it per test"""
+    monkeypatch.setattr(processors, '_abandoned_native', [])
+
+@pytest.fixture
+def blank_pdf(tmp_path):
+    """Creates a three-page blank PDF"""
+    writer = PyPDF2.PdfWriter()
+    for _ in range(3):
+        writer.add_blank_page(width=612, height=792)
+    path = tmp_path / "blank.pdf"
+    with open(path, 'wb') as f:
+        writer.write(f)
+    return path
+
+def test_deadline_applies_off_the_main_thread():
+    """Test that run_with_deadline gives up on a blocking call even from a worker thread"""
+    outcome = {}
+    
+    def call():
+        try:
+            run_with_deadline(0.05, time.sleep, 5)
+        except ExtractionTimeout as e:
+            outcome['error'] = e
+    
+    start = time.perf_counter()
+    thread = threading.Thread(target=call)
+    thread.start()
+    thread.join()
+    
+    assert isinstance(outcome.get('error'), ExtractionTimeout)
+    assert time.perf_counter() - start < 1
+    assert run_with_deadline(1, sum, [1, 2]) == 3
+
+def test_looks_like_table():
+    """Test the column-layout heuristic"""
+    table = "\n".join(["Name    Limit    Region"] * 3)
+    prose = "Amazon Bedrock is a fully managed service.\n" * 3
+    
+    assert looks_like_table(table)
+    assert not looks_like_table(prose)
+
+def test_pdf_backend_chain_records_timings(blank_pdf):
+    """Test that every page is extracted and backend timings are recorded"""
+    text, metadata = DocumentTypeProcessor.extract_from_pdf(blank_pdf)
+    
+    assert metadata['pages'] == 3
+    assert text.count("[Página") == 3
+    assert metadata['pdf_failed_pages'] == []
+    assert sum(metadata['pdf_page_backends'].values()) == 3
+    assert metadata['pdf_backend_timings']
+
+def test_pdf_page_falls_back_to_next_backend(blank_pdf, monkeypatch):
+    """Test that a page exceeding the timeout is retried with the next backend"""
+    slow = PDF_BACKENDS['pypdfium2']
+    extract_text = slow.extract_text
+    
+    def hang(self, page_index):
+        time.sleep(5)
+    
+    monkeypatch.setattr(slow, 'extract_text', hang)
+    monkeypatch.setattr(Config, 'PDF_PAGE_TIMEOUT', 0.05)
+    
+    text, metadata = DocumentTypeProcessor.extract_from_pdf(blank_pdf)
+    
+    assert 'pypdfium2' not in metadata['pdf_page_backends']
+    assert metadata['pdf_page_backends']['pdfplumber'] == 3
+    # Tras el primer plazo vencido el backend se abandona: no se espera en cada página
+    assert metadata['pdf_backend_timings']['pypdfium2'] < 1
+    
+    # pdfium no es thread-safe: el proceso no lo vuelve a usar hasta reciclarse
+    assert pdfium_abandoned()
+    monkeypatch.setattr(slow, 'extract_text', extract_text)
+    _, metadata = DocumentTypeProcessor.extract_from_pdf(blank_pdf)
+    assert metadata['pdf_page_backends'] == {'pdfplumber': 3}
+
+def test_pdfplumber_releases_page_objects(blank_pdf):
+    """Test that the pdfplumber fallback frees each page's parsed objects after use"""
+    backend = PDF_BACKENDS['pdfplumber'](blank_pdf)
+    try:
+        page_text = backend.extract_text(0)
+        backend.suggests_tables(0, page_text)
+        page = backend.pdf.pages[0]
+        assert not any(hasattr(page, name) for name in page.cached_properties)
+    finally:
+        backend.close()
+
+def test_table_header_only_collapses_on_the_next_page(blank_pdf, monkeypatch):
+    """Test that a same-header table after a page without tables keeps its header"""
+    monkeypatch.setattr(PDF_BACKENDS['pypdfium2'], 'suggests_tables',
+                        lambda self, page_index, page_text: page_index != 1)
+    monkeypatch.setattr(PDF_BACKENDS['pdfplumber'], 'extract_tables',
+                        lambda self, page_index: [[["Rule", "Action"], [f"rule-{page_index}", "Block"]]])
+    
+    text, _ = DocumentTypeProcessor.extract_from_pdf(blank_pdf)
+    
+    assert text.count("| Rule | Action |") == 2
@@ -0,0 +1,58 @@
+"""Tests para la API en memoria (DocumentPipeline)"""
+
+import pytest
+import io
+import os
+import subprocess
+import sys
+import types
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config import Config
+from src.pipeline import Chunk, DocumentPipeline
+
+SAMPLE = Path(os.path.join(os.path.dirname(__file__), "fixtures", "sample.txt"))
+
+def test_process_bytes_has_no_side_effects(tmp_path, monkeypatch, capsys):
+    """Test that in-memory processing neither writes files nor prints"""
+    output_base = tmp_path / "out"
+    monkeypatch.setattr(Config, 'OUTPUT_BASE', output_base)
+    
+    pipeline = DocumentPipeline()
+    document = pipeline.process_bytes(SAMPLE.read_bytes(), "bedrock-guide.txt")
+    
+    assert document.metadata['aws_service'] == 'bedrock'
+    assert document.chunks and isinstance(document.chunks[0], Chunk)
+    assert not output_base.exists()
+    assert capsys.readouterr().out == ""
+
+def test_importing_pipeline_skips_cli_side_effects():
+    """Test that importing the in-memory API neither loads the CLI module nor wraps stdout"""
+    root = os.path.join(os.path.dirname(__file__), '..')
+    script = (
+        "import sys\n"
+        "stdout = sys.stdout\n"
+        "from src.pipeline import DocumentPipeline\n"
+        "assert 'src.process_docs' not in sys.modules\n"
+        "assert sys.stdout is stdout\n"
+        "import src\n"
+        "assert src.DocumentProcessor.__module__ == 'src.process_docs'\n"
+        "assert sys.stdout is stdout\n"
+    )
+    subprocess.run([sys.executable, '-c', script], cwd=root, check=True)
+
+def test_iter_chunks_is_lazy_and_accepts_file_objects():
+    """Test that iter_chunks yields chunk records from a file-like source"""
+    pipeline = DocumentPipeline()
+    data = SAMPLE.read_bytes() * 20
+    
+    chunks = pipeline.iter_chunks(io.BytesIO(data), filename="guide.md")
+    assert isinstance(chunks, types.GeneratorType)
+    
+    chunks = list(chunks)
+    text, _ = pipeline.extract_text(data, "guide.md")
+    assert [c.chunk_index for c in chunks] == list(range(len(chunks)))
+    assert all(text[c.char_start:c.char_end] == c.text for c in chunks)
+    assert chunks[0].document_id == "guide"
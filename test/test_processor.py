@@ -7,7 +7,10 @@ import sys
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
+import docx
+
 from src.process_docs import DocumentProcessor
+from src.processors import DocumentTypeProcessor
 
 def test_processor_initialization():
     """Test processor initialization"""
@@ -20,10 +23,31 @@ def test_text_extraction():
     processor = DocumentProcessor()
     sample_file = Path(os.path.join(os.path.dirname(__file__), "fixtures", "sample.txt"))
     
-    if sample_file.exists():
-        text, metadata = processor.extract_text(sample_file)
-        assert text is not None
-        assert metadata is not None
-        assert 'filename' in metadata
-    else:
-        pytest.skip("Sample file not found")
\ No newline at end of file
+    text, metadata = processor.extract_text(sample_file)
+    assert text.startswith("Amazon Bedrock User Guide")
+    assert metadata['file_type'] == 'txt'
+    assert 'filename' in metadata
+
+def test_docx_extraction_keeps_order_and_merged_cells(tmp_path):
+    """Test that DOCX blocks keep document order and merged cells appear once"""
+    document = docx.Document()
+    document.add_heading("Runbook Lambda", 1)
+    document.add_paragraph("Antes de la tabla")
+    table = document.add_table(rows=3, cols=3)
+    for col, header in enumerate(["Paso", "Comando", "Notas"]):
+        table.cell(0, col).text = header
+    table.cell(1, 0).merge(table.cell(1, 1)).text = "aws lambda invoke"
+    table.cell(1, 2).merge(table.cell(2, 2)).text = "reintentar"
+    table.cell(2, 0).text = "2"
+    document.add_heading("Rollback", 2)
+    document.add_paragraph("Después de la tabla")
+    path = tmp_path / "runbook.docx"
+    document.save(path)
+    
+    text = DocumentTypeProcessor.extract_from_docx(path)
+    
+    assert text.index("# Runbook Lambda") < text.index("| Paso |") < text.index("## Rollback")
+    assert text.count("aws lambda invoke") == 1
+    assert text.count("reintentar") == 1
+    assert "| aws lambda invoke |  | reintentar |" in text
+    assert text.rstrip().endswith("Después de la tabla")
@@ -0,0 +1,80 @@
+"""Tests para el perfilado de chunking del corpus"""
+
+import pytest
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.pipeline import DocumentPipeline
+from src.profiler import (MAX_CHUNK_SIZE, MIN_CHUNK_SIZE, document_structure, profile_corpus,
+                          project_chunks, recommend_chunking, write_chunk_profile)
+
+def count_words(text):
+    return len(text.split())
+
+RUNBOOK = """Lambda runbook
+
+# Deploy
+%s
+
+%s
+
+| Step | Command |
+| --- | --- |
+| 1 | sam build |
+| 2 | sam deploy |
+
+# Rollback
+%s
+""" % ("word " * 40, "word " * 60, "word " * 30)
+
+def test_document_structure_measures_blocks():
+    """Test that paragraphs, sections and tables are measured separately"""
+    structure = document_structure(RUNBOOK, count_words)
+    
+    assert structure['paragraphs'] == [2, 40, 60, 30]
+    assert len(structure['tables']) == 1
+    assert structure['table_rows'] == [2]
+    assert len(structure['sections']) == 2
+    assert structure['sections'][1] == 30
+
+def test_recommendation_stays_within_bounds():
+    """Test that recommendations are clamped and overlap is below chunk size"""
+    small = recommend_chunking({'paragraphs': [10, 12], 'sections': [], 'tables': []})
+    large = recommend_chunking({'paragraphs': [5000], 'sections': [9000, 9000], 'tables': []})
+    
+    assert small['chunk_size'] == MIN_CHUNK_SIZE
+    assert large['chunk_size'] == MAX_CHUNK_SIZE
+    for recommendation in (small, large):
+        assert 0 < recommendation['chunk_overlap'] <= recommendation['chunk_size'] // 5
+        assert recommendation['search_k'] >= 1
+
+def test_projection_follows_chunking_walk():
+    """Test that projected chunks match the pipeline's sliding window"""
+    projection = project_chunks([1000, 100], chunk_size=400, overlap=100, bytes_per_token=4)
+    
+    # 1000 tokens con paso 300: inicios 0, 300, 600, 900 -> 4 chunks; 100 tokens -> 1 chunk
+    assert projection['chunks'] == 5
+    assert projection['embedded_tokens'] == 400 + 400 + 400 + 100 + 100
+
+def test_profile_round_trip(tmp_path):
+    """Test that a written profile is applied by a new pipeline"""
+    corpus = tmp_path / "docs"
+    corpus.mkdir()
+    for i in range(3):
+        (corpus / f"guide_{i}.md").write_text(RUNBOOK)
+    
+    pipeline = DocumentPipeline()
+    profile = profile_corpus(sorted(corpus.glob("*.md")), sample_size=2, pipeline=pipeline)
+    path = write_chunk_profile(profile, tmp_path / "chunk_profile.json")
+    
+    assert profile['corpus'] == {'documents': 3, 'sampled': 2, 'profiled': 2, 'seed': 0}
+    assert json.loads(path.read_text())['chunk_sizes'] == profile['chunk_sizes']
+    
+    tuned = DocumentPipeline(tokenizer=pipeline.tokenizer)
+    tuned.load_chunk_profile(path)
+    doc_type = next(t for t in profile['chunk_sizes'] if t != 'default')
+    assert tuned.chunk_params(doc_type) == (profile['chunk_sizes'][doc_type],
+                                            profile['chunk_overlaps'][doc_type])
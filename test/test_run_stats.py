@@ -0,0 +1,60 @@
+"""Tests para los agregados del reporte y el diff del manifiesto de chunks"""
+
+import pytest
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config import Config
+from src.run_stats import RunAggregate, diff_manifest
+
+def make_chunks(*texts, tokens=100):
+    return [{'text': text, 'chunk_index': i, 'token_count': tokens} for i, text in enumerate(texts)]
+
+def test_worker_aggregates_merge_into_projection(monkeypatch):
+    """Test that per-document deltas merged from workers add up per service and doc type"""
+    monkeypatch.setattr(Config, 'EMBEDDING_DIMENSIONS', 256)
+    worker = RunAggregate()
+    worker.add_document('guide', '/in/guide.md', {'aws_service': 'lambda', 'doc_type': 'user_guide',
+                                                  'token_count': 150}, make_chunks('a', 'b'), 1000)
+    worker.add_timing('extract', 0.5, 2 * 1024 * 1024)
+    
+    run = RunAggregate()
+    run.merge(worker.drain())
+    run.add_document('api', '/in/api.md', {'aws_service': 's3', 'doc_type': 'api_reference',
+                                           'token_count': 90}, make_chunks('c', tokens=5000))
+    
+    assert worker.manifest == {}
+    projection = run.projection()
+    assert projection['totals']['chunks'] == 3
+    assert projection['totals']['embedded_tokens'] == 5200
+    assert projection['by_service']['lambda']['doc_types']['user_guide']['vector_bytes'] == 2 * 256 * 4
+    assert projection['chunk_tokens_histogram']['doc_types']['user_guide'][1] == 2  # <= 128 tokens
+    assert projection['chunk_tokens_histogram']['doc_types']['api_reference'][-1] == 1  # +Inf
+    assert projection['throughput']['extract']['mb_per_second'] == 4.0
+
+def test_manifest_diff_counts_reingestion(tmp_path):
+    """Test added, changed and removed chunks against the previous manifest"""
+    kept_source = tmp_path / "kept.md"
+    kept_source.write_text("x")
+    
+    first = RunAggregate()
+    first.add_document('guide', str(tmp_path / "guide.md"), {'aws_service': 'lambda', 'doc_type': 'user_guide'},
+                       make_chunks('intro', 'setup', 'limits'))
+    first.add_document('kept', str(kept_source), {'aws_service': 's3', 'doc_type': 'user_guide'},
+                       make_chunks('bucket'))
+    first.add_document('deleted', str(tmp_path / "deleted.md"), {'aws_service': 's3', 'doc_type': 'user_guide'},
+                       make_chunks('old', 'older'))
+    previous, diff = diff_manifest({}, first.manifest)
+    assert diff['documents_added'] == 3
+    
+    second = RunAggregate()
+    second.add_document('guide', str(tmp_path / "guide.md"), {'aws_service': 'lambda', 'doc_type': 'user_guide'},
+                        make_chunks('intro', 'setup v2', 'limits', 'quotas', tokens=40))
+    manifest, diff = diff_manifest(previous, second.manifest)
+    
+    assert (diff['chunks_unchanged'], diff['chunks_changed'], diff['chunks_added']) == (2, 1, 1)
+    assert diff['tokens_to_embed'] == 80
+    assert diff['documents_removed'] == 1 and diff['chunks_removed'] == 2
+    assert sorted(manifest['documents']) == ['guide', 'kept']
@@ -0,0 +1,223 @@
+"""Tests para la planificación por coste y la admisión por memoria"""
+
+import pytest
+import multiprocessing as mp
+import os
+import signal
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src import process_docs
+from src.config import Config
+from src.process_docs import DocumentProcessor
+from src.scheduler import WorkerPool, estimate_cost, plan_work
+
+# Los tests con procesos parchean el procesador en el padre y lo heredan por fork
+needs_fork = pytest.mark.skipif(mp.get_start_method() != 'fork', reason="requiere el método de arranque fork")
+
+def write_file(directory, name, size):
+    path = directory / name
+    path.write_bytes(b"x" * size)
+    return path
+
+def test_plan_work_orders_by_cost_and_splits_large_files(tmp_path, monkeypatch):
+    """Test cost ordering and routing of oversized files to the large lane"""
+    monkeypatch.setattr(Config, 'MAX_FILE_SIZE_MB', 1)
+    
+    small_txt = write_file(tmp_path, "small.txt", 1000)
+    small_pdf = write_file(tmp_path, "small.pdf", 1000)
+    big_pdf = write_file(tmp_path, "big.pdf", 2 * 1024 * 1024)
+    
+    regular, large = plan_work([small_txt, big_pdf, small_pdf])
+    
+    assert estimate_cost(small_pdf) > estimate_cost(small_txt)
+    assert regular == [small_pdf, small_txt]
+    assert large == [big_pdf]
+
+def test_worker_pool_admission_caps_in_flight_bytes(monkeypatch):
+    """Test that admission respects the in-flight byte budget"""
+    monkeypatch.setattr(Config, 'MAX_IN_FLIGHT_MB', 10)
+    pool = WorkerPool(workers=2)
+    mb = 1024 * 1024
+    
+    # Con nada en vuelo siempre se admite, aunque exceda el límite
+    assert pool._admit(50 * mb)
+    
+    pool.in_flight_bytes = 8 * mb
+    assert pool._admit(1 * mb)
+    assert not pool._admit(5 * mb)
+
+def test_busy_lane_does_not_starve_the_other(tmp_path, monkeypatch):
+    """Test that a lane without admission budget does not block dispatch of the next lane"""
+    pool = WorkerPool(workers=1, large_workers=1)
+    monkeypatch.setattr(pool, '_ensure_workers', lambda lane: None)
+    monkeypatch.setattr(pool, '_admit', lambda size: size > 1000)
+    assigned = []
+    for pid, lane in ((1, 'regular'), (2, 'large')):
+        pool.workers[pid] = SimpleNamespace(lane=lane, current=None, retiring=False, current_size=0,
+                                            assign=lambda path, lane=lane: assigned.append((lane, path.name)))
+    pool.pending['regular'].append(write_file(tmp_path, "small.txt", 10))
+    pool.pending['large'].append(write_file(tmp_path, "big.txt", 2000))
+    
+    pool._dispatch([])
+    
+    assert assigned == [('large', "big.txt")]
+    assert [p.name for p in pool.pending['regular']] == ["small.txt"]
+
+def test_submit_coalesces_pending_and_holds_in_flight(tmp_path):
+    """Test that resubmitting a queued or in-flight document never runs it twice at once"""
+    pool = WorkerPool(workers=1)
+    busy = write_file(tmp_path, "busy.txt", 10)
+    queued = write_file(tmp_path, "queued.txt", 10)
+    worker = SimpleNamespace(lane='regular', current=str(busy), current_size=10, retiring=False)
+    pool.workers[1] = worker
+    pool.in_flight_bytes = 10
+    
+    assert pool.submit(queued) and not pool.submit(queued)
+    assert pool.submit(busy) and not pool.submit(busy)
+    assert pool.pending['regular'] == [queued]
+    
+    pool._finish(worker)
+    
+    assert pool.pending['regular'] == [queued, busy]
+    assert not pool.deferred and pool.in_flight_bytes == 0
+
+@needs_fork
+def test_pool_recycles_workers_and_merges_one_chunk_store(tmp_path, monkeypatch):
+    """Test both lanes, recycling after each document and a single chunk store across runs"""
+    pytest.importorskip("pyarrow")
+    from src.chunk_store import read_chunk_store
+    
+    monkeypatch.setattr(Config, 'OUTPUT_BASE', tmp_path / "out")
+    monkeypatch.setattr(Config, 'MAX_WORKERS', 2)
+    monkeypatch.setattr(Config, 'WORKER_MAX_DOCUMENTS', 1)
+    monkeypatch.setattr(Config, 'MAX_FILE_SIZE_MB', 0.001)  # > ~1 KB va al carril grande
+    monkeypatch.setattr(Config, 'CHUNK_STORE_FORMAT', 'parquet')
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for i in range(3):
+        (docs / f"lambda_{i}.txt").write_text(f"AWS Lambda user guide {i}. " * 10)
+    (docs / "s3_big.txt").write_text("Amazon S3 user guide. " * 100)
+    
+    merged_parts = []
+    merge = process_docs.merge_chunk_store
+    monkeypatch.setattr(process_docs, 'merge_chunk_store',
+                        lambda parts, *args: merged_parts.append(len(parts)) or merge(parts, *args))
+    
+    store = tmp_path / "out" / "04_chunks" / "chunks.parquet"
+    for run in range(2):
+        if run:
+            (tmp_path / "out" / "04_chunks" / "chunks-1.parquet").write_bytes(b"parte interrumpida")
+        processor = DocumentProcessor()
+        processor.process_files_parallel(DocumentProcessor.find_documents(docs))
+        
+        assert processor.stats['processed'] == 4
+        assert processor.scheduler_stats['large_files'] == 1
+        assert read_chunk_store(store).num_rows == processor.stats['total_chunks']
+        assert [p.name for p in store.parent.glob("*.parquet")] == ["chunks.parquet"]
+    
+    # Un worker por documento: una parte por documento
+    assert merged_parts == [4, 4]
+
+@needs_fork
+def test_workers_receive_the_encoding_cache_from_the_parent(tmp_path, monkeypatch):
+    """Test that only the parent loads the encoding cache, even when workers are recycled"""
+    monkeypatch.setattr(Config, 'OUTPUT_BASE', tmp_path / "out")
+    monkeypatch.setattr(Config, 'MAX_WORKERS', 2)
+    monkeypatch.setattr(Config, 'WORKER_MAX_DOCUMENTS', 1)
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for i in range(3):
+        (docs / f"lambda_{i}.txt").write_bytes(f"Guía {i} de AWS Lambda: configuración y años. ".encode('cp1252') * 20)
+    
+    # Los workers son otros procesos: cada carga deja su pid en un archivo
+    loads = tmp_path / "loads"
+    load = DocumentProcessor.load_encodings
+    def counting_load(self):
+        with open(loads, 'a') as f:
+            f.write(f"{os.getpid()}\n")
+        return load(self)
+    monkeypatch.setattr(DocumentProcessor, 'load_encodings', counting_load)
+    
+    processor = DocumentProcessor()
+    processor.process_files_parallel(DocumentProcessor.find_documents(docs))
+    
+    assert processor.stats['processed'] == 3
+    assert loads.read_text().split() == [str(os.getpid())]
+    assert sorted(set(processor.encodings.values())) == ['cp1252'] and len(processor.encodings) == 3
+
+@needs_fork
+def test_killed_worker_fails_its_document(tmp_path, monkeypatch):
+    """Test that a worker killed mid-document is reaped and its document reported as failed"""
+    monkeypatch.setattr(Config, 'OUTPUT_BASE', tmp_path / "out")
+    monkeypatch.setattr(DocumentProcessor, 'process_document', lambda self, file_path: time.sleep(30))
+    path = write_file(tmp_path, "hang.txt", 100)
+    pool = WorkerPool(workers=1)
+    results = []
+    try:
+        pool.submit(path)
+        pool.poll(timeout=0.01)
+        worker = next(iter(pool.workers.values()))
+        assert worker.current == str(path)
+        os.kill(worker.pid, signal.SIGKILL)
+        
+        deadline = time.monotonic() + 10
+        while pool.busy and time.monotonic() < deadline:
+            results.extend(pool.poll(timeout=0.1))
+    finally:
+        pool.shutdown()
+    
+    assert results == [(str(path), False, {'failed': 1})]
+    assert pool.in_flight_bytes == 0
+
+def test_vanished_file_and_retired_worker_fail_their_document(tmp_path, monkeypatch):
+    """Test that a file deleted before dispatch and a worker retiring mid-task are both reported"""
+    monkeypatch.setattr(WorkerPool, '_ensure_workers', lambda self, lane: None)
+    pool = WorkerPool(workers=1)
+    gone = tmp_path / "gone.txt"
+    worker = SimpleNamespace(lane='regular', current=None, current_size=0, retiring=False,
+                             process=SimpleNamespace(join=lambda: None, is_alive=lambda: True))
+    pool.workers[1] = worker
+    
+    assert pool.submit(gone)
+    assert pool.poll(timeout=0.01) == [(str(gone), False, {'failed': 1})]
+    assert not pool.busy and not pool.queued
+    
+    worker.current, worker.current_size = str(tmp_path / "busy.txt"), 10
+    pool.in_flight_bytes = 10
+    pool.results.put(('retired', 1, None, None, True))
+    assert pool.poll(timeout=5) == [(str(tmp_path / "busy.txt"), False, {'failed': 1})]
+    assert pool.in_flight_bytes == 0 and not pool.workers
+
+@needs_fork
+def test_file_deleted_while_processing_keeps_the_worker(tmp_path, monkeypatch):
+    """Test that deleting a document mid-processing reports it without killing the worker"""
+    monkeypatch.setattr(Config, 'OUTPUT_BASE', tmp_path / "out")
+    monkeypatch.setattr(DocumentProcessor, 'process_document', lambda self, file_path: file_path.unlink())
+    paths = [write_file(tmp_path, f"doc_{i}.txt", 100) for i in range(2)]
+    pool = WorkerPool(workers=1)
+    results = []
+    pool.run(paths, [], lambda *result: results.append(result))
+    
+    assert sorted((path, ok) for path, ok, _ in results) == [(str(path), False) for path in paths]
+    assert pool.in_flight_bytes == 0
+    assert pool.recycled == 0
+
+@needs_fork
+def test_worker_recycles_after_abandoning_pdfium(tmp_path, monkeypatch):
+    """Test that a worker with a thread stuck in pdfium retires after its document"""
+    from src import processors
+    monkeypatch.setattr(Config, 'OUTPUT_BASE', tmp_path / "out")
+    monkeypatch.setattr(DocumentProcessor, 'process_document',
+                        lambda self, file_path: processors._abandoned_native.append(None))
+    paths = [write_file(tmp_path, f"doc_{i}.pdf", 100) for i in range(2)]
+    pool = WorkerPool(workers=1)
+    results = []
+    pool.run(paths, [], lambda *result: results.append(result))
+    
+    assert len(results) == 2
+    assert pool.recycled >= 1
+    assert not processors.pdfium_abandoned()  # El padre no se contamina
@@ -0,0 +1,68 @@
+"""Tests para el renderizado de tablas"""
+
+import pytest
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.processors import DocumentTypeProcessor
+from src.tables import TableRenderer, normalize_rows, render_table
+from src.utils import clean_text
+
+def test_cells_are_normalized_and_rows_padded():
+    """Test that None cells are empty, whitespace collapses and ragged rows are padded"""
+    rows = normalize_rows([
+        ["Region", " On-Demand\n hourly ", "Notes"],
+        ["us-east-1", None],
+        [None, None, None],
+        ["eu-west-1", "0.0416", "Savings  Plans"]
+    ])
+    
+    assert rows == [
+        ["Region", "On-Demand hourly", "Notes"],
+        ["us-east-1", "", ""],
+        ["eu-west-1", "0.0416", "Savings Plans"]
+    ]
+    assert "None" not in render_table(rows)
+
+def test_repeated_header_across_pages_is_collapsed():
+    """Test that a table continued on the next page does not repeat its header"""
+    renderer = TableRenderer('markdown')
+    first = renderer.render([["Region", "Price"], ["us-east-1", "1"]])
+    second = renderer.render([["Region", "Price"], ["eu-west-1", "2"], ["Region", "Price"], ["sa-east-1", "3"]])
+    
+    assert first == "| Region | Price |\n| --- | --- |\n| us-east-1 | 1 |"
+    assert second == "| eu-west-1 | 2 |\n| sa-east-1 | 3 |"
+
+def test_break_continuity_keeps_the_next_header():
+    """Test that a later table with the same header keeps it once other content came between"""
+    renderer = TableRenderer('markdown')
+    renderer.render([["Region", "Price"], ["us-east-1", "1"]])
+    renderer.break_continuity()
+    
+    assert renderer.render([["Region", "Price"], ["eu-west-1", "2"]]).startswith("| Region | Price |")
+
+def test_compact_rows_survive_cleaning():
+    """Test that compact table rows stay on their own lines after clean_text"""
+    output = clean_text("Precios:\n\n" + render_table([["Plan", "vCPU"], ["m7g.large", 2], ["c7g.large", 4]], 'compact'))
+    
+    assert output.splitlines() == ["Precios:", "", "Plan,vCPU", "m7g.large,2", "c7g.large,4"]
+
+def test_compact_format_quotes_only_when_needed():
+    """Test that the compact format is CSV with quoting for commas and quotes"""
+    output = render_table([["Service", "Notes"], ["Lambda", "per 1M, requests"], ["S3", 'say "hi"'], ["EC2", "|"]],
+                          'compact')
+    
+    assert output.splitlines() == ['Service,Notes', 'Lambda,"per 1M, requests"', 'S3,"say ""hi"""', 'EC2,|']
+
+def test_unknown_format_is_rejected():
+    """Test that an unsupported table format raises ValueError"""
+    with pytest.raises(ValueError):
+        TableRenderer('html')
+
+def test_numeric_spreadsheet_keeps_integers():
+    """Test that integer columns of an all-numeric CSV are not rendered as floats"""
+    text = DocumentTypeProcessor.extract_from_spreadsheet(b"vcpu,memory_gib,price\n2,4,0.0416\n", 'csv')
+    
+    assert "| 2 | 4 | 0.0416 |" in text
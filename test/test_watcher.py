@@ -0,0 +1,127 @@
+"""Tests para el watcher de directorios y las métricas del daemon"""
+
+import pytest
+import os
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config import Config
+from src.daemon import IngestDaemon, IngestMetrics
+from src.watcher import DirectoryWatcher
+
+def wait_ready(watcher, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        ready = watcher.ready()
+        if ready:
+            return ready
+        time.sleep(0.05)
+    return []
+
+def test_polling_watcher_debounces_writes(tmp_path, monkeypatch):
+    """Test that a burst of writes yields a single ready document"""
+    monkeypatch.setattr(Config, 'WATCH_POLL_INTERVAL', 0.05)
+    monkeypatch.setattr(Config, 'WATCH_DEBOUNCE_SECONDS', 0.2)
+    (tmp_path / "existing.txt").write_text("already here")
+    
+    watcher = DirectoryWatcher([tmp_path], use_inotify=False)
+    watcher.start()
+    try:
+        target = tmp_path / "guide.md"
+        with open(target, 'w') as f:
+            for _ in range(3):
+                f.write("Lambda guide\n")
+                f.flush()
+                time.sleep(0.06)
+        (tmp_path / "notes.log").write_text("ignored extension")
+        
+        ready = wait_ready(watcher)
+    finally:
+        watcher.stop()
+    
+    assert [path for path, _ in ready] == [target]
+
+def test_metrics_prometheus_output():
+    """Test counters and latency histogram exposition"""
+    metrics = IngestMetrics()
+    metrics.received()
+    metrics.completed(True, {'total_chunks': 3, 'total_tokens': 900}, latency=0.3)
+    
+    text = metrics.to_prometheus()
+    
+    assert "kb_processor_documents_processed_total 1" in text
+    assert "kb_processor_chunks_total 3" in text
+    assert 'kb_processor_latency_seconds_bucket{le="0.5"} 1' in text
+    assert 'kb_processor_latency_seconds_bucket{le="0.25"} 0' in text
+
+def test_daemon_processes_dropped_file(tmp_path, monkeypatch):
+    """Test that a file dropped into a watched directory ends up in the upload folder"""
+    monkeypatch.setattr(Config, 'OUTPUT_BASE', tmp_path / "out")
+    monkeypatch.setattr(Config, 'WATCH_POLL_INTERVAL', 0.05)
+    monkeypatch.setattr(Config, 'WATCH_DEBOUNCE_SECONDS', 0.1)
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    results = []
+    
+    daemon = IngestDaemon([inbox], workers=1, metrics_port=0, use_inotify=False,
+                          on_result=lambda *result: results.append(result))
+    daemon.start()
+    try:
+        (inbox / "lambda_guide.md").write_text("# AWS Lambda user guide\n\nHow to create a function.")
+        deadline = time.monotonic() + 30
+        while not results and time.monotonic() < deadline:
+            daemon.step(timeout=0.1)
+    finally:
+        daemon.shutdown()
+    
+    assert [(Path(path).name, ok) for path, ok, _, _ in results] == [("lambda_guide.md", True)]
+    assert results[0][3] is not None  # Latencia desde que apareció el archivo
+    assert (tmp_path / "out" / "05_ready_to_upload" / "lambda" / "lambda_guide.json").exists()
+    assert daemon.metrics.to_dict()['documents_processed'] == 1
+
+def test_daemon_ignores_its_own_output(tmp_path, monkeypatch):
+    """Test that an output directory inside the watched one is never re-ingested"""
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    monkeypatch.setattr(Config, 'OUTPUT_BASE', inbox / "knowledge_base")
+    monkeypatch.setattr(Config, 'WATCH_POLL_INTERVAL', 0.05)
+    monkeypatch.setattr(Config, 'WATCH_DEBOUNCE_SECONDS', 0.1)
+    results = []
+    
+    daemon = IngestDaemon([inbox], workers=1, metrics_port=0, use_inotify=False,
+                          on_result=lambda *result: results.append(result))
+    daemon.start()
+    try:
+        (inbox / "lambda_guide.md").write_text("# AWS Lambda user guide\n\nHow to create a function.")
+        deadline = time.monotonic() + 30
+        while not results and time.monotonic() < deadline:
+            daemon.step(timeout=0.1)
+        # Las salidas (.txt en 01_processed, 02_structured...) no deben entrar en la cola
+        settle = time.monotonic() + 1
+        while time.monotonic() < settle:
+            daemon.step(timeout=0.05)
+    finally:
+        daemon.shutdown()
+    
+    assert (inbox / "knowledge_base" / "01_processed" / "lambda_guide_processed.txt").exists()
+    assert [Path(path).name for path, _, _, _ in results] == ["lambda_guide.md"]
+
+def test_daemon_step_survives_a_vanished_file(tmp_path, monkeypatch):
+    """Test that a file deleted between the watcher and the pool is reported, not raised"""
+    daemon = IngestDaemon([tmp_path], workers=1, metrics_port=0, use_inotify=False,
+                          on_result=lambda *result: results.append(result))
+    monkeypatch.setattr(daemon.pool, '_ensure_workers', lambda lane: None)
+    daemon.pool.workers[1] = SimpleNamespace(lane='regular', current=None, retiring=False,
+                                             process=SimpleNamespace(is_alive=lambda: True))
+    monkeypatch.setattr(daemon.watcher, 'ready', lambda: [(tmp_path / "gone.md", time.monotonic())])
+    results = []
+    
+    daemon.step(timeout=0.01)
+    
+    assert [(Path(path).name, ok) for path, ok, _, _ in results] == [("gone.md", False)]
+    assert daemon.metrics.to_dict()['documents_failed'] == 1
+    assert not daemon._first_seen